@@ -2,12 +2,161 @@
 Agente Conteudista - Responsável pela criação inicial das questões.
 """
 
-import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional, Tuple
 
-from models.question import Question, Alternative
-from utils.ai_client import AIClient
-from utils.text_processor import check_restricted_words, replace_restricted_words, extract_questions_from_text
+from models.question import Question, Alternative, QUESTION_JSON_SCHEMA
+from utils.ai_client import get_ai_client, to_prompt_json
+from utils.text_processor import iter_json_objects, questions_from_json, replace_restricted_words_in_question
+
+
+# Limite de tokens para a geração de uma questão. Uma questão completa, com
+# alternativas e feedbacks, ocupa bem menos que isso; um limite justo reduz a
+# reserva de memória por requisição no servidor.
+_QUESTION_MAX_TOKENS = 1200
+
+# Partes estáticas dos prompts. Ficam no início do prompt para que o prefixo
+# seja idêntico entre as chamadas e possa ser reaproveitado pelo cache de
+# prompts do provedor; os dados que variam vêm sempre depois.
+_STATIC_PREFIX_SINGLE = """
+        Você é um Professor-Conteudista especializado em elaborar questões educacionais de alta qualidade.
+        
+        INSTRUÇÕES:
+        1. Elabore UMA questão de RESPOSTA ÚNICA para o objetivo de aprendizagem fornecido.
+        2. Siga rigorosamente o formato do template fornecido.
+        3. Evite usar as palavras restritivas listadas abaixo.
+        4. Crie uma questão que avalie compreensão e aplicação, não memorização.
+        5. Forneça feedback detalhado para cada alternativa.
+        6. A questão deve ter exatamente 5 alternativas (a, b, c, d, e), sendo apenas uma correta.
+        7. Todas as alternativas devem ter extensão semelhante.
+        
+        Por favor, elabore a questão no formato JSON seguindo a estrutura abaixo:
+        ```json
+        {
+          "objective_id": "objetivo",
+          "type": "single_answer",
+          "context": "Texto de contextualização...",
+          "statement": "Enunciado da questão...",
+          "alternatives": [
+            {"id": "a", "text": "Alternativa A", "correct": true},
+            {"id": "b", "text": "Alternativa B", "correct": false},
+            {"id": "c", "text": "Alternativa C", "correct": false},
+            {"id": "d", "text": "Alternativa D", "correct": false},
+            {"id": "e", "text": "Alternativa E", "correct": false}
+          ],
+          "feedback": {
+            "a": "Correta. Justificativa para A...",
+            "b": "Incorreta. Justificativa para B...",
+            "c": "Incorreta. Justificativa para C...",
+            "d": "Incorreta. Justificativa para D...",
+            "e": "Incorreta. Justificativa para E..."
+          }
+        }
+        ```
+        
+        TEMPLATE DE QUESTÃO DE RESPOSTA ÚNICA:
+"""
+
+_STATIC_PREFIX_MULTIPLE = """
+        Você é um Professor-Conteudista especializado em elaborar questões educacionais de alta qualidade.
+        
+        INSTRUÇÕES:
+        1. Elabore UMA questão de RESPOSTA MÚLTIPLA para o objetivo de aprendizagem fornecido.
+        2. Siga rigorosamente o formato do template fornecido.
+        3. Evite usar as palavras restritivas listadas abaixo.
+        4. Crie uma questão que avalie compreensão e aplicação, não memorização.
+        5. Forneça feedback detalhado para cada alternativa.
+        6. A questão deve ter 4 afirmativas (I, II, III, IV) e 5 alternativas (a, b, c, d, e).
+        7. Todas as alternativas devem ter extensão semelhante.
+        
+        Por favor, elabore a questão no formato JSON seguindo a estrutura abaixo:
+        ```json
+        {
+          "objective_id": "objetivo",
+          "type": "multiple_answer",
+          "context": "Texto de contextualização...",
+          "statement": "Enunciado da questão...",
+          "assertions": [
+            {"id": "I", "text": "Afirmativa I", "correct": true},
+            {"id": "II", "text": "Afirmativa II", "correct": false},
+            {"id": "III", "text": "Afirmativa III", "correct": true},
+            {"id": "IV", "text": "Afirmativa IV", "correct": false}
+          ],
+          "alternatives": [
+            {"id": "a", "text": "Se apenas as afirmativas I e III estiverem corretas", "correct": true},
+            {"id": "b", "text": "Se apenas as afirmativas II e IV estiverem corretas", "correct": false},
+            {"id": "c", "text": "Se apenas as afirmativas I, II e III estiverem corretas", "correct": false},
+            {"id": "d", "text": "Se apenas as afirmativas II, III e IV estiverem corretas", "correct": false},
+            {"id": "e", "text": "Se todas as afirmativas estiverem corretas", "correct": false}
+          ],
+          "feedback": {
+            "a": "Correta. Justificativa para A...",
+            "b": "Incorreta. Justificativa para B...",
+            "c": "Incorreta. Justificativa para C...",
+            "d": "Incorreta. Justificativa para D...",
+            "e": "Incorreta. Justificativa para E..."
+          }
+        }
+        ```
+        
+        TEMPLATE DE QUESTÃO DE RESPOSTA MÚLTIPLA:
+"""
+
+_STATIC_PREFIX_ASSERTION = """
+        Você é um Professor-Conteudista especializado em elaborar questões educacionais de alta qualidade.
+        
+        INSTRUÇÕES:
+        1. Elabore UMA questão de ASSERÇÃO-RAZÃO para o objetivo de aprendizagem fornecido.
+        2. Siga rigorosamente o formato do template fornecido.
+        3. Evite usar as palavras restritivas listadas abaixo.
+        4. Crie uma questão que avalie compreensão e aplicação, não memorização.
+        5. Forneça feedback detalhado para cada alternativa.
+        6. A questão deve ter duas asserções (I e II) e 5 alternativas (a, b, c, d, e).
+        7. Priorize criar questões onde "as duas asserções são verdadeiras, mas a II não justifica a I" ou "as duas asserções são falsas".
+        
+        Por favor, elabore a questão no formato JSON seguindo a estrutura abaixo:
+        ```json
+        {
+          "objective_id": "objetivo",
+          "type": "assertion_reason",
+          "context": "Texto de contextualização...",
+          "statement": "Avalie as asserções a seguir e a relação proposta entre elas.",
+          "assertions": [
+            {"id": "I", "text": "Asserção I", "correct": true},
+            {"id": "II", "text": "Asserção II (PORQUE)", "correct": true}
+          ],
+          "alternatives": [
+            {"id": "a", "text": "As asserções I e II são proposições verdadeiras, e a II é uma justificativa correta da I.", "correct": false},
+            {"id": "b", "text": "As asserções I e II são proposições verdadeiras, mas a II não é uma justificativa correta da I.", "correct": true},
+            {"id": "c", "text": "A asserção I é uma proposição verdadeira, e a II é uma proposição falsa.", "correct": false},
+            {"id": "d", "text": "A asserção I é uma proposição falsa, e a II é uma proposição verdadeira.", "correct": false},
+            {"id": "e", "text": "As asserções I e II são proposições falsas.", "correct": false}
+          ],
+          "feedback": {
+            "a": "Incorreta. Justificativa para A...",
+            "b": "Correta. Justificativa para B...",
+            "c": "Incorreta. Justificativa para C...",
+            "d": "Incorreta. Justificativa para D...",
+            "e": "Incorreta. Justificativa para E..."
+          }
+        }
+        ```
+        
+        TEMPLATE DE QUESTÃO DE ASSERÇÃO-RAZÃO:
+"""
+
+# Parte variável dos prompts de questão, preenchida com os dados da tarefa
+_PROMPT_SUFFIX_TEMPLATE = """        {template}
+        
+        PALAVRAS A EVITAR (não use estas palavras ou similares):
+        {stopwords}
+        
+        FUNDAMENTAÇÃO TEÓRICA:
+        {theory}
+        
+        OBJETIVO DE APRENDIZAGEM:
+        {objectives}
+        """
 
 
 class ContentAgent:
@@ -19,7 +168,7 @@ class ContentAgent:
         """
         Inicializa o Agente Conteudista.
         """
-        self.ai_client = AIClient()
+        self.ai_client = get_ai_client()
     
     def create_questions(self, objectives: List[str], theory_text: str, 
                         templates: Dict[str, str], stopwords: List[str]) -> List[Question]:
@@ -35,36 +184,82 @@ class ContentAgent:
         Returns:
             Lista de questões criadas
         """
-        # Prepara os dados para o prompt
-        task_data = {
-            "objectives": "\n".join(objectives),
-            "theory": theory_text,
-            "template": json.dumps(templates, ensure_ascii=False, indent=2),
-            "stopwords": ", ".join(stopwords)
+        prompt_builders = {
+            "single_answer": self._create_single_answer_prompt,
+            "multiple_answer": self._create_multiple_answer_prompt,
+            "assertion_reason": self._create_assertion_reason_prompt
         }
         
-        # Cria o prompt para o Agente Conteudista
-        prompt = self.ai_client.create_agent_prompt("content", task_data)
-        
-        # Gera as questões usando a API de IA
-        response = self.ai_client.generate_text(prompt, max_tokens=4000)
-        
-        # Extrai as questões da resposta
-        content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
-        questions_data = extract_questions_from_text(content)
-        
-        if not questions_data:
+        # Usa os tipos de questão para os quais há template (ou resposta única, por padrão)
+        question_types = [q_type for q_type in prompt_builders if q_type in templates] or ["single_answer"]
+        stopwords_text = ", ".join(stopwords)
+        
+        # Serializa cada template uma única vez, e não a cada objetivo
+        templates_text = {}
+        for question_type in question_types:
+            template = templates.get(question_type, "")
+            if not isinstance(template, str):
+                template = to_prompt_json(template)
+            templates_text[question_type] = template
+        
+        # Monta um prompt por objetivo e tipo de questão
+        prompts = []
+        for objective in objectives:
+            for question_type in question_types:
+                task_data = {
+                    "objectives": objective,
+                    "theory": theory_text,
+                    "template": templates_text[question_type],
+                    "stopwords": stopwords_text,
+                    "question_type": question_type
+                }
+                prompts.append(prompt_builders[question_type](task_data))
+        
+        if not prompts:
             return []
         
-        # Converte os dados para objetos Question
-        questions = []
-        for q_data in questions_data:
-            # Verifica se há palavras restritivas no texto da questão
-            self._check_and_replace_restricted_words(q_data, stopwords)
+        # Gera as questões em paralelo; cada resposta chega em streaming e a
+        # questão é processada assim que o seu JSON é fechado
+        with ThreadPoolExecutor(max_workers=min(len(prompts), 8)) as executor:
+            results = executor.map(
+                lambda prompt: self._generate_questions(prompt, stopwords, max_tokens=_QUESTION_MAX_TOKENS, limit=1),
+                prompts
+            )
+            return [question for questions in results for question in questions]
+    
+    def _generate_questions(self, prompt: str, stopwords: List[str], max_tokens: int,
+                            limit: Optional[int] = None) -> List[Question]:
+        """
+        Gera questões em streaming, convertendo cada uma assim que o seu JSON é recebido.
+        
+        Args:
+            prompt: Prompt para a API de IA
+            stopwords: Lista de palavras a serem evitadas
+            max_tokens: Número máximo de tokens a serem gerados
+            limit: Número de questões após o qual a geração é interrompida
             
-            # Cria o objeto Question
-            question = Question.from_dict(q_data)
-            questions.append(question)
+        Returns:
+            Lista de questões criadas
+        """
+        questions = []
+        stream = self.ai_client.generate_text_stream(prompt, max_tokens=max_tokens,
+                                                     json_schema=QUESTION_JSON_SCHEMA)
+        
+        try:
+            for json_data in iter_json_objects(stream):
+                for q_data in questions_from_json(json_data):
+                    # Verifica se há palavras restritivas no texto da questão
+                    self._check_and_replace_restricted_words(q_data, stopwords)
+                    
+                    # Cria o objeto Question
+                    questions.append(Question.from_dict(q_data))
+                
+                if limit is not None and len(questions) >= limit:
+                    break
+        finally:
+            # Encerra a conexão, interrompendo a geração de texto excedente
+            if hasattr(stream, "close"):
+                stream.close()
         
         return questions
     
@@ -77,24 +272,7 @@ class ContentAgent:
             question_data: Dados da questão
             stopwords: Lista de palavras restritivas
         """
-        # Verifica e substitui no contexto
-        if "context" in question_data:
-            question_data["context"] = replace_restricted_words(question_data["context"], stopwords)
-        
-        # Verifica e substitui no enunciado
-        if "statement" in question_data:
-            question_data["statement"] = replace_restricted_words(question_data["statement"], stopwords)
-        
-        # Verifica e substitui nas alternativas
-        if "alternatives" in question_data:
-            for alt in question_data["alternatives"]:
-                if "text" in alt:
-                    alt["text"] = replace_restricted_words(alt["text"], stopwords)
-        
-        # Verifica e substitui nos feedbacks
-        if "feedback" in question_data:
-            for key, value in question_data["feedback"].items():
-                question_data["feedback"][key] = replace_restricted_words(value, stopwords)
+        replace_restricted_words_in_question(question_data, stopwords)
     
     def create_single_answer_question(self, objective: str, theory_text: str, 
                                      template: str, stopwords: List[str]) -> Optional[Question]:
@@ -123,20 +301,9 @@ class ContentAgent:
         prompt = self._create_single_answer_prompt(task_data)
         
         # Gera a questão usando a API de IA
-        response = self.ai_client.generate_text(prompt, max_tokens=2000)
-        
-        # Extrai a questão da resposta
-        content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
-        questions_data = extract_questions_from_text(content)
-        
-        if not questions_data:
-            return None
+        questions = self._generate_questions(prompt, stopwords, max_tokens=_QUESTION_MAX_TOKENS, limit=1)
         
-        # Verifica se há palavras restritivas no texto da questão
-        self._check_and_replace_restricted_words(questions_data[0], stopwords)
-        
-        # Cria o objeto Question
-        return Question.from_dict(questions_data[0])
+        return questions[0] if questions else None
     
     def create_multiple_answer_question(self, objective: str, theory_text: str, 
                                       template: str, stopwords: List[str]) -> Optional[Question]:
@@ -165,20 +332,9 @@ class ContentAgent:
         prompt = self._create_multiple_answer_prompt(task_data)
         
         # Gera a questão usando a API de IA
-        response = self.ai_client.generate_text(prompt, max_tokens=2000)
-        
-        # Extrai a questão da resposta
-        content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
-        questions_data = extract_questions_from_text(content)
-        
-        if not questions_data:
-            return None
-        
-        # Verifica se há palavras restritivas no texto da questão
-        self._check_and_replace_restricted_words(questions_data[0], stopwords)
+        questions = self._generate_questions(prompt, stopwords, max_tokens=_QUESTION_MAX_TOKENS, limit=1)
         
-        # Cria o objeto Question
-        return Question.from_dict(questions_data[0])
+        return questions[0] if questions else None
     
     def create_assertion_reason_question(self, objective: str, theory_text: str, 
                                        template: str, stopwords: List[str]) -> Optional[Question]:
@@ -207,20 +363,9 @@ class ContentAgent:
         prompt = self._create_assertion_reason_prompt(task_data)
         
         # Gera a questão usando a API de IA
-        response = self.ai_client.generate_text(prompt, max_tokens=2000)
+        questions = self._generate_questions(prompt, stopwords, max_tokens=_QUESTION_MAX_TOKENS, limit=1)
         
-        # Extrai a questão da resposta
-        content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
-        questions_data = extract_questions_from_text(content)
-        
-        if not questions_data:
-            return None
-        
-        # Verifica se há palavras restritivas no texto da questão
-        self._check_and_replace_restricted_words(questions_data[0], stopwords)
-        
-        # Cria o objeto Question
-        return Question.from_dict(questions_data[0])
+        return questions[0] if questions else None
     
     def _create_single_answer_prompt(self, task_data: Dict[str, Any]) -> str:
         """
@@ -232,54 +377,7 @@ class ContentAgent:
         Returns:
             Prompt formatado
         """
-        return f"""
-        Você é um Professor-Conteudista especializado em elaborar questões educacionais de alta qualidade.
-        
-        OBJETIVO DE APRENDIZAGEM:
-        {task_data["objectives"]}
-        
-        FUNDAMENTAÇÃO TEÓRICA:
-        {task_data["theory"]}
-        
-        TEMPLATE DE QUESTÃO DE RESPOSTA ÚNICA:
-        {task_data["template"]}
-        
-        PALAVRAS A EVITAR (não use estas palavras ou similares):
-        {task_data["stopwords"]}
-        
-        INSTRUÇÕES:
-        1. Elabore UMA questão de RESPOSTA ÚNICA para o objetivo de aprendizagem fornecido.
-        2. Siga rigorosamente o formato do template fornecido.
-        3. Evite usar palavras restritivas listadas acima.
-        4. Crie uma questão que avalie compreensão e aplicação, não memorização.
-        5. Forneça feedback detalhado para cada alternativa.
-        6. A questão deve ter exatamente 5 alternativas (a, b, c, d, e), sendo apenas uma correta.
-        7. Todas as alternativas devem ter extensão semelhante.
-        
-        Por favor, elabore a questão no formato JSON seguindo a estrutura abaixo:
-        ```json
-        {{
-          "objective_id": "objetivo",
-          "type": "single_answer",
-          "context": "Texto de contextualização...",
-          "statement": "Enunciado da questão...",
-          "alternatives": [
-            {{"id": "a", "text": "Alternativa A", "correct": true}},
-            {{"id": "b", "text": "Alternativa B", "correct": false}},
-            {{"id": "c", "text": "Alternativa C", "correct": false}},
-            {{"id": "d", "text": "Alternativa D", "correct": false}},
-            {{"id": "e", "text": "Alternativa E", "correct": false}}
-          ],
-          "feedback": {{
-            "a": "Correta. Justificativa para A...",
-            "b": "Incorreta. Justificativa para B...",
-            "c": "Incorreta. Justificativa para C...",
-            "d": "Incorreta. Justificativa para D...",
-            "e": "Incorreta. Justificativa para E..."
-          }}
-        }}
-        ```
-        """
+        return _STATIC_PREFIX_SINGLE + _PROMPT_SUFFIX_TEMPLATE.format_map(task_data)
     
     def _create_multiple_answer_prompt(self, task_data: Dict[str, Any]) -> str:
         """
@@ -291,60 +389,7 @@ class ContentAgent:
         Returns:
             Prompt formatado
         """
-        return f"""
-        Você é um Professor-Conteudista especializado em elaborar questões educacionais de alta qualidade.
-        
-        OBJETIVO DE APRENDIZAGEM:
-        {task_data["objectives"]}
-        
-        FUNDAMENTAÇÃO TEÓRICA:
-        {task_data["theory"]}
-        
-        TEMPLATE DE QUESTÃO DE RESPOSTA MÚLTIPLA:
-        {task_data["template"]}
-        
-        PALAVRAS A EVITAR (não use estas palavras ou similares):
-        {task_data["stopwords"]}
-        
-        INSTRUÇÕES:
-        1. Elabore UMA questão de RESPOSTA MÚLTIPLA para o objetivo de aprendizagem fornecido.
-        2. Siga rigorosamente o formato do template fornecido.
-        3. Evite usar palavras restritivas listadas acima.
-        4. Crie uma questão que avalie compreensão e aplicação, não memorização.
-        5. Forneça feedback detalhado para cada alternativa.
-        6. A questão deve ter 4 afirmativas (I, II, III, IV) e 5 alternativas (a, b, c, d, e).
-        7. Todas as alternativas devem ter extensão semelhante.
-        
-        Por favor, elabore a questão no formato JSON seguindo a estrutura abaixo:
-        ```json
-        {{
-          "objective_id": "objetivo",
-          "type": "multiple_answer",
-          "context": "Texto de contextualização...",
-          "statement": "Enunciado da questão...",
-          "assertions": [
-            {{"id": "I", "text": "Afirmativa I", "correct": true}},
-            {{"id": "II", "text": "Afirmativa II", "correct": false}},
-            {{"id": "III", "text": "Afirmativa III", "correct": true}},
-            {{"id": "IV", "text": "Afirmativa IV", "correct": false}}
-          ],
-          "alternatives": [
-            {{"id": "a", "text": "Se apenas as afirmativas I e III estiverem corretas", "correct": true}},
-            {{"id": "b", "text": "Se apenas as afirmativas II e IV estiverem corretas", "correct": false}},
-            {{"id": "c", "text": "Se apenas as afirmativas I, II e III estiverem corretas", "correct": false}},
-            {{"id": "d", "text": "Se apenas as afirmativas II, III e IV estiverem corretas", "correct": false}},
-            {{"id": "e", "text": "Se todas as afirmativas estiverem corretas", "correct": false}}
-          ],
-          "feedback": {{
-            "a": "Correta. Justificativa para A...",
-            "b": "Incorreta. Justificativa para B...",
-            "c": "Incorreta. Justificativa para C...",
-            "d": "Incorreta. Justificativa para D...",
-            "e": "Incorreta. Justificativa para E..."
-          }}
-        }}
-        ```
-        """
+        return _STATIC_PREFIX_MULTIPLE + _PROMPT_SUFFIX_TEMPLATE.format_map(task_data)
     
     def _create_assertion_reason_prompt(self, task_data: Dict[str, Any]) -> str:
         """
@@ -356,56 +401,4 @@ class ContentAgent:
         Returns:
             Prompt formatado
         """
-        return f"""
-        Você é um Professor-Conteudista especializado em elaborar questões educacionais de alta qualidade.
-        
-        OBJETIVO DE APRENDIZAGEM:
-        {task_data["objectives"]}
-        
-        FUNDAMENTAÇÃO TEÓRICA:
-        {task_data["theory"]}
-        
-        TEMPLATE DE QUESTÃO DE ASSERÇÃO-RAZÃO:
-        {task_data["template"]}
-        
-        PALAVRAS A EVITAR (não use estas palavras ou similares):
-        {task_data["stopwords"]}
-        
-        INSTRUÇÕES:
-        1. Elabore UMA questão de ASSERÇÃO-RAZÃO para o objetivo de aprendizagem fornecido.
-        2. Siga rigorosamente o formato do template fornecido.
-        3. Evite usar palavras restritivas listadas acima.
-        4. Crie uma questão que avalie compreensão e aplicação, não memorização.
-        5. Forneça feedback detalhado para cada alternativa.
-        6. A questão deve ter duas asserções (I e II) e 5 alternativas (a, b, c, d, e).
-        7. Priorize criar questões onde "as duas asserções são verdadeiras, mas a II não justifica a I" ou "as duas asserções são falsas".
-        
-        Por favor, elabore a questão no formato JSON seguindo a estrutura abaixo:
-        ```json
-        {{
-          "objective_id": "objetivo",
-          "type": "assertion_reason",
-          "context": "Texto de contextualização...",
-          "statement": "Avalie as asserções a seguir e a relação proposta entre elas.",
-          "assertions": [
-            {{"id": "I", "text": "Asserção I", "correct": true}},
-            {{"id": "II", "text": "Asserção II (PORQUE)", "correct": true}}
-          ],
-          "alternatives": [
-            {{"id": "a", "text": "As asserções I e II são proposições verdadeiras, e a II é uma justificativa correta da I.", "correct": false}},
-            {{"id": "b", "text": "As asserções I e II são proposições verdadeiras, mas a II não é uma justificativa correta da I.", "correct": true}},
-            {{"id": "c", "text": "A asserção I é uma proposição verdadeira, e a II é uma proposição falsa.", "correct": false}},
-            {{"id": "d", "text": "A asserção I é uma proposição falsa, e a II é uma proposição verdadeira.", "correct": false}},
-            {{"id": "e", "text": "As asserções I e II são proposições falsas.", "correct": false}}
-          ],
-          "feedback": {{
-            "a": "Incorreta. Justificativa para A...",
-            "b": "Correta. Justificativa para B...",
-            "c": "Incorreta. Justificativa para C...",
-            "d": "Incorreta. Justificativa para D...",
-            "e": "Incorreta. Justificativa para E..."
-          }}
-        }}
-        ```
-        """
-
+        return _STATIC_PREFIX_ASSERTION + _PROMPT_SUFFIX_TEMPLATE.format_map(task_data)
@@ -3,12 +3,62 @@ Agente Design Educacional (DE) - Responsável pela validação da escrita e estr
 """
 
 import json
+import asyncio
 from typing import Dict, Any, List, Optional, Tuple
 
 from models.question import Question
 from models.report import Checklist
-from utils.ai_client import AIClient
-from utils.text_processor import check_restricted_words, replace_restricted_words, extract_questions_from_text
+from utils.ai_client import get_ai_client, to_prompt_json
+from utils.cache import LRUCache
+from utils.text_processor import iter_json_objects, questions_from_json, replace_restricted_words_in_question
+
+
+# Parte estática do prompt de validação. Fica no início do prompt para que o
+# prefixo seja idêntico entre as questões e possa ser reaproveitado pelo cache
+# de prompts do provedor; checklist, palavras e questão vêm depois.
+_STATIC_PREFIX_VALIDATION = """
+        Você é um Designer Educacional especializado em validar a estrutura e qualidade pedagógica de questões educacionais.
+        
+        INSTRUÇÕES:
+        1. Analise a questão quanto à clareza, estrutura e qualidade pedagógica.
+        2. Verifique se a questão segue o formato adequado.
+        3. Identifique e corrija problemas de redação, ambiguidades ou inconsistências.
+        4. Substitua palavras restritivas por alternativas mais adequadas.
+        5. Preencha o checklist de validação para a questão.
+        
+        Por favor, retorne a questão revisada no mesmo formato JSON, adicionando um campo "validation.de" com o resultado da sua análise.
+        
+        Exemplo de formato para o campo validation.de:
+        ```json
+        "validation": {
+          "de": {
+            "status": "approved",
+            "comments": "A questão está bem estruturada e segue o template adequadamente.",
+            "checklist": {
+              "item1": {"result": "sim", "observation": "As questões abordam os conteúdos tratados nas UAs correspondentes"},
+              "item2": {"result": "sim", "observation": "Os objetivos de aprendizagem estão alinhados com o PAA"},
+              ...
+            }
+          }
+        }
+        ```
+"""
+
+# Parte variável do prompt de validação, preenchida com os dados da tarefa
+_VALIDATION_SUFFIX_TEMPLATE = """
+        CHECKLIST DE VALIDAÇÃO DE:
+        {de_checklist}
+        
+        PALAVRAS A EVITAR (verifique e substitua estas palavras ou similares):
+        {stopwords}
+        
+        QUESTÃO A SER REVISADA:
+        {question}
+        """
+
+# Revisões já obtidas, indexadas pelo conteúdo da questão, checklist e palavras
+# restritivas. Uma questão revalidada sem alterações não gera nova chamada à API.
+_VALIDATION_CACHE = LRUCache(maxsize=512)
 
 
 class DEAgent:
@@ -20,7 +70,7 @@ class DEAgent:
         """
         Inicializa o Agente Design Educacional.
         """
-        self.ai_client = AIClient()
+        self.ai_client = get_ai_client()
     
     def validate_questions(self, questions: List[Question], de_checklist: str, 
                          stopwords: List[str]) -> List[Question]:
@@ -35,37 +85,92 @@ class DEAgent:
         Returns:
             Lista de questões validadas
         """
-        # Prepara os dados para o prompt
-        task_data = {
-            "questions": [q.to_dict() for q in questions],
-            "de_checklist": de_checklist,
-            "stopwords": ", ".join(stopwords)
-        }
-        
-        # Cria o prompt para o Agente DE
-        prompt = self.ai_client.create_agent_prompt("de", task_data)
-        
-        # Gera a revisão usando a API de IA
-        response = self.ai_client.generate_text(prompt, max_tokens=4000)
+        return asyncio.run(self.avalidate_questions(questions, de_checklist, stopwords))
+    
+    async def avalidate_questions(self, questions: List[Question], de_checklist: str, 
+                                  stopwords: List[str]) -> List[Question]:
+        """
+        Valida a escrita e estrutura das questões, com uma requisição por questão
+        disparada em paralelo.
         
-        # Extrai as questões revisadas da resposta
-        content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
-        questions_data = extract_questions_from_text(content)
+        Args:
+            questions: Lista de questões a serem validadas
+            de_checklist: Checklist de validação DE
+            stopwords: Lista de palavras a serem evitadas
+            
+        Returns:
+            Lista de questões validadas
+        """
+        stopwords_text = ", ".join(stopwords)
+        stopwords_key = tuple(stopwords)
+        
+        # Reaproveita as revisões já feitas e agrupa questões de mesmo conteúdo,
+        # de modo que cada conteúdo distinto gera no máximo uma chamada à API
+        validated_questions = list(questions)
+        pending = {}
+        for index, question in enumerate(questions):
+            cache_key = (question.fingerprint(), de_checklist, stopwords_key)
+            cached = _VALIDATION_CACHE.get(cache_key)
+            if cached is not None:
+                # A revisão em cache pode ter vindo de outra questão de mesmo conteúdo
+                validated_questions[index] = Question.from_dict({**json.loads(cached), "id": question.id})
+            else:
+                pending.setdefault(cache_key, []).append(index)
+        
+        if not pending:
+            return validated_questions
+        
+        # Cria um prompt de validação para cada questão ainda não revisada
+        prompts = [
+            self._create_single_question_validation_prompt({
+                "questions": [questions[indexes[0]]],
+                "de_checklist": de_checklist,
+                "stopwords": stopwords_text
+            })
+            for indexes in pending.values()
+        ]
+        
+        # Gera as revisões em paralelo usando a API de IA. A conversão e o
+        # armazenamento em cache também ocorrem nas threads de trabalho, à
+        # medida que cada resposta chega, e não em um laço após todas terminarem.
+        revised_groups = await asyncio.gather(*(
+            asyncio.to_thread(self._revise_and_cache, prompt, questions[indexes[0]], stopwords,
+                              cache_key, len(indexes))
+            for prompt, (cache_key, indexes) in zip(prompts, pending.items())
+        ))
+        
+        for indexes, revised in zip(pending.values(), revised_groups):
+            if revised:
+                for index, question in zip(indexes, revised):
+                    # Cada cópia mantém o id da questão que substitui
+                    question.id = questions[index].id
+                    validated_questions[index] = question
         
-        if not questions_data:
-            return questions  # Retorna as questões originais se não conseguir extrair as revisadas
+        return validated_questions
+    
+    def _revise_and_cache(self, prompt: str, question: Question, stopwords: List[str],
+                          cache_key: Tuple[Any, ...], copies: int) -> List[Question]:
+        """
+        Obtém a revisão de uma questão e a armazena no cache de validações.
         
-        # Converte os dados para objetos Question
-        validated_questions = []
-        for q_data in questions_data:
-            # Verifica se há palavras restritivas no texto da questão
-            self._check_and_replace_restricted_words(q_data, stopwords)
+        Args:
+            prompt: Prompt de validação
+            question: Questão original
+            stopwords: Lista de palavras a serem evitadas
+            cache_key: Chave da revisão no cache
+            copies: Número de questões com este mesmo conteúdo no lote
             
-            # Cria o objeto Question
-            question = Question.from_dict(q_data)
-            validated_questions.append(question)
+        Returns:
+            Uma questão revisada para cada cópia, ou lista vazia se a revisão falhar
+        """
+        revised = self._revise_question(prompt, question, stopwords, 1500)
+        if revised is question:
+            return []  # Não foi possível obter a revisão: mantém as originais
         
-        return validated_questions
+        question_json = json.dumps(revised.to_dict(), ensure_ascii=False)
+        _VALIDATION_CACHE.set(cache_key, question_json)
+        
+        return [revised] + [Question.from_dict(json.loads(question_json)) for _ in range(copies - 1)]
     
     def _check_and_replace_restricted_words(self, question_data: Dict[str, Any], 
                                           stopwords: List[str]) -> None:
@@ -76,24 +181,7 @@ class DEAgent:
             question_data: Dados da questão
             stopwords: Lista de palavras restritivas
         """
-        # Verifica e substitui no contexto
-        if "context" in question_data:
-            question_data["context"] = replace_restricted_words(question_data["context"], stopwords)
-        
-        # Verifica e substitui no enunciado
-        if "statement" in question_data:
-            question_data["statement"] = replace_restricted_words(question_data["statement"], stopwords)
-        
-        # Verifica e substitui nas alternativas
-        if "alternatives" in question_data:
-            for alt in question_data["alternatives"]:
-                if "text" in alt:
-                    alt["text"] = replace_restricted_words(alt["text"], stopwords)
-        
-        # Verifica e substitui nos feedbacks
-        if "feedback" in question_data:
-            for key, value in question_data["feedback"].items():
-                question_data["feedback"][key] = replace_restricted_words(value, stopwords)
+        replace_restricted_words_in_question(question_data, stopwords)
     
     def validate_single_question(self, question: Question, de_checklist: str, 
                                stopwords: List[str]) -> Question:
@@ -110,7 +198,7 @@ class DEAgent:
         """
         # Prepara os dados para o prompt
         task_data = {
-            "questions": [question.to_dict()],
+            "questions": [question],
             "de_checklist": de_checklist,
             "stopwords": ", ".join(stopwords)
         }
@@ -119,20 +207,40 @@ class DEAgent:
         prompt = self._create_single_question_validation_prompt(task_data)
         
         # Gera a revisão usando a API de IA
-        response = self.ai_client.generate_text(prompt, max_tokens=2000)
-        
-        # Extrai a questão revisada da resposta
-        content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
-        questions_data = extract_questions_from_text(content)
-        
-        if not questions_data:
-            return question  # Retorna a questão original se não conseguir extrair a revisada
-        
-        # Verifica se há palavras restritivas no texto da questão
-        self._check_and_replace_restricted_words(questions_data[0], stopwords)
+        return self._revise_question(prompt, question, stopwords, 2000)
+    
+    def _revise_question(self, prompt: str, question: Question, stopwords: List[str], 
+                         max_tokens: int) -> Question:
+        """
+        Obtém a revisão de uma questão em streaming, encerrando a geração assim
+        que o JSON da questão revisada é recebido.
         
-        # Cria o objeto Question
-        return Question.from_dict(questions_data[0])
+        Args:
+            prompt: Prompt de validação
+            question: Questão original
+            stopwords: Lista de palavras a serem evitadas
+            max_tokens: Número máximo de tokens a serem gerados
+            
+        Returns:
+            Questão revisada ou a original se não for possível extraí-la
+        """
+        stream = self.ai_client.generate_text_stream(prompt, max_tokens=max_tokens)
+        
+        try:
+            for json_data in iter_json_objects(stream):
+                questions_data = questions_from_json(json_data)
+                if questions_data:
+                    # Verifica se há palavras restritivas no texto da questão
+                    self._check_and_replace_restricted_words(questions_data[0], stopwords)
+                    
+                    # Cria o objeto Question, mantendo o id da questão original
+                    return Question.from_dict({**questions_data[0], "id": question.id})
+        finally:
+            # Encerra a conexão, interrompendo a geração de texto excedente
+            if hasattr(stream, "close"):
+                stream.close()
+        
+        return question  # Retorna a questão original se não conseguir extrair a revisada
     
     def _create_single_question_validation_prompt(self, task_data: Dict[str, Any]) -> str:
         """
@@ -144,42 +252,11 @@ class DEAgent:
         Returns:
             Prompt formatado
         """
-        return f"""
-        Você é um Designer Educacional especializado em validar a estrutura e qualidade pedagógica de questões educacionais.
-        
-        QUESTÃO A SER REVISADA:
-        {json.dumps(task_data["questions"][0], ensure_ascii=False, indent=2)}
-        
-        CHECKLIST DE VALIDAÇÃO DE:
-        {task_data["de_checklist"]}
-        
-        PALAVRAS A EVITAR (verifique e substitua estas palavras ou similares):
-        {task_data["stopwords"]}
-        
-        INSTRUÇÕES:
-        1. Analise a questão quanto à clareza, estrutura e qualidade pedagógica.
-        2. Verifique se a questão segue o formato adequado.
-        3. Identifique e corrija problemas de redação, ambiguidades ou inconsistências.
-        4. Substitua palavras restritivas por alternativas mais adequadas.
-        5. Preencha o checklist de validação para a questão.
-        
-        Por favor, retorne a questão revisada no mesmo formato JSON, adicionando um campo "validation.de" com o resultado da sua análise.
-        
-        Exemplo de formato para o campo validation.de:
-        ```json
-        "validation": {{
-          "de": {{
-            "status": "approved",
-            "comments": "A questão está bem estruturada e segue o template adequadamente.",
-            "checklist": {{
-              "item1": {{"result": "sim", "observation": "As questões abordam os conteúdos tratados nas UAs correspondentes"}},
-              "item2": {{"result": "sim", "observation": "Os objetivos de aprendizagem estão alinhados com o PAA"}},
-              ...
-            }}
-          }}
-        }}
-        ```
-        """
+        return _STATIC_PREFIX_VALIDATION + _VALIDATION_SUFFIX_TEMPLATE.format(
+            de_checklist=task_data["de_checklist"],
+            stopwords=task_data["stopwords"],
+            question=to_prompt_json(task_data["questions"][0])
+        )
     
     def check_format_compliance(self, question: Question) -> Dict[str, Any]:
         """
@@ -212,10 +289,13 @@ class DEAgent:
             result["issues"].append(f"A questão deve ter 5 alternativas, mas tem {len(question.alternatives)}")
         
         # Verifica se tem feedback para todas as alternativas
-        for alt in question.alternatives:
-            if alt["id"] not in question.feedback:
-                result["compliant"] = False
-                result["issues"].append(f"Falta feedback para a alternativa {alt['id']}")
+        missing = sorted({alt["id"] for alt in question.alternatives} - question.feedback.keys())
+        if missing:
+            result["compliant"] = False
+            if len(missing) == 1:
+                result["issues"].append(f"Falta feedback para a alternativa {missing[0]}")
+            else:
+                result["issues"].append(f"Falta feedback para as alternativas {', '.join(missing)}")
         
         return result
     
@@ -229,21 +309,18 @@ class DEAgent:
         Returns:
             Relatório de validação
         """
-        report = {
+        return {
             "summary": "Relatório de Validação de Design Educacional",
-            "results": []
-        }
-        
-        for question in questions:
-            if question.validation and "de" in question.validation:
-                validation = question.validation["de"]
-                report["results"].append({
+            "results": [
+                {
                     "question_id": question.id,
                     "objective_id": question.objective_id,
                     "status": validation.get("status", "unknown"),
                     "comments": validation.get("comments", ""),
                     "checklist": validation.get("checklist", {})
-                })
-        
-        return report
+                }
+                for question in questions
+                if (validation := (question.validation or {}).get("de"))
+            ]
+        }
 
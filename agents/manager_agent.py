@@ -2,31 +2,184 @@
 Agente Gerenciador - Responsável por coordenar o fluxo de trabalho entre os agentes.
 """
 
-import os
-import json
-from typing import Dict, Any, List, Optional, Tuple
+import re
+import asyncio
+from contextlib import contextmanager
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
 
 from models.task import Task
 from models.question import Question
-from models.report import Report
-from utils.ai_client import AIClient
-from utils.file_handler import save_task_data, load_task_data, save_questions, save_report, save_final_document
-from utils.text_processor import extract_objectives, extract_questions_from_text
+from models.report import Report, VALIDATION_JSON_SCHEMA
+from agents.validator_agent import ValidatorAgent
+from utils.ai_client import get_ai_client, to_prompt_json
+from utils.file_handler import (
+    save_task_data, load_task_data, save_questions, save_rejected_questions, save_report, save_final_document,
+    get_output_paths
+)
+from utils.text_processor import extract_objectives, extract_questions_from_text, extract_validation_result
 
 import config
 
+# Caminhos dos arquivos de apoio
+_TEMPLATE_PATHS: Dict[str, Path] = {
+    "single_answer": config.TEMPLATES_DIR / "single_answer.json",
+    "multiple_answer": config.TEMPLATES_DIR / "multiple_answer.json",
+    "assertion_reason": config.TEMPLATES_DIR / "assertion_reason.json"
+}
+_STOPWORDS_PATH = config.DATA_DIR / "stopwords.txt"
+_RT_CHECKLIST_PATH = config.DATA_DIR / "validacao_rt.txt"
+_DE_CHECKLIST_PATH = config.DATA_DIR / "validacao_de.txt"
+
+# Separadores aceitos no arquivo de stopwords (vírgula ou quebra de linha)
+_STOPWORDS_SEPARATOR_RE = re.compile(r"[,\n]")
+
+# Threads para gravar os arquivos de saída sem que uma escrita espere a outra
+_IO_POOL = ThreadPoolExecutor(max_workers=4)
+
+# Templates usados quando o arquivo correspondente não existe em TEMPLATES_DIR
+_DEFAULT_TEMPLATES: Dict[str, str] = {
+    "single_answer": """\
+{
+  "type": "single_answer",
+  "context": "Texto de contextualização da questão...",
+  "statement": "Enunciado da questão...",
+  "alternatives": [
+    {"id": "a", "text": "Alternativa A", "correct": true},
+    {"id": "b", "text": "Alternativa B", "correct": false},
+    {"id": "c", "text": "Alternativa C", "correct": false},
+    {"id": "d", "text": "Alternativa D", "correct": false},
+    {"id": "e", "text": "Alternativa E", "correct": false}
+  ],
+  "feedback": {
+    "a": "Correta. Justificativa para A...",
+    "b": "Incorreta. Justificativa para B...",
+    "c": "Incorreta. Justificativa para C...",
+    "d": "Incorreta. Justificativa para D...",
+    "e": "Incorreta. Justificativa para E..."
+  }
+}
+""",
+    "multiple_answer": """\
+{
+  "type": "multiple_answer",
+  "context": "Texto de contextualização da questão...",
+  "statement": "Enunciado da questão...",
+  "assertions": [
+    {"id": "1", "text": "Afirmativa 1", "correct": true},
+    {"id": "2", "text": "Afirmativa 2", "correct": false},
+    {"id": "3", "text": "Afirmativa 3", "correct": true},
+    {"id": "4", "text": "Afirmativa 4", "correct": false}
+  ],
+  "alternatives": [
+    {"id": "a", "text": "Se apenas as afirmativas 1 e 3 estiverem corretas", "correct": true},
+    {"id": "b", "text": "Se apenas as afirmativas 2 e 4 estiverem corretas", "correct": false},
+    {"id": "c", "text": "Se apenas as afirmativas 1, 2 e 3 estiverem corretas", "correct": false},
+    {"id": "d", "text": "Se apenas as afirmativas 2, 3 e 4 estiverem corretas", "correct": false},
+    {"id": "e", "text": "Se todas as afirmativas estiverem corretas", "correct": false}
+  ],
+  "feedback": {
+    "a": "Correta. Justificativa para A...",
+    "b": "Incorreta. Justificativa para B...",
+    "c": "Incorreta. Justificativa para C...",
+    "d": "Incorreta. Justificativa para D...",
+    "e": "Incorreta. Justificativa para E..."
+  }
+}
+""",
+    "assertion_reason": """\
+{
+  "type": "assertion_reason",
+  "context": "Texto de contextualização da questão...",
+  "statement": "Avalie as asserções a seguir e a relação proposta entre elas.",
+  "assertions": [
+    {"id": "1", "text": "Asserção I", "correct": true},
+    {"id": "2", "text": "Asserção II (PORQUE)", "correct": true}
+  ],
+  "alternatives": [
+    {"id": "a", "text": "As asserções I e II são proposições verdadeiras, e a II é uma justificativa correta da I.", "correct": true},
+    {"id": "b", "text": "As asserções I e II são proposições verdadeiras, mas a II não é uma justificativa correta da I.", "correct": false},
+    {"id": "c", "text": "A asserção I é uma proposição verdadeira, e a II é uma proposição falsa.", "correct": false},
+    {"id": "d", "text": "A asserção I é uma proposição falsa, e a II é uma proposição verdadeira.", "correct": false},
+    {"id": "e", "text": "As asserções I e II são proposições falsas.", "correct": false}
+  ],
+  "feedback": {
+    "a": "Correta. Justificativa para A...",
+    "b": "Incorreta. Justificativa para B...",
+    "c": "Incorreta. Justificativa para C...",
+    "d": "Incorreta. Justificativa para D...",
+    "e": "Incorreta. Justificativa para E..."
+  }
+}
+""",
+}
+
+# Checklist RT usado quando o arquivo correspondente não existe em DATA_DIR
+_DEFAULT_RT_CHECKLIST = """\
+CHECKLIST – REVISOR TÉCNICO
+
+| Nº | Item                                                                                                                                 | Sim | Não | NA  | Observação |
+|----|--------------------------------------------------------------------------------------------------------------------------------------|-----|-----|-----|-------------|
+| 1  | As questões abordam os conteúdos tratados nas UAs/Etapas/Aulas correspondentes?                                                     |     |     |     |             |
+| 2  | Os objetivos de aprendizagem indicados nos grupos correspondem aos definidos no PAA?                                                |     |     |     |             |
+| 3  | Todas as questões de um grupo permitem avaliar a aprendizagem a partir do(s) objetivo(s) associado(s)? (máximo 2 objetivos).        |     |     |     |             |
+| 4  | Há correlação entre os conteúdos desenvolvidos nas UAs/Etapas/Aulas e as questões?                                                  |     |     |     |             |
+| 5  | O nível de complexidade das questões é coerente com os conteúdos propostos nas UAs/Etapas/Aulas correspondentes?                   |     |     |     |             |
+| 6  | Os feedbacks das questões justificam o porquê do acerto ou erro de forma clara e precisa?                                           |     |     |     |             |
+| 7  | O texto-base/enunciado está claro e sem ambiguidades?                                                                               |     |     |     |             |
+| 8  | As questões não avaliam conteúdos memorizados?                                                                                      |     |     |     |             |
+"""
+
+# Checklist DE usado quando o arquivo correspondente não existe em DATA_DIR
+_DEFAULT_DE_CHECKLIST = """\
+CHECKLIST – DESIGN EDUCACIONAL
+
+| Nº | Item                                                                                                                                 | Sim | Não | NA  | Observação |
+|----|--------------------------------------------------------------------------------------------------------------------------------------|-----|-----|-----|-------------|
+| 1  | As questões abordam os conteúdos tratados nas UAs/Etapas/Aulas correspondentes?                                                     |     |     |     |             |
+| 2  | Os objetivos de aprendizagem indicados nos grupos correspondem aos definidos no PAA?                                                |     |     |     |             |
+| 3  | Todas as questões de um grupo permitem avaliar a aprendizagem a partir do(s) objetivo(s) associado(s)? (máximo 2 objetivos).        |     |     |     |             |
+| 4  | Há correlação entre os conteúdos desenvolvidos nas UAs/Etapas/Aulas e as questões?                                                  |     |     |     |             |
+| 5  | O texto-base/enunciado está claro e sem ambiguidades?                                                                               |     |     |     |             |
+| 6  | O texto-base/enunciado dá suporte para a resolução da questão?                                                                      |     |     |     |             |
+| 7  | Os feedbacks das questões justificam o porquê do acerto ou erro de forma clara e precisa?                                           |     |     |     |             |
+| 8  | Há indicação de referência nos textos de suporte, seja autoral ou de curadoria?                                                     |     |     |     |             |
+| 9  | Nenhum comando solicita assinalar a alternativa incorreta?                                                                          |     |     |     |             |
+| 10 | As questões não avaliam conteúdos memorizados?                                                                                      |     |     |     |             |
+| 11 | As questões não apresentam alternativas com "todas as afirmativas estão erradas/incorretas"?                                        |     |     |     |             |
+| 12 | As questões apresentam alternativas com extensão semelhante?                                                                        |     |     |     |             |
+| 13 | As questões não apresentam elementos que tornem a afirmação falsa, como: "apenas", "somente", "nunca", etc.?                        |     |     |     |             |
+| 14 | Todas as afirmativas iniciam com palavras da mesma classe gramatical?                                                               |     |     |     |             |
+| 15 | Cada item avaliativo contempla 5 alternativas de resposta?                                                                          |     |     |     |             |
+"""
+
+# Stopwords usadas quando data/stopwords.txt não existe ou está vazio
+_DEFAULT_STOPWORDS: Tuple[str, ...] = (
+    "limita-se", "estritamente", "apenas", "exclusivamente", "somente",
+    "unicamente", "restritivamente", "rigorosamente", "especificamente",
+    "exatamente", "precisamente", "unilateralmente", "singularmente",
+    "determinadamente", "explicitamente", "meramente", "unicidade",
+    "nada além de", "só isso", "e somente isso", "de forma exclusiva",
+    "de modo restrito", "de maneira limitada", "sem exceções"
+)
+
 
 class ManagerAgent:
     """
     Agente Gerenciador - Coordena o fluxo de trabalho entre os agentes.
     """
     
+    # Conteúdo dos arquivos de apoio já lidos: caminho -> (mtime, conteúdo processado)
+    _file_cache: Dict[Path, Tuple[int, Any]] = {}
+    
     def __init__(self):
         """
         Inicializa o Agente Gerenciador.
         """
-        self.ai_client = AIClient()
+        self.ai_client = get_ai_client()
         self.current_task = None
+        self.autosave = True
     
     def initialize_task(self, objectives: str, theory_text: str) -> str:
         """
@@ -45,6 +198,43 @@ class ManagerAgent:
         # Carrega as stopwords
         stopwords = self._load_stopwords()
         
+        return self._create_task(objectives, theory_text, templates, stopwords)
+    
+    async def ainitialize_task(self, objectives: str, theory_text: str) -> str:
+        """
+        Versão assíncrona de initialize_task.
+        
+        Os arquivos de templates e de stopwords são lidos em threads auxiliares,
+        em paralelo, sem bloquear o laço de eventos.
+        
+        Args:
+            objectives: Objetivos de aprendizagem
+            theory_text: Texto de fundamentação teórica
+            
+        Returns:
+            ID da tarefa criada
+        """
+        templates, stopwords = await asyncio.gather(
+            asyncio.to_thread(self._load_templates),
+            asyncio.to_thread(self._load_stopwords)
+        )
+        
+        return await asyncio.to_thread(self._create_task, objectives, theory_text, templates, stopwords)
+    
+    def _create_task(self, objectives: str, theory_text: str, templates: Dict[str, str],
+                     stopwords: List[str]) -> str:
+        """
+        Cria e salva uma nova tarefa com os templates e stopwords já carregados.
+        
+        Args:
+            objectives: Objetivos de aprendizagem
+            theory_text: Texto de fundamentação teórica
+            templates: Templates de questões
+            stopwords: Lista de stopwords
+            
+        Returns:
+            ID da tarefa criada
+        """
         # Extrai os objetivos de aprendizagem
         objectives_list = extract_objectives(objectives)
         
@@ -57,10 +247,34 @@ class ManagerAgent:
         )
         
         # Salva a tarefa
-        save_task_data(self.current_task.id, self.current_task.to_dict())
+        self._checkpoint()
         
         return self.current_task.id
     
+    @classmethod
+    def _read_cached(cls, path: Path, loader: Callable[[str], Any] = str) -> Any:
+        """
+        Lê um arquivo de apoio, reaproveitando o conteúdo enquanto ele não for modificado.
+        
+        Args:
+            path: Caminho do arquivo
+            loader: Função que processa o texto lido
+            
+        Returns:
+            Conteúdo processado do arquivo
+            
+        Raises:
+            FileNotFoundError: Se o arquivo não existir
+        """
+        mtime = path.stat().st_mtime_ns
+        cached = cls._file_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        content = loader(path.read_text(encoding='utf-8'))
+        cls._file_cache[path] = (mtime, content)
+        return content
+    
     def _load_templates(self) -> Dict[str, str]:
         """
         Carrega os templates de questões.
@@ -68,25 +282,27 @@ class ManagerAgent:
         Returns:
             Dicionário com os templates
         """
-        templates = {}
-        template_files = {
-            "single_answer": "single_answer.json",
-            "multiple_answer": "multiple_answer.json",
-            "assertion_reason": "assertion_reason.json"
-        }
-        
-        for key, filename in template_files.items():
-            path = os.path.join(config.TEMPLATES_DIR, filename)
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    templates[key] = f.read()
-            except FileNotFoundError:
-                # Se o arquivo não existir, usa um template padrão
-                templates[key] = self._get_default_template(key)
+        return {key: self._load_template(key, path) for key, path in _TEMPLATE_PATHS.items()}
+    
+    def _load_template(self, template_type: str, path: Path) -> str:
+        """
+        Carrega um template de questão.
         
-        return templates
+        Args:
+            template_type: Tipo de template
+            path: Caminho do arquivo do template
+            
+        Returns:
+            Template carregado ou o template padrão, se o arquivo não existir
+        """
+        try:
+            return self._read_cached(path)
+        except FileNotFoundError:
+            # Se o arquivo não existir, usa um template padrão
+            return self._get_default_template(template_type)
     
-    def _get_default_template(self, template_type: str) -> str:
+    @staticmethod
+    def _get_default_template(template_type: str) -> str:
         """
         Retorna um template padrão para um tipo de questão.
         
@@ -96,84 +312,7 @@ class ManagerAgent:
         Returns:
             Template padrão
         """
-        if template_type == "single_answer":
-            return """
-            {
-              "type": "single_answer",
-              "context": "Texto de contextualização da questão...",
-              "statement": "Enunciado da questão...",
-              "alternatives": [
-                {"id": "a", "text": "Alternativa A", "correct": true},
-                {"id": "b", "text": "Alternativa B", "correct": false},
-                {"id": "c", "text": "Alternativa C", "correct": false},
-                {"id": "d", "text": "Alternativa D", "correct": false},
-                {"id": "e", "text": "Alternativa E", "correct": false}
-              ],
-              "feedback": {
-                "a": "Correta. Justificativa para A...",
-                "b": "Incorreta. Justificativa para B...",
-                "c": "Incorreta. Justificativa para C...",
-                "d": "Incorreta. Justificativa para D...",
-                "e": "Incorreta. Justificativa para E..."
-              }
-            }
-            """
-        elif template_type == "multiple_answer":
-            return """
-            {
-              "type": "multiple_answer",
-              "context": "Texto de contextualização da questão...",
-              "statement": "Enunciado da questão...",
-              "assertions": [
-                {"id": "1", "text": "Afirmativa 1", "correct": true},
-                {"id": "2", "text": "Afirmativa 2", "correct": false},
-                {"id": "3", "text": "Afirmativa 3", "correct": true},
-                {"id": "4", "text": "Afirmativa 4", "correct": false}
-              ],
-              "alternatives": [
-                {"id": "a", "text": "Se apenas as afirmativas 1 e 3 estiverem corretas", "correct": true},
-                {"id": "b", "text": "Se apenas as afirmativas 2 e 4 estiverem corretas", "correct": false},
-                {"id": "c", "text": "Se apenas as afirmativas 1, 2 e 3 estiverem corretas", "correct": false},
-                {"id": "d", "text": "Se apenas as afirmativas 2, 3 e 4 estiverem corretas", "correct": false},
-                {"id": "e", "text": "Se todas as afirmativas estiverem corretas", "correct": false}
-              ],
-              "feedback": {
-                "a": "Correta. Justificativa para A...",
-                "b": "Incorreta. Justificativa para B...",
-                "c": "Incorreta. Justificativa para C...",
-                "d": "Incorreta. Justificativa para D...",
-                "e": "Incorreta. Justificativa para E..."
-              }
-            }
-            """
-        elif template_type == "assertion_reason":
-            return """
-            {
-              "type": "assertion_reason",
-              "context": "Texto de contextualização da questão...",
-              "statement": "Avalie as asserções a seguir e a relação proposta entre elas.",
-              "assertions": [
-                {"id": "1", "text": "Asserção I", "correct": true},
-                {"id": "2", "text": "Asserção II (PORQUE)", "correct": true}
-              ],
-              "alternatives": [
-                {"id": "a", "text": "As asserções I e II são proposições verdadeiras, e a II é uma justificativa correta da I.", "correct": true},
-                {"id": "b", "text": "As asserções I e II são proposições verdadeiras, mas a II não é uma justificativa correta da I.", "correct": false},
-                {"id": "c", "text": "A asserção I é uma proposição verdadeira, e a II é uma proposição falsa.", "correct": false},
-                {"id": "d", "text": "A asserção I é uma proposição falsa, e a II é uma proposição verdadeira.", "correct": false},
-                {"id": "e", "text": "As asserções I e II são proposições falsas.", "correct": false}
-              ],
-              "feedback": {
-                "a": "Correta. Justificativa para A...",
-                "b": "Incorreta. Justificativa para B...",
-                "c": "Incorreta. Justificativa para C...",
-                "d": "Incorreta. Justificativa para D...",
-                "e": "Incorreta. Justificativa para E..."
-              }
-            }
-            """
-        else:
-            return "{}"
+        return _DEFAULT_TEMPLATES.get(template_type, "{}")
     
     def _load_stopwords(self) -> List[str]:
         """
@@ -182,26 +321,64 @@ class ManagerAgent:
         Returns:
             Lista de stopwords
         """
-        stopwords = [
-            "limita-se", "estritamente", "apenas", "exclusivamente", "somente",
-            "unicamente", "restritivamente", "rigorosamente", "especificamente",
-            "exatamente", "precisamente", "unilateralmente", "singularmente",
-            "determinadamente", "explicitamente", "meramente", "unicidade",
-            "nada além de", "só isso", "e somente isso", "de forma exclusiva",
-            "de modo restrito", "de maneira limitada", "sem exceções"
-        ]
+        stopwords = _DEFAULT_STOPWORDS
         
-        # Tenta carregar de um arquivo
+        # Tenta carregar de um arquivo (palavras separadas por vírgula ou por linha)
         try:
-            path = os.path.join(config.DATA_DIR, "stopwords.txt")
-            with open(path, 'r', encoding='utf-8') as f:
-                custom_stopwords = [line.strip() for line in f if line.strip()]
-                if custom_stopwords:
-                    stopwords = custom_stopwords
+            custom_stopwords = self._read_cached(
+                _STOPWORDS_PATH, lambda text: tuple(word.strip() for word in _STOPWORDS_SEPARATOR_RE.split(text) if word.strip())
+            )
+            if custom_stopwords:
+                stopwords = custom_stopwords
         except FileNotFoundError:
             pass
         
-        return stopwords
+        # Cópia para que a tarefa não altere os valores compartilhados
+        return list(stopwords)
+    
+    def flush(self, questions_dicts: Optional[List[Dict[str, Any]]] = None) -> bool:
+        """
+        Salva a tarefa atual, se houver alterações ainda não salvas.
+        
+        Se a gravação falhar, a tarefa continua marcada como alterada e é
+        salva novamente na próxima chamada.
+        
+        Args:
+            questions_dicts: Dicionários das questões já calculados, se houver
+            
+        Returns:
+            False se a gravação falhar, True caso contrário
+        """
+        if self.current_task and self.current_task.dirty:
+            if save_task_data(self.current_task.id, self.current_task.to_dict(questions_dicts)) is None:
+                return False
+            self.current_task.dirty = False
+        return True
+    
+    def _checkpoint(self, questions_dicts: Optional[List[Dict[str, Any]]] = None) -> None:
+        """
+        Salva a tarefa ao fim de uma etapa, a menos que o salvamento esteja adiado.
+        
+        Args:
+            questions_dicts: Dicionários das questões já calculados, se houver
+        """
+        if self.autosave:
+            self.flush(questions_dicts)
+    
+    @contextmanager
+    def deferred_saves(self) -> Iterator[None]:
+        """
+        Adia o salvamento da tarefa até o fim do bloco, mesmo em caso de erro.
+        
+        Útil para executar várias etapas em sequência com uma única gravação.
+        """
+        previous = self.autosave
+        self.autosave = False
+        try:
+            yield
+        finally:
+            self.autosave = previous
+            self.flush()
     
     def load_task(self, task_id: str) -> bool:
         """
@@ -235,17 +412,19 @@ class ManagerAgent:
         
         # Prepara os dados para o Agente Conteudista
         task_data = {
-            "objectives": "\n".join(self.current_task.objectives),
+            "objectives": self.current_task.objectives_text,
             "theory": self.current_task.theory_text,
-            "template": json.dumps(self.current_task.templates, ensure_ascii=False, indent=2),
-            "stopwords": ", ".join(self.current_task.stopwords)
+            "template": self.current_task.templates_json,
+            "stopwords": self.current_task.stopwords_text
         }
         
         # Cria o prompt para o Agente Conteudista
         prompt = self.ai_client.create_agent_prompt("content", task_data)
         
-        # Gera as questões usando a API de IA
-        response = self.ai_client.generate_text(prompt, max_tokens=4000)
+        # Gera as questões usando a API de IA. Sem o cache de respostas: ao
+        # repetir a etapa (como após questões rejeitadas), o mesmo prompt deve
+        # produzir novas questões, e não as anteriores
+        response = self.ai_client.generate_text(prompt, max_tokens=4000, cache=False)
         
         # Extrai as questões da resposta
         content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
@@ -254,15 +433,31 @@ class ManagerAgent:
         if not questions_data:
             return False, "Não foi possível extrair questões da resposta"
         
-        # Converte os dados para objetos Question
+        # Converte os dados para objetos Question, descartando as questões
+        # malformadas antes que gastem chamadas nas etapas de revisão
+        rejected = []
         for q_data in questions_data:
             question = Question.from_dict(q_data)
-            self.current_task.add_question(question)
+            issues = ValidatorAgent.structural_precheck(question)
+            if issues:
+                rejected.append({**question.to_dict(), "issues": issues})
+            else:
+                self.current_task.add_question(question)
+        
+        if rejected:
+            save_rejected_questions(self.current_task.id, rejected)
+        
+        created = len(questions_data) - len(rejected)
+        if not created:
+            return False, f"Nenhuma das {len(rejected)} questões criadas passou na verificação estrutural"
         
         # Salva a tarefa atualizada
-        save_task_data(self.current_task.id, self.current_task.to_dict())
+        self._checkpoint()
         
-        return True, f"Criadas {len(questions_data)} questões"
+        message = f"Criadas {created} questões"
+        if rejected:
+            message += f" ({len(rejected)} rejeitadas na verificação estrutural)"
+        return True, message
     
     def assign_to_rt_agent(self) -> Tuple[bool, str]:
         """
@@ -284,10 +479,11 @@ class ManagerAgent:
         rt_checklist = self._load_rt_checklist()
         
         # Prepara os dados para o Agente RT
+        questions_dicts = [q.to_dict() for q in self.current_task.questions]
         task_data = {
-            "questions": [q.to_dict() for q in self.current_task.questions],
+            "questions": questions_dicts,
             "rt_checklist": rt_checklist,
-            "stopwords": self.current_task.stopwords
+            "stopwords": self.current_task.stopwords_text
         }
         
         # Cria o prompt para o Agente RT
@@ -304,15 +500,10 @@ class ManagerAgent:
             return False, "Não foi possível extrair questões revisadas da resposta"
         
         # Atualiza as questões com as revisões
-        for q_data in questions_data:
-            for i, question in enumerate(self.current_task.questions):
-                if question.objective_id == q_data["objective_id"]:
-                    # Atualiza a questão com os dados revisados
-                    self.current_task.questions[i] = Question.from_dict(q_data)
-                    break
+        questions_dicts = self._apply_question_updates(questions_data, questions_dicts)
         
         # Salva a tarefa atualizada
-        save_task_data(self.current_task.id, self.current_task.to_dict())
+        self._checkpoint(questions_dicts)
         
         return True, f"Revisadas {len(questions_data)} questões"
     
@@ -324,25 +515,10 @@ class ManagerAgent:
             Checklist RT em formato string
         """
         try:
-            path = os.path.join(config.DATA_DIR, "validacao_rt.txt")
-            with open(path, 'r', encoding='utf-8') as f:
-                return f.read()
+            return self._read_cached(_RT_CHECKLIST_PATH)
         except FileNotFoundError:
             # Retorna um checklist padrão
-            return """
-            CHECKLIST – REVISOR TÉCNICO
-
-            | Nº | Item                                                                                                                                 | Sim | Não | NA  | Observação |
-            |----|--------------------------------------------------------------------------------------------------------------------------------------|-----|-----|-----|-------------|
-            | 1  | As questões abordam os conteúdos tratados nas UAs/Etapas/Aulas correspondentes?                                                     |     |     |     |             |
-            | 2  | Os objetivos de aprendizagem indicados nos grupos correspondem aos definidos no PAA?                                                |     |     |     |             |
-            | 3  | Todas as questões de um grupo permitem avaliar a aprendizagem a partir do(s) objetivo(s) associado(s)? (máximo 2 objetivos).        |     |     |     |             |
-            | 4  | Há correlação entre os conteúdos desenvolvidos nas UAs/Etapas/Aulas e as questões?                                                  |     |     |     |             |
-            | 5  | O nível de complexidade das questões é coerente com os conteúdos propostos nas UAs/Etapas/Aulas correspondentes?                   |     |     |     |             |
-            | 6  | Os feedbacks das questões justificam o porquê do acerto ou erro de forma clara e precisa?                                           |     |     |     |             |
-            | 7  | O texto-base/enunciado está claro e sem ambiguidades?                                                                               |     |     |     |             |
-            | 8  | As questões não avaliam conteúdos memorizados?                                                                                      |     |     |     |             |
-            """
+            return _DEFAULT_RT_CHECKLIST
     
     def assign_to_de_agent(self) -> Tuple[bool, str]:
         """
@@ -364,10 +540,11 @@ class ManagerAgent:
         de_checklist = self._load_de_checklist()
         
         # Prepara os dados para o Agente DE
+        questions_dicts = [q.to_dict() for q in self.current_task.questions]
         task_data = {
-            "questions": [q.to_dict() for q in self.current_task.questions],
+            "questions": questions_dicts,
             "de_checklist": de_checklist,
-            "stopwords": self.current_task.stopwords
+            "stopwords": self.current_task.stopwords_text
         }
         
         # Cria o prompt para o Agente DE
@@ -384,18 +561,170 @@ class ManagerAgent:
             return False, "Não foi possível extrair questões revisadas da resposta"
         
         # Atualiza as questões com as revisões
-        for q_data in questions_data:
-            for i, question in enumerate(self.current_task.questions):
-                if question.objective_id == q_data["objective_id"]:
-                    # Atualiza a questão com os dados revisados
-                    self.current_task.questions[i] = Question.from_dict(q_data)
-                    break
+        questions_dicts = self._apply_question_updates(questions_data, questions_dicts)
         
         # Salva a tarefa atualizada
-        save_task_data(self.current_task.id, self.current_task.to_dict())
+        self._checkpoint(questions_dicts)
         
         return True, f"Revisadas {len(questions_data)} questões"
     
+    def assign_to_reviewers(self) -> Tuple[bool, str]:
+        """
+        Atribui a tarefa aos Agentes RT e DE em paralelo.
+        
+        Returns:
+            Tupla (sucesso, mensagem)
+        """
+        return asyncio.run(self.aassign_to_reviewers())
+    
+    async def aassign_to_reviewers(self) -> Tuple[bool, str]:
+        """
+        Versão assíncrona de assign_to_reviewers.
+        
+        As revisões RT e DE são independentes, então as duas requisições são
+        disparadas ao mesmo tempo e os resultados são combinados por objetivo.
+        
+        Returns:
+            Tupla (sucesso, mensagem)
+        """
+        if not self.current_task:
+            return False, "Nenhuma tarefa inicializada"
+        
+        if not self.current_task.questions:
+            return False, "Não há questões para revisar"
+        
+        # Atualiza o status da tarefa
+        self.current_task.update_status("in_progress", "rt_agent")
+        
+        # Carrega os checklists sem bloquear o laço de eventos
+        rt_checklist, de_checklist = await asyncio.gather(
+            asyncio.to_thread(self._load_rt_checklist),
+            asyncio.to_thread(self._load_de_checklist)
+        )
+        
+        # Prepara os prompts dos dois revisores, serializando as questões uma única vez
+        questions = [q.to_dict() for q in self.current_task.questions]
+        questions_json = to_prompt_json(questions)
+        rt_prompt = self.ai_client.create_agent_prompt("rt", {
+            "questions": questions_json,
+            "rt_checklist": rt_checklist,
+            "stopwords": self.current_task.stopwords_text
+        })
+        de_prompt = self.ai_client.create_agent_prompt("de", {
+            "questions": questions_json,
+            "de_checklist": de_checklist,
+            "stopwords": self.current_task.stopwords_text
+        })
+        
+        # Gera as duas revisões em paralelo usando a API de IA
+        rt_response, de_response = await asyncio.gather(
+            self.ai_client.agenerate_text(rt_prompt, max_tokens=4000),
+            self.ai_client.agenerate_text(de_prompt, max_tokens=4000)
+        )
+        
+        # Extrai as questões revisadas das respostas
+        rt_questions = extract_questions_from_text(
+            rt_response.get("choices", [{}])[0].get("message", {}).get("content", ""))
+        de_questions = extract_questions_from_text(
+            de_response.get("choices", [{}])[0].get("message", {}).get("content", ""))
+        
+        if not rt_questions and not de_questions:
+            return False, "Não foi possível extrair questões revisadas da resposta"
+        
+        # Combina as revisões e atualiza as questões
+        questions_data = self._merge_reviews(rt_questions, de_questions, questions)
+        questions = self._apply_question_updates(questions_data, questions)
+        
+        # Deixa a tarefa no mesmo estado do fluxo sequencial (RT seguido de DE)
+        self.current_task.update_status("in_progress", "de_agent")
+        
+        # Salva a tarefa atualizada
+        self._checkpoint(questions)
+        
+        return True, f"Revisadas {len(questions_data)} questões"
+    
+    def _merge_reviews(self, rt_questions: List[Dict[str, Any]], de_questions: List[Dict[str, Any]],
+                       originals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Combina as revisões RT e DE de um mesmo conjunto de questões.
+        
+        Os dois revisores partem das mesmas questões originais, então a
+        combinação é feita campo a campo: vale o valor do DE nos campos que o
+        DE alterou e o do RT nos demais, preservando as correções técnicas do
+        RT. Se os dois alterarem o mesmo campo, prevalece o DE. As validações
+        dos dois revisores são mantidas.
+        
+        Args:
+            rt_questions: Questões revisadas pelo Agente RT
+            de_questions: Questões revisadas pelo Agente DE
+            originals: Questões enviadas aos revisores
+            
+        Returns:
+            Lista de questões combinadas
+        """
+        original_by_objective = {}
+        for q_data in originals:
+            original_by_objective.setdefault(q_data["objective_id"], q_data)
+        
+        merged = {q_data["objective_id"]: q_data for q_data in rt_questions}
+        
+        for de_data in de_questions:
+            objective_id = de_data["objective_id"]
+            rt_data = merged.get(objective_id)
+            if rt_data is None:
+                merged[objective_id] = de_data
+                continue
+            
+            original = original_by_objective.get(objective_id, {})
+            q_data = dict(rt_data)
+            for key, value in de_data.items():
+                if key != "validation" and (key not in rt_data or value != original.get(key)):
+                    q_data[key] = value
+            
+            validation = dict(rt_data.get("validation") or {})
+            validation.update(
+                (key, value) for key, value in (de_data.get("validation") or {}).items()
+                if value is not None
+            )
+            q_data["validation"] = validation
+            merged[objective_id] = q_data
+        
+        return list(merged.values())
+    
+    def _apply_question_updates(self, questions_data: List[Dict[str, Any]],
+                                questions_dicts: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        Substitui as questões da tarefa pelas versões atualizadas.
+        
+        Cada questão atualizada substitui a primeira questão da tarefa com o
+        mesmo objective_id.
+        
+        Args:
+            questions_data: Lista de questões atualizadas
+            questions_dicts: Dicionários das questões antes da atualização, se já calculados
+            
+        Returns:
+            Dicionários das questões após a atualização (reaproveitando os das
+            questões que não mudaram)
+        """
+        questions = self.current_task.questions
+        positions = {}
+        for i, question in enumerate(questions):
+            positions.setdefault(question.objective_id, i)
+        
+        if questions_dicts is None:
+            questions_dicts = [q.to_dict() for q in questions]
+        else:
+            questions_dicts = list(questions_dicts)
+        
+        for q_data in questions_data:
+            i = positions.get(q_data["objective_id"])
+            if i is not None:
+                self.current_task.replace_question(i, Question.from_dict(q_data))
+                questions_dicts[i] = questions[i].to_dict()
+        
+        return questions_dicts
+    
     def _load_de_checklist(self) -> str:
         """
         Carrega o checklist de validação DE.
@@ -404,37 +733,19 @@ class ManagerAgent:
             Checklist DE em formato string
         """
         try:
-            path = os.path.join(config.DATA_DIR, "validacao_de.txt")
-            with open(path, 'r', encoding='utf-8') as f:
-                return f.read()
+            return self._read_cached(_DE_CHECKLIST_PATH)
         except FileNotFoundError:
             # Retorna um checklist padrão
-            return """
-            CHECKLIST – DESIGN EDUCACIONAL
-
-            | Nº | Item                                                                                                                                 | Sim | Não | NA  | Observação |
-            |----|--------------------------------------------------------------------------------------------------------------------------------------|-----|-----|-----|-------------|
-            | 1  | As questões abordam os conteúdos tratados nas UAs/Etapas/Aulas correspondentes?                                                     |     |     |     |             |
-            | 2  | Os objetivos de aprendizagem indicados nos grupos correspondem aos definidos no PAA?                                                |     |     |     |             |
-            | 3  | Todas as questões de um grupo permitem avaliar a aprendizagem a partir do(s) objetivo(s) associado(s)? (máximo 2 objetivos).        |     |     |     |             |
-            | 4  | Há correlação entre os conteúdos desenvolvidos nas UAs/Etapas/Aulas e as questões?                                                  |     |     |     |             |
-            | 5  | O texto-base/enunciado está claro e sem ambiguidades?                                                                               |     |     |     |             |
-            | 6  | O texto-base/enunciado dá suporte para a resolução da questão?                                                                      |     |     |     |             |
-            | 7  | Os feedbacks das questões justificam o porquê do acerto ou erro de forma clara e precisa?                                           |     |     |     |             |
-            | 8  | Há indicação de referência nos textos de suporte, seja autoral ou de curadoria?                                                     |     |     |     |             |
-            | 9  | Nenhum comando solicita assinalar a alternativa incorreta?                                                                          |     |     |     |             |
-            | 10 | As questões não avaliam conteúdos memorizados?                                                                                      |     |     |     |             |
-            | 11 | As questões não apresentam alternativas com "todas as afirmativas estão erradas/incorretas"?                                        |     |     |     |             |
-            | 12 | As questões apresentam alternativas com extensão semelhante?                                                                        |     |     |     |             |
-            | 13 | As questões não apresentam elementos que tornem a afirmação falsa, como: "apenas", "somente", "nunca", etc.?                        |     |     |     |             |
-            | 14 | Todas as afirmativas iniciam com palavras da mesma classe gramatical?                                                               |     |     |     |             |
-            | 15 | Cada item avaliativo contempla 5 alternativas de resposta?                                                                          |     |     |     |             |
-            """
+            return _DEFAULT_DE_CHECKLIST
     
-    def assign_to_validator_agent(self) -> Tuple[bool, str]:
+    def assign_to_validator_agent(self, on_chunk: Optional[Callable[[str], None]] = None) -> Tuple[bool, str]:
         """
         Atribui a tarefa ao Agente Validador.
         
+        Args:
+            on_chunk: Função chamada com cada trecho da resposta à medida que é
+                gerado. Quando informada, a resposta é obtida em streaming.
+        
         Returns:
             Tupla (sucesso, mensagem)
         """
@@ -448,44 +759,38 @@ class ManagerAgent:
         self.current_task.update_status("in_progress", "validator_agent")
         
         # Prepara os dados para o Agente Validador
+        questions_dicts = [q.to_dict() for q in self.current_task.questions]
         task_data = {
-            "questions": [q.to_dict() for q in self.current_task.questions]
+            "questions": questions_dicts
         }
         
         # Cria o prompt para o Agente Validador
         prompt = self.ai_client.create_agent_prompt("validator", task_data)
         
         # Gera a validação usando a API de IA
-        response = self.ai_client.generate_text(prompt, max_tokens=6000)
-        
-        # Extrai os resultados da resposta
-        content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
+        if on_chunk is None:
+            response = self.ai_client.generate_text(prompt, max_tokens=6000, json_schema=VALIDATION_JSON_SCHEMA)
+            content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
+        else:
+            chunks = []
+            for chunk in self.ai_client.generate_text_stream(prompt, max_tokens=6000,
+                                                             json_schema=VALIDATION_JSON_SCHEMA):
+                chunks.append(chunk)
+                on_chunk(chunk)
+            content = "".join(chunks)
         
-        # Extrai o JSON da resposta
-        result_data = extract_questions_from_text(content)
+        # Extrai as questões e as seções do relatório da resposta
+        questions_data, sections = extract_validation_result(content)
         
-        if not result_data:
+        if not questions_data:
             return False, "Não foi possível extrair os resultados da validação"
         
-        # Extrai as seções de Markdown
-        sections = self._extract_markdown_sections(content)
-        
         # Salva os resultados
         development_report = sections.get("development_report", "")
         final_document = sections.get("final_document", "")
         
         # Atualiza as questões com as validações finais
-        if isinstance(result_data, dict) and "questions" in result_data:
-            questions_data = result_data["questions"]
-        else:
-            questions_data = result_data
-        
-        for q_data in questions_data:
-            for i, question in enumerate(self.current_task.questions):
-                if question.objective_id == q_data["objective_id"]:
-                    # Atualiza a questão com os dados validados
-                    self.current_task.questions[i] = Question.from_dict(q_data)
-                    break
+        questions_dicts = self._apply_question_updates(questions_data, questions_dicts)
         
         # Cria e adiciona o relatório de desenvolvimento
         report = Report(
@@ -495,62 +800,26 @@ class ManagerAgent:
         )
         self.current_task.add_report(report)
         
-        # Salva a tarefa atualizada
-        save_task_data(self.current_task.id, self.current_task.to_dict())
+        # Salva os arquivos de saída em paralelo
+        task_id = self.current_task.id
+        futures = [
+            _IO_POOL.submit(save_questions, task_id, questions_dicts),
+            _IO_POOL.submit(save_report, task_id, "development", development_report),
+            _IO_POOL.submit(save_final_document, task_id, final_document)
+        ]
+        questions_path, report_path, document_path = paths = [future.result() for future in futures]
         
-        # Salva os arquivos de saída
-        questions_path = save_questions(self.current_task.id, [q.to_dict() for q in self.current_task.questions])
-        report_path = save_report(self.current_task.id, "development", development_report)
-        document_path = save_final_document(self.current_task.id, final_document)
+        # A tarefa só é concluída depois que todos os arquivos foram gravados;
+        # em caso de falha, o progresso é salvo e a etapa pode ser repetida
+        if None in paths:
+            self._checkpoint(questions_dicts)
+            return False, "Erro ao salvar os arquivos de saída da validação"
         
-        # Atualiza o status da tarefa
         self.current_task.update_status("completed", "validator_agent")
-        save_task_data(self.current_task.id, self.current_task.to_dict())
+        self._checkpoint(questions_dicts)
         
         return True, f"Validação concluída. Arquivos salvos: {questions_path}, {report_path}, {document_path}"
     
-    def _extract_markdown_sections(self, text: str) -> Dict[str, str]:
-        """
-        Extrai seções de um texto em formato Markdown.
-        
-        Args:
-            text: Texto em formato Markdown
-            
-        Returns:
-            Dicionário com as seções extraídas
-        """
-        sections = {}
-        
-        # Procura por blocos de código Markdown
-        development_report_pattern = r"```(?:markdown)?\s*(# Relatório de Desenvolvimento[\s\S]*?)```"
-        final_document_pattern = r"```(?:markdown)?\s*(# Questões Validadas[\s\S]*?)```"
-        
-        # Extrai o relatório de desenvolvimento
-        development_match = re.search(development_report_pattern, text, re.IGNORECASE)
-        if development_match:
-            sections["development_report"] = development_match.group(1).strip()
-        
-        # Extrai o documento final
-        final_match = re.search(final_document_pattern, text, re.IGNORECASE)
-        if final_match:
-            sections["final_document"] = final_match.group(1).strip()
-        
-        # Se não encontrou nos blocos de código, tenta extrair diretamente
-        if "development_report" not in sections:
-            dev_start = text.find("# Relatório de Desenvolvimento")
-            if dev_start != -1:
-                dev_end = text.find("#", dev_start + 1)
-                if dev_end == -1:
-                    dev_end = len(text)
-                sections["development_report"] = text[dev_start:dev_end].strip()
-        
-        if "final_document" not in sections:
-            doc_start = text.find("# Questões Validadas")
-            if doc_start != -1:
-                sections["final_document"] = text[doc_start:].strip()
-        
-        return sections
-    
     def get_task_status(self) -> Dict[str, Any]:
         """
         Retorna o status atual da tarefa.
@@ -582,16 +851,12 @@ class ManagerAgent:
         if self.current_task.status != "completed":
             return {"status": "in_progress", "message": "Tarefa ainda não concluída"}
         
-        # Obtém os caminhos dos arquivos de saída
-        questions_path = os.path.join(config.OUTPUT_DIR, f"questions_{self.current_task.id}.json")
-        report_path = os.path.join(config.OUTPUT_DIR, f"development_{self.current_task.id}.md")
-        document_path = os.path.join(config.OUTPUT_DIR, f"final_document_{self.current_task.id}.md")
+        # Obtém os caminhos dos arquivos de saída que existem
+        output_paths = get_output_paths(self.current_task.id)
         
         return {
             "task_id": self.current_task.id,
             "status": "completed",
-            "questions_path": questions_path if os.path.exists(questions_path) else None,
-            "report_path": report_path if os.path.exists(report_path) else None,
-            "document_path": document_path if os.path.exists(document_path) else None
+            **{f"{key}_path": str(path) if path.is_file() else None for key, path in output_paths.items()}
         }
 
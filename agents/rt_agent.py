@@ -3,12 +3,37 @@ Agente Revisor Técnico (RT) - Responsável pela revisão técnica das questões
 """
 
 import json
+import asyncio
+import logging
 from typing import Dict, Any, List, Optional, Tuple
 
 from models.question import Question
 from models.report import Checklist
-from utils.ai_client import AIClient
-from utils.text_processor import check_restricted_words, replace_restricted_words, extract_questions_from_text
+from utils.ai_client import get_ai_client, to_prompt_json
+from utils.cache import LRUCache
+from utils.text_processor import iter_json_objects, questions_from_json, replace_restricted_words_in_question
+from utils.token_batcher import estimate_tokens, pack_batches
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+# Número máximo de revisões simultâneas, para respeitar os limites do provedor
+_MAX_CONCURRENT_REVIEWS = 8
+
+# Revisões já obtidas, indexadas pelo conteúdo normalizado da questão, checklist
+# e palavras restritivas. Questões regeneradas que diferem apenas em espaçamento
+# ou maiúsculas reaproveitam a revisão sem nova chamada à API.
+_VALIDATION_CACHE = LRUCache(maxsize=512)
+
+# Lotes de questões revisadas em uma única requisição. Cada questão ocupa o
+# contexto duas vezes (na entrada e na saída revisada); os lotes usam até 80%
+# da janela de contexto e não excedem o limite de tokens gerados por resposta.
+_BATCH_CONTEXT_RATIO = 0.8
+_BATCH_PROMPT_TOKENS = 1500
+_MAX_BATCH_OUTPUT_TOKENS = 8000
+_MAX_BATCH_SIZE = 10
 
 
 class RTAgent:
@@ -20,7 +45,7 @@ class RTAgent:
         """
         Inicializa o Agente Revisor Técnico.
         """
-        self.ai_client = AIClient()
+        self.ai_client = get_ai_client()
     
     def validate_questions(self, questions: List[Question], rt_checklist: str, 
                          stopwords: List[str]) -> List[Question]:
@@ -35,37 +60,263 @@ class RTAgent:
         Returns:
             Lista de questões validadas
         """
+        return asyncio.run(self.avalidate_questions(questions, rt_checklist, stopwords))
+    
+    async def avalidate_questions(self, questions: List[Question], rt_checklist: str, 
+                                  stopwords: List[str]) -> List[Question]:
+        """
+        Valida tecnicamente as questões, agrupando-as em lotes que cabem na
+        janela de contexto do modelo, com uma requisição por lote disparada
+        em paralelo.
+        
+        Args:
+            questions: Lista de questões a serem validadas
+            rt_checklist: Checklist de validação RT
+            stopwords: Lista de palavras a serem evitadas
+            
+        Returns:
+            Lista de questões validadas
+        """
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_REVIEWS)
+        
+        # Prepara as palavras restritivas uma única vez para todas as questões
+        stopwords = tuple(stopwords)
+        stopwords_text = ", ".join(stopwords)
+        
+        # Questões já revisadas vêm do cache; as demais são agrupadas em lotes
+        validated: List[Question] = list(questions)
+        pending = []
+        for index, question in enumerate(questions):
+            cached = self._get_cached_review(question, rt_checklist, stopwords)
+            if cached is not None:
+                validated[index] = cached
+            else:
+                pending.append(index)
+        
+        budget = min(
+            int(config.CONTEXT_WINDOW_TOKENS * _BATCH_CONTEXT_RATIO) - _BATCH_PROMPT_TOKENS
+            - estimate_tokens(rt_checklist) - estimate_tokens(stopwords_text),
+            2 * _MAX_BATCH_OUTPUT_TOKENS
+        )
+        batches = pack_batches(
+            pending,
+            cost=lambda index: 2 * estimate_tokens(to_prompt_json(questions[index])),
+            max_tokens=budget,
+            max_items=_MAX_BATCH_SIZE
+        )
+        
+        async def validate(batch: List[int]) -> List[Question]:
+            async with semaphore:
+                return await asyncio.to_thread(
+                    self.validate_question_batch, [questions[index] for index in batch],
+                    rt_checklist, stopwords, stopwords_text
+                )
+        
+        # Os lotes concluídos ficam no cache mesmo que outro lote falhe
+        results = await asyncio.gather(*(validate(batch) for batch in batches), return_exceptions=True)
+        
+        errors = [result for result in results if isinstance(result, Exception)]
+        for error in errors:
+            logger.error("Erro na revisão técnica de um lote de questões: %s", error)
+        if errors:
+            raise errors[0]
+        
+        for batch, result in zip(batches, results):
+            for index, question in zip(batch, result):
+                validated[index] = question
+        
+        return validated
+    
+    def validate_question_batch(self, questions: List[Question], rt_checklist: str,
+                                stopwords: List[str], stopwords_text: Optional[str] = None) -> List[Question]:
+        """
+        Valida tecnicamente um lote de questões em uma única requisição.
+        
+        As questões revisadas são processadas à medida que chegam na resposta.
+        As que não forem devolvidas são revisadas individualmente.
+        
+        Args:
+            questions: Questões a serem validadas
+            rt_checklist: Checklist de validação RT
+            stopwords: Lista de palavras a serem evitadas
+            stopwords_text: Palavras a serem evitadas já separadas por vírgula
+            
+        Returns:
+            Questões validadas, na mesma ordem
+        """
+        if len(questions) == 1:
+            return [self.validate_single_question(questions[0], rt_checklist, stopwords, stopwords_text)]
+        
+        stopwords = tuple(stopwords)
+        
         # Prepara os dados para o prompt
         task_data = {
-            "questions": [q.to_dict() for q in questions],
+            "questions": questions,
             "rt_checklist": rt_checklist,
-            "stopwords": ", ".join(stopwords)
+            "stopwords": stopwords_text if stopwords_text is not None else ", ".join(stopwords)
         }
         
-        # Cria o prompt para o Agente RT
-        prompt = self.ai_client.create_agent_prompt("rt", task_data)
+        # Cria o prompt para validação do lote
+        prompt = self._create_batch_validation_prompt(task_data)
         
-        # Gera a revisão usando a API de IA
-        response = self.ai_client.generate_text(prompt, max_tokens=4000)
+        # Gera a revisão usando a API de IA, com espaço para todas as questões revisadas
+        max_tokens = min(_MAX_BATCH_OUTPUT_TOKENS, 2000 * len(questions))
+        revised = self._stream_reviews(prompt, questions, rt_checklist, stopwords, max_tokens)
+        
+        return [
+            revised[index] if index in revised
+            else self.validate_single_question(question, rt_checklist, stopwords, stopwords_text)
+            for index, question in enumerate(questions)
+        ]
+    
+    def _stream_reviews(self, prompt: str, questions: List[Question], rt_checklist: str,
+                        stopwords: Tuple[str, ...], max_tokens: int) -> Dict[int, Question]:
+        """
+        Obtém as revisões em streaming, processando cada questão assim que o seu
+        JSON é recebido e encerrando a geração quando todas foram recebidas.
+        
+        Cada questão revisada é associada à enviada pelo id (ou, na falta dele,
+        pelo objective_id), e não pela posição na resposta: se o modelo omitir
+        ou reordenar questões, nenhuma revisão é atribuída (e guardada no cache)
+        para a questão errada.
         
-        # Extrai as questões revisadas da resposta
-        content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
-        questions_data = extract_questions_from_text(content)
+        Args:
+            prompt: Prompt de validação
+            questions: Questões enviadas para revisão
+            rt_checklist: Checklist de validação RT
+            stopwords: Tupla de palavras a serem evitadas
+            max_tokens: Número máximo de tokens a serem gerados
+            
+        Returns:
+            Questões revisadas, pelo índice da questão enviada (podem faltar questões)
+        """
+        revised: Dict[int, Question] = {}
+        stream = self.ai_client.generate_text_stream(prompt, max_tokens=max_tokens)
+        
+        try:
+            for json_data in iter_json_objects(stream):
+                for q_data in questions_from_json(json_data):
+                    index = self._match_review(q_data, questions, revised)
+                    if index is None:
+                        continue
+                    
+                    question = questions[index]
+                    review = self._store_review(
+                        {**q_data, "id": question.id}, stopwords,
+                        self._review_cache_key(question, rt_checklist, stopwords))
+                    revised[index] = review
+                
+                if len(revised) == len(questions):
+                    break
+        finally:
+            # Encerra a conexão, interrompendo a geração de texto excedente
+            if hasattr(stream, "close"):
+                stream.close()
+        
+        return revised
+    
+    @staticmethod
+    def _match_review(question_data: Dict[str, Any], questions: List[Question],
+                      revised: Dict[int, Question]) -> Optional[int]:
+        """
+        Encontra a questão enviada que corresponde a uma questão revisada.
+        
+        Args:
+            question_data: Dados da questão revisada
+            questions: Questões enviadas para revisão
+            revised: Revisões já associadas, pelo índice da questão
+            
+        Returns:
+            Índice da questão correspondente ainda sem revisão, ou None
+        """
+        pending = [index for index in range(len(questions)) if index not in revised]
+        
+        for key in ("id", "objective_id"):
+            value = question_data.get(key)
+            if value is None:
+                continue
+            for index in pending:
+                if getattr(questions[index], key) == value:
+                    return index
+        
+        # Com uma única questão enviada não há ambiguidade
+        if len(questions) == 1 and pending:
+            return pending[0]
+        return None
+    
+    @staticmethod
+    def _review_cache_key(question: Question, rt_checklist: str, stopwords: Tuple[str, ...]) -> Tuple:
+        """
+        Retorna a chave do cache de revisões para uma questão.
+        
+        Args:
+            question: Questão a ser validada
+            rt_checklist: Checklist de validação RT
+            stopwords: Tupla de palavras a serem evitadas
+            
+        Returns:
+            Chave do cache
+        """
+        return question.fingerprint(normalize=True), rt_checklist, stopwords
+    
+    def _get_cached_review(self, question: Question, rt_checklist: str,
+                           stopwords: Tuple[str, ...]) -> Optional[Question]:
+        """
+        Retorna a revisão já obtida para uma questão equivalente, se houver.
+        
+        Args:
+            question: Questão a ser validada
+            rt_checklist: Checklist de validação RT
+            stopwords: Tupla de palavras a serem evitadas
+            
+        Returns:
+            Questão revisada, com o ID da questão original, ou None
+        """
+        cached = _VALIDATION_CACHE.get(self._review_cache_key(question, rt_checklist, stopwords))
+        if cached is None:
+            return None
         
-        if not questions_data:
-            return questions  # Retorna as questões originais se não conseguir extrair as revisadas
+        revised = Question.from_dict(json.loads(cached))
+        revised.id = question.id
+        return revised
+    
+    def _store_review(self, question_data: Dict[str, Any], stopwords: Tuple[str, ...],
+                      cache_key: Tuple) -> Question:
+        """
+        Substitui as palavras restritivas de uma questão revisada e a guarda no cache.
         
-        # Converte os dados para objetos Question
-        validated_questions = []
-        for q_data in questions_data:
-            # Verifica se há palavras restritivas no texto da questão
-            self._check_and_replace_restricted_words(q_data, stopwords)
+        Args:
+            question_data: Dados da questão revisada
+            stopwords: Tupla de palavras a serem evitadas
+            cache_key: Chave do cache de revisões
             
-            # Cria o objeto Question
-            question = Question.from_dict(q_data)
-            validated_questions.append(question)
+        Returns:
+            Questão revisada
+        """
+        # Verifica se há palavras restritivas no texto da questão
+        self._check_and_replace_restricted_words(question_data, stopwords)
         
-        return validated_questions
+        # Cria o objeto Question
+        revised = Question.from_dict(question_data)
+        _VALIDATION_CACHE.set(cache_key, json.dumps(revised.to_dict(), ensure_ascii=False))
+        return revised
+    
+    async def avalidate_single_question(self, question: Question, rt_checklist: str, 
+                                        stopwords: List[str], stopwords_text: Optional[str] = None) -> Question:
+        """
+        Versão assíncrona de validate_single_question.
+        
+        Args:
+            question: Questão a ser validada
+            rt_checklist: Checklist de validação RT
+            stopwords: Lista de palavras a serem evitadas
+            stopwords_text: Palavras a serem evitadas já separadas por vírgula
+            
+        Returns:
+            Questão validada
+        """
+        return await asyncio.to_thread(self.validate_single_question, question, rt_checklist, stopwords,
+                                       stopwords_text)
     
     def _check_and_replace_restricted_words(self, question_data: Dict[str, Any], 
                                           stopwords: List[str]) -> None:
@@ -76,27 +327,10 @@ class RTAgent:
             question_data: Dados da questão
             stopwords: Lista de palavras restritivas
         """
-        # Verifica e substitui no contexto
-        if "context" in question_data:
-            question_data["context"] = replace_restricted_words(question_data["context"], stopwords)
-        
-        # Verifica e substitui no enunciado
-        if "statement" in question_data:
-            question_data["statement"] = replace_restricted_words(question_data["statement"], stopwords)
-        
-        # Verifica e substitui nas alternativas
-        if "alternatives" in question_data:
-            for alt in question_data["alternatives"]:
-                if "text" in alt:
-                    alt["text"] = replace_restricted_words(alt["text"], stopwords)
-        
-        # Verifica e substitui nos feedbacks
-        if "feedback" in question_data:
-            for key, value in question_data["feedback"].items():
-                question_data["feedback"][key] = replace_restricted_words(value, stopwords)
+        replace_restricted_words_in_question(question_data, stopwords)
     
     def validate_single_question(self, question: Question, rt_checklist: str, 
-                               stopwords: List[str]) -> Question:
+                               stopwords: List[str], stopwords_text: Optional[str] = None) -> Question:
         """
         Valida tecnicamente uma única questão.
         
@@ -104,35 +338,32 @@ class RTAgent:
             question: Questão a ser validada
             rt_checklist: Checklist de validação RT
             stopwords: Lista de palavras a serem evitadas
+            stopwords_text: Palavras a serem evitadas já separadas por vírgula
+                (calculado a partir de stopwords se não for informado)
             
         Returns:
             Questão validada
         """
+        stopwords = tuple(stopwords)
+        cached = self._get_cached_review(question, rt_checklist, stopwords)
+        if cached is not None:
+            return cached
+        
         # Prepara os dados para o prompt
         task_data = {
-            "questions": [question.to_dict()],
+            "questions": [question],
             "rt_checklist": rt_checklist,
-            "stopwords": ", ".join(stopwords)
+            "stopwords": stopwords_text if stopwords_text is not None else ", ".join(stopwords)
         }
         
         # Cria o prompt específico para validação de uma única questão
         prompt = self._create_single_question_validation_prompt(task_data)
         
         # Gera a revisão usando a API de IA
-        response = self.ai_client.generate_text(prompt, max_tokens=2000)
-        
-        # Extrai a questão revisada da resposta
-        content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
-        questions_data = extract_questions_from_text(content)
-        
-        if not questions_data:
-            return question  # Retorna a questão original se não conseguir extrair a revisada
-        
-        # Verifica se há palavras restritivas no texto da questão
-        self._check_and_replace_restricted_words(questions_data[0], stopwords)
+        revised = self._stream_reviews(prompt, [question], rt_checklist, stopwords, 2000)
         
-        # Cria o objeto Question
-        return Question.from_dict(questions_data[0])
+        # Retorna a questão original se não conseguir extrair a revisada
+        return revised.get(0, question)
     
     def _create_single_question_validation_prompt(self, task_data: Dict[str, Any]) -> str:
         """
@@ -147,15 +378,6 @@ class RTAgent:
         return f"""
         Você é um Revisor Técnico especializado em validar a precisão técnica de questões educacionais.
         
-        QUESTÃO A SER REVISADA:
-        {json.dumps(task_data["questions"][0], ensure_ascii=False, indent=2)}
-        
-        CHECKLIST DE VALIDAÇÃO RT:
-        {task_data["rt_checklist"]}
-        
-        PALAVRAS A EVITAR (verifique e substitua estas palavras ou similares):
-        {task_data["stopwords"]}
-        
         INSTRUÇÕES:
         1. Analise a questão quanto à precisão técnica do conteúdo.
         2. Verifique se a questão está alinhada com o objetivo de aprendizagem.
@@ -179,27 +401,62 @@ class RTAgent:
           }}
         }}
         ```
+        
+        CHECKLIST DE VALIDAÇÃO RT:
+        {task_data["rt_checklist"]}
+        
+        PALAVRAS A EVITAR (verifique e substitua estas palavras ou similares):
+        {task_data["stopwords"]}
+        
+        QUESTÃO A SER REVISADA:
+        {to_prompt_json(task_data["questions"][0])}
         """
     
-    def search_external_information(self, topic: str) -> str:
+    def _create_batch_validation_prompt(self, task_data: Dict[str, Any]) -> str:
         """
-        Simula uma pesquisa de informações externas sobre um tópico.
+        Cria um prompt para validação de um lote de questões em uma única requisição.
         
         Args:
-            topic: Tópico a ser pesquisado
+            task_data: Dados da tarefa
             
         Returns:
-            Informações encontradas
+            Prompt formatado
         """
-        # Em uma implementação real, este método faria uma pesquisa na web
-        # Para esta simulação, retornamos um texto genérico
         return f"""
-        Resultados da pesquisa sobre "{topic}":
+        Você é um Revisor Técnico especializado em validar a precisão técnica de questões educacionais.
+        
+        INSTRUÇÕES:
+        1. Analise cada questão quanto à precisão técnica do conteúdo.
+        2. Verifique se cada questão está alinhada com o objetivo de aprendizagem.
+        3. Identifique e corrija quaisquer erros técnicos ou conceituais.
+        4. Substitua palavras restritivas por alternativas mais adequadas.
+        5. Preencha o checklist de validação para cada questão.
+        
+        Por favor, retorne todas as questões revisadas, mantendo o campo "id" de cada uma e no mesmo formato JSON, uma por bloco ```json, adicionando a cada uma um campo "validation.rt" com o resultado da sua análise.
+        
+        Exemplo de formato para o campo validation.rt:
+        ```json
+        "validation": {{
+          "rt": {{
+            "status": "approved",
+            "comments": "O conteúdo está tecnicamente correto e alinhado com as práticas de ciência de dados.",
+            "checklist": {{
+              "item1": {{"result": "sim", "observation": "As questões abordam os conteúdos tratados nas UAs correspondentes"}},
+              "item2": {{"result": "sim", "observation": "Os objetivos de aprendizagem estão alinhados com o PAA"}},
+              ...
+            }}
+          }}
+        }}
+        ```
+        
+        CHECKLIST DE VALIDAÇÃO RT:
+        {task_data["rt_checklist"]}
+        
+        PALAVRAS A EVITAR (verifique e substitua estas palavras ou similares):
+        {task_data["stopwords"]}
         
-        1. Definição: {topic} refere-se a um conceito importante na área de estudo.
-        2. Características principais: Precisão, confiabilidade, relevância.
-        3. Aplicações: Amplamente utilizado em diversos contextos.
-        4. Melhores práticas: Seguir metodologias estabelecidas e padrões da indústria.
+        QUESTÕES A SEREM REVISADAS ({len(task_data["questions"])} questões):
+        {to_prompt_json(task_data["questions"])}
         """
     
     def generate_validation_report(self, questions: List[Question]) -> Dict[str, Any]:
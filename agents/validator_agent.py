@@ -2,14 +2,18 @@
 Agente Validador - Responsável pela validação final das questões.
 """
 
-import json
-import re
 from typing import Dict, Any, List, Optional, Tuple
 
 from models.question import Question
-from models.report import Report
-from utils.ai_client import AIClient
-from utils.text_processor import extract_questions_from_text
+from models.report import Report, VALIDATION_JSON_SCHEMA
+from utils.ai_client import get_ai_client, to_prompt_json
+from utils.cache import LRUCache
+from utils.text_processor import extract_report_sections, extract_validation_result
+
+
+# Respostas de validação já obtidas, indexadas pelo conteúdo normalizado do lote
+# de questões. Um lote revalidado sem alterações não gera nova chamada à API.
+_RESPONSE_CACHE = LRUCache(maxsize=128)
 
 
 class ValidatorAgent:
@@ -21,7 +25,7 @@ class ValidatorAgent:
         """
         Inicializa o Agente Validador.
         """
-        self.ai_client = AIClient()
+        self.ai_client = get_ai_client()
     
     def validate_questions(self, questions: List[Question]) -> Tuple[List[Question], str, str]:
         """
@@ -33,83 +37,76 @@ class ValidatorAgent:
         Returns:
             Tupla (questões validadas, relatório de desenvolvimento, documento final)
         """
-        # Prepara os dados para o prompt
-        task_data = {
-            "questions": [q.to_dict() for q in questions]
-        }
-        
-        # Cria o prompt para o Agente Validador
-        prompt = self.ai_client.create_agent_prompt("validator", task_data)
-        
-        # Gera a validação usando a API de IA
-        response = self.ai_client.generate_text(prompt, max_tokens=6000)
-        
-        # Extrai os resultados da resposta
-        content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
+        cache_key = tuple(q.fingerprint(normalize=True) for q in questions)
+        cached = _RESPONSE_CACHE.get(cache_key)
         
-        # Extrai o JSON da resposta
-        result_data = extract_questions_from_text(content)
+        if cached is None:
+            # Prepara os dados para o prompt
+            task_data = {
+                "questions": questions
+            }
+            
+            # Cria o prompt para o Agente Validador
+            prompt = self.ai_client.create_agent_prompt("validator", task_data)
+            
+            # Gera a validação usando a API de IA
+            response = self.ai_client.generate_text(prompt, max_tokens=6000, json_schema=VALIDATION_JSON_SCHEMA)
+            
+            # Extrai os resultados da resposta
+            content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
+            source_ids = [q.id for q in questions]
+        else:
+            # A resposta pode ter sido obtida para outras questões de mesmo conteúdo
+            source_ids, content = cached
         
-        # Extrai as seções de Markdown
-        sections = self._extract_markdown_sections(content)
+        # Extrai as questões e as seções do relatório da resposta
+        questions_data, sections = extract_validation_result(content)
+        if questions_data:
+            _RESPONSE_CACHE.set(cache_key, (source_ids, content))
         
         development_report = sections.get("development_report", "")
         final_document = sections.get("final_document", "")
         
         # Processa as questões validadas
-        validated_questions = []
-        if isinstance(result_data, dict) and "questions" in result_data:
-            questions_data = result_data["questions"]
-        else:
-            questions_data = result_data
-        
-        for q_data in questions_data:
-            question = Question.from_dict(q_data)
-            validated_questions.append(question)
+        validated_questions = self._map_validated_questions(questions_data, questions, source_ids)
         
         return validated_questions, development_report, final_document
     
-    def _extract_markdown_sections(self, text: str) -> Dict[str, str]:
+    @staticmethod
+    def _map_validated_questions(questions_data: List[Dict[str, Any]], questions: List[Question],
+                                 source_ids: List[str]) -> List[Question]:
         """
-        Extrai seções de um texto em formato Markdown.
+        Associa as questões validadas às questões enviadas, na ordem destas.
+        
+        Cada questão validada é associada pelo id com que foi enviada (ou, na
+        falta dele, pela posição) e recebe o id da questão correspondente. Se a
+        resposta veio do cache e foi obtida para outra questão de mesmo conteúdo,
+        os metadados e as validações RT e DE também são os da questão enviada.
         
         Args:
-            text: Texto em formato Markdown
+            questions_data: Dados das questões validadas
+            questions: Questões enviadas para validação
+            source_ids: IDs das questões para as quais a resposta foi obtida
             
         Returns:
-            Dicionário com as seções extraídas
+            Lista de questões validadas
         """
-        sections = {}
-        
-        # Procura por blocos de código Markdown
-        development_report_pattern = r"```(?:markdown)?\s*(# Relatório de Desenvolvimento[\s\S]*?)```"
-        final_document_pattern = r"```(?:markdown)?\s*(# Questões Validadas[\s\S]*?)```"
-        
-        # Extrai o relatório de desenvolvimento
-        development_match = re.search(development_report_pattern, text, re.IGNORECASE)
-        if development_match:
-            sections["development_report"] = development_match.group(1).strip()
-        
-        # Extrai o documento final
-        final_match = re.search(final_document_pattern, text, re.IGNORECASE)
-        if final_match:
-            sections["final_document"] = final_match.group(1).strip()
-        
-        # Se não encontrou nos blocos de código, tenta extrair diretamente
-        if "development_report" not in sections:
-            dev_start = text.find("# Relatório de Desenvolvimento")
-            if dev_start != -1:
-                dev_end = text.find("#", dev_start + 1)
-                if dev_end == -1:
-                    dev_end = len(text)
-                sections["development_report"] = text[dev_start:dev_end].strip()
-        
-        if "final_document" not in sections:
-            doc_start = text.find("# Questões Validadas")
-            if doc_start != -1:
-                sections["final_document"] = text[doc_start:].strip()
-        
-        return sections
+        positions = {question_id: index for index, question_id in enumerate(source_ids)}
+        validated: Dict[int, Question] = {}
+        
+        for position, q_data in enumerate(questions_data):
+            index = positions.get(q_data.get("id"), position)
+            if index >= len(questions) or index in validated:
+                continue
+            
+            original = questions[index]
+            question = Question.from_dict({**q_data, "id": original.id})
+            if source_ids[index] != original.id:
+                question.metadata = dict(original.metadata)
+                question.validation = {**original.validation, "final": question.validation.get("final")}
+            validated[index] = question
+        
+        return [validated[index] for index in sorted(validated)]
     
     def perform_final_validation(self, question: Question) -> Dict[str, Any]:
         """
@@ -139,6 +136,33 @@ class ValidatorAgent:
             }
         
         # Realiza verificações adicionais
+        issues = self.structural_precheck(question)
+        
+        if issues:
+            return {
+                "status": "rejected",
+                "comments": "A questão apresenta os seguintes problemas: " + "; ".join(issues)
+            }
+        
+        return {
+            "status": "approved",
+            "comments": "A questão passou por todas as etapas de validação com sucesso."
+        }
+    
+    @staticmethod
+    def structural_precheck(question: Question) -> List[str]:
+        """
+        Verifica a estrutura de uma questão, sem chamadas à API de IA.
+        
+        Pode ser usada logo após a criação das questões, para descartar as
+        malformadas antes das etapas de revisão.
+        
+        Args:
+            question: Questão a ser verificada
+            
+        Returns:
+            Lista de problemas encontrados (vazia se a questão estiver correta)
+        """
         issues = []
         
         # Verifica se tem contexto
@@ -149,29 +173,29 @@ class ValidatorAgent:
         if not question.statement:
             issues.append("Falta enunciado na questão")
         
+        # As questões vêm da IA: alternativas e feedback podem estar malformados
+        alternatives = question.alternatives if isinstance(question.alternatives, list) else []
+        alternatives = [alt for alt in alternatives if isinstance(alt, dict)]
+        feedback = question.feedback if isinstance(question.feedback, dict) else {}
+        
         # Verifica se tem 5 alternativas
-        if len(question.alternatives) != 5:
-            issues.append(f"A questão deve ter 5 alternativas, mas tem {len(question.alternatives)}")
+        if len(alternatives) != 5:
+            issues.append(f"A questão deve ter 5 alternativas, mas tem {len(alternatives)}")
+        
+        # Verifica se todas as alternativas têm identificador
+        alt_ids = [alt.get("id") for alt in alternatives]
+        if None in alt_ids:
+            issues.append("Há alternativas sem identificador")
         
         # Verifica se tem feedback para todas as alternativas
-        for alt in question.alternatives:
-            if alt["id"] not in question.feedback:
-                issues.append(f"Falta feedback para a alternativa {alt['id']}")
+        missing = {str(alt_id) for alt_id in alt_ids if alt_id is not None} - feedback.keys()
+        issues.extend(f"Falta feedback para a alternativa {alt_id}" for alt_id in sorted(missing))
         
         # Verifica se tem pelo menos uma alternativa correta
-        if not any(alt["correct"] for alt in question.alternatives):
+        if not any(alt.get("correct") for alt in alternatives):
             issues.append("A questão não tem nenhuma alternativa correta")
         
-        if issues:
-            return {
-                "status": "rejected",
-                "comments": "A questão apresenta os seguintes problemas: " + "; ".join(issues)
-            }
-        
-        return {
-            "status": "approved",
-            "comments": "A questão passou por todas as etapas de validação com sucesso."
-        }
+        return issues
     
     def generate_development_report(self, questions: List[Question]) -> str:
         """
@@ -185,7 +209,7 @@ class ValidatorAgent:
         """
         # Prepara os dados para o prompt
         task_data = {
-            "questions": [q.to_dict() for q in questions],
+            "questions": questions,
             "report_type": "development"
         }
         
@@ -198,15 +222,8 @@ class ValidatorAgent:
         # Extrai o relatório da resposta
         content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
         
-        # Procura por blocos de código Markdown
-        report_pattern = r"```(?:markdown)?\s*(# Relatório de Desenvolvimento[\s\S]*?)```"
-        report_match = re.search(report_pattern, content, re.IGNORECASE)
-        
-        if report_match:
-            return report_match.group(1).strip()
-        
-        # Se não encontrou no bloco de código, retorna o conteúdo completo
-        return content
+        # Se não encontrou a seção, retorna o conteúdo completo
+        return extract_report_sections(content).get("development_report", content)
     
     def generate_final_document(self, questions: List[Question]) -> str:
         """
@@ -220,7 +237,7 @@ class ValidatorAgent:
         """
         # Prepara os dados para o prompt
         task_data = {
-            "questions": [q.to_dict() for q in questions],
+            "questions": questions,
             "document_type": "final"
         }
         
@@ -233,15 +250,8 @@ class ValidatorAgent:
         # Extrai o documento da resposta
         content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
         
-        # Procura por blocos de código Markdown
-        document_pattern = r"```(?:markdown)?\s*(# Questões Validadas[\s\S]*?)```"
-        document_match = re.search(document_pattern, content, re.IGNORECASE)
-        
-        if document_match:
-            return document_match.group(1).strip()
-        
-        # Se não encontrou no bloco de código, retorna o conteúdo completo
-        return content
+        # Se não encontrou a seção, retorna o conteúdo completo
+        return extract_report_sections(content).get("final_document", content)
     
     def _create_report_generation_prompt(self, task_data: Dict[str, Any]) -> str:
         """
@@ -256,9 +266,6 @@ class ValidatorAgent:
         return f"""
         Você é um Validador Final especializado em garantir a qualidade geral de questões educacionais.
         
-        QUESTÕES VALIDADAS:
-        {json.dumps(task_data["questions"], ensure_ascii=False, indent=2)}
-        
         INSTRUÇÕES:
         1. Gere um relatório de desenvolvimento explicando a lógica adotada no processo.
         2. O relatório deve incluir:
@@ -302,6 +309,9 @@ class ValidatorAgent:
         3. [Recomendação 3]
         ...
         ```
+        
+        QUESTÕES VALIDADAS:
+        {to_prompt_json(task_data["questions"])}
         """
     
     def _create_document_generation_prompt(self, task_data: Dict[str, Any]) -> str:
@@ -317,9 +327,6 @@ class ValidatorAgent:
         return f"""
         Você é um Validador Final especializado em garantir a qualidade geral de questões educacionais.
         
-        QUESTÕES VALIDADAS:
-        {json.dumps(task_data["questions"], ensure_ascii=False, indent=2)}
-        
         INSTRUÇÕES:
         1. Gere um documento final com todas as questões validadas.
         2. O documento deve ser organizado por objetivos de aprendizagem.
@@ -361,5 +368,8 @@ class ValidatorAgent:
         
         ...
         ```
+        
+        QUESTÕES VALIDADAS:
+        {to_prompt_json(task_data["questions"])}
         """
 
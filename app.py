@@ -4,22 +4,77 @@ Aplicação principal do sistema multi-agente.
 
 import os
 import json
-from typing import Dict, Any, List, Optional, Tuple
-from flask import Flask, request, jsonify
+import queue
+import logging
+import time
+import threading
+import weakref
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 
 from agents.manager_agent import ManagerAgent
-from utils.file_handler import read_text, ensure_dir
+from utils.cache import LRUCache
+from utils.concurrency import SingleFlight
+from utils.ai_client import AIClientError, get_ai_client
+from utils.file_handler import read_json, read_text, ensure_dir, get_output_paths
 
 import config
 
 
+# Mensagens dos módulos (erros da API de IA, de arquivos etc.) no nível configurado
+logging.basicConfig(
+    level=config.LOG_LEVEL,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+
 # Inicializa a aplicação Flask
 app = Flask(__name__)
 CORS(app)  # Habilita CORS para todas as rotas
 
-# Inicializa o Agente Gerenciador
-manager = ManagerAgent()
+# Respostas JSON sem ordenar as chaves e sem escapar os acentos (\u00e7 etc.),
+# o que reduz o tempo de serialização e o tamanho dos textos em português
+app.json.sort_keys = False
+app.json.ensure_ascii = False
+
+# Uploads maiores que o limite são recusados (413) antes que o corpo seja lido
+app.config['MAX_CONTENT_LENGTH'] = config.MAX_UPLOAD_SIZE
+
+# Garante que os diretórios necessários existem
+ensure_dir(config.INPUT_DIR)
+ensure_dir(config.OUTPUT_DIR)
+ensure_dir(config.TEMPLATES_DIR)
+
+# Um Agente Gerenciador por tarefa, para que requisições simultâneas de tarefas
+# diferentes não compartilhem estado. As tarefas ociosas são descartadas da
+# memória e recarregadas do disco quando voltam a ser usadas.
+task_managers = LRUCache(maxsize=256)
+task_managers_lock = threading.Lock()
+
+# Requisições simultâneas para a mesma tarefa e etapa compartilham uma única execução
+stage_flights = SingleFlight()
+
+# Trava de cada tarefa: etapas diferentes da mesma tarefa alteram o mesmo
+# gerenciador e os mesmos arquivos, e por isso são executadas uma de cada vez.
+# Cada trava é descartada quando nenhuma requisição a utiliza.
+task_locks = weakref.WeakValueDictionary()
+
+# Gerenciadores das tarefas com uma etapa em execução. Não são descartados pelo
+# LRU: enquanto a etapa não termina, todas as requisições da tarefa usam o mesmo
+# gerenciador, em vez de carregar do disco uma segunda cópia da tarefa.
+active_managers: Dict[str, ManagerAgent] = {}
+
+# Execuções completas em segundo plano (modo batch), indexadas pelo ID da tarefa.
+# Cada execução é descartada config.BATCH_RESULT_TTL segundos após terminar.
+batch_pool = ThreadPoolExecutor(max_workers=2)
+batch_runs: Dict[str, Future] = {}
+batch_runs_lock = threading.Lock()
+
+# Etapas executadas com a resposta enviada ao cliente em streaming (SSE)
+stream_pool = ThreadPoolExecutor(max_workers=4)
 
 
 @app.route('/health', methods=['GET'])
@@ -42,8 +97,10 @@ def create_task():
     if not objectives or not theory_text:
         return jsonify({"error": "Objetivos e fundamentação teórica são obrigatórios"}), 400
     
-    # Inicializa a tarefa
+    # Inicializa a tarefa com um gerenciador próprio
+    manager = ManagerAgent()
     task_id = manager.initialize_task(objectives, theory_text)
+    task_managers.set(task_id, manager)
     
     return jsonify({
         "task_id": task_id,
@@ -55,7 +112,8 @@ def create_task():
 def get_task_status(task_id):
     """Endpoint para obter o status de uma tarefa."""
     # Carrega a tarefa
-    if not manager.load_task(task_id):
+    manager = get_manager(task_id)
+    if manager is None:
         return jsonify({"error": f"Tarefa {task_id} não encontrada"}), 404
     
     # Obtém o status da tarefa
@@ -64,15 +122,145 @@ def get_task_status(task_id):
     return jsonify(status)
 
 
+def get_manager(task_id: str) -> Optional[ManagerAgent]:
+    """
+    Retorna o Agente Gerenciador de uma tarefa, carregando-a do disco se necessário.
+    
+    Args:
+        task_id: ID da tarefa
+        
+    Returns:
+        Agente Gerenciador com a tarefa carregada, ou None se a tarefa não for encontrada
+    """
+    with task_managers_lock:
+        manager = active_managers.get(task_id)
+        if manager is None:
+            manager = task_managers.get(task_id)
+        if manager is None:
+            manager = ManagerAgent()
+            if not manager.load_task(task_id):
+                return None
+            task_managers.set(task_id, manager)
+        return manager
+
+
+def get_task_lock(task_id: str) -> threading.Lock:
+    """
+    Retorna a trava que serializa a execução das etapas de uma tarefa.
+    
+    Args:
+        task_id: ID da tarefa
+        
+    Returns:
+        Trava da tarefa
+    """
+    with task_managers_lock:
+        lock = task_locks.get(task_id)
+        if lock is None:
+            lock = threading.Lock()
+            task_locks[task_id] = lock
+        return lock
+
+
+@contextmanager
+def task_session(task_id: str) -> Iterator[Optional[ManagerAgent]]:
+    """
+    Obtém o gerenciador de uma tarefa com a trava da tarefa adquirida,
+    mantendo-o em uso até o fim do bloco.
+    
+    Args:
+        task_id: ID da tarefa
+        
+    Returns:
+        Gerenciador da tarefa, ou None se a tarefa não for encontrada
+    """
+    with get_task_lock(task_id):
+        manager = get_manager(task_id)
+        if manager is None:
+            yield None
+            return
+        
+        with task_managers_lock:
+            active_managers[task_id] = manager
+        try:
+            yield manager
+        finally:
+            with task_managers_lock:
+                del active_managers[task_id]
+                # Volta ao LRU caso tenha sido descartado durante a etapa
+                task_managers.set(task_id, manager)
+
+
+def run_task_stage(task_id: str, method_name: str, **kwargs: Any) -> Optional[Tuple[bool, str]]:
+    """
+    Executa uma etapa do gerenciador da tarefa.
+    
+    Requisições simultâneas para a mesma tarefa e etapa aguardam a execução
+    em andamento em vez de repetir as chamadas à API de IA; etapas diferentes
+    da mesma tarefa aguardam a trava da tarefa.
+    
+    Args:
+        task_id: ID da tarefa
+        method_name: Nome do método do gerenciador que executa a etapa
+        **kwargs: Argumentos repassados ao método (usados apenas pela
+            requisição que inicia a execução)
+        
+    Returns:
+        Tupla (sucesso, mensagem), ou None se a tarefa não for encontrada
+    """
+    def run() -> Optional[Tuple[bool, str]]:
+        with task_session(task_id) as manager:
+            if manager is None:
+                return None
+            return getattr(manager, method_name)(**kwargs)
+    
+    return stage_flights.do((task_id, method_name), run)
+
+
+def stream_stage_events(task_id: str, method_name: str) -> Iterator[str]:
+    """
+    Executa uma etapa em segundo plano e produz eventos SSE com os trechos
+    da resposta da IA, seguidos de um evento final com o resultado.
+    
+    A etapa é executada por run_task_stage: se a mesma etapa já estiver em
+    andamento, a requisição aguarda essa execução e recebe apenas o evento final.
+    
+    Args:
+        task_id: ID da tarefa
+        method_name: Nome do método do gerenciador, que aceita o parâmetro on_chunk
+        
+    Returns:
+        Iterador com os eventos no formato text/event-stream
+    """
+    chunks = queue.Queue()
+    future = stream_pool.submit(run_task_stage, task_id, method_name, on_chunk=chunks.put)
+    future.add_done_callback(lambda _: chunks.put(None))
+    
+    while True:
+        chunk = chunks.get()
+        if chunk is None:
+            break
+        yield f"data: {json.dumps({'chunk': chunk}, ensure_ascii=False)}\n\n"
+    
+    try:
+        result = future.result()
+        success, message = result if result is not None else (False, f"Tarefa {task_id} não encontrada")
+    except Exception as e:
+        success, message = False, str(e)
+    
+    event = "done" if success else "error"
+    payload = {"task_id": task_id, "message": message} if success else {"error": message}
+    yield f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
 @app.route('/task/<task_id>/content', methods=['POST'])
 def run_content_agent(task_id):
     """Endpoint para executar o Agente Conteudista."""
-    # Carrega a tarefa
-    if not manager.load_task(task_id):
+    # Carrega a tarefa e executa o Agente Conteudista
+    result = run_task_stage(task_id, "assign_to_content_agent")
+    if result is None:
         return jsonify({"error": f"Tarefa {task_id} não encontrada"}), 404
-    
-    # Executa o Agente Conteudista
-    success, message = manager.assign_to_content_agent()
+    success, message = result
     
     if not success:
         return jsonify({"error": message}), 500
@@ -86,12 +274,11 @@ def run_content_agent(task_id):
 @app.route('/task/<task_id>/rt', methods=['POST'])
 def run_rt_agent(task_id):
     """Endpoint para executar o Agente Revisor Técnico."""
-    # Carrega a tarefa
-    if not manager.load_task(task_id):
+    # Carrega a tarefa e executa o Agente RT
+    result = run_task_stage(task_id, "assign_to_rt_agent")
+    if result is None:
         return jsonify({"error": f"Tarefa {task_id} não encontrada"}), 404
-    
-    # Executa o Agente RT
-    success, message = manager.assign_to_rt_agent()
+    success, message = result
     
     if not success:
         return jsonify({"error": message}), 500
@@ -105,12 +292,11 @@ def run_rt_agent(task_id):
 @app.route('/task/<task_id>/de', methods=['POST'])
 def run_de_agent(task_id):
     """Endpoint para executar o Agente Design Educacional."""
-    # Carrega a tarefa
-    if not manager.load_task(task_id):
+    # Carrega a tarefa e executa o Agente DE
+    result = run_task_stage(task_id, "assign_to_de_agent")
+    if result is None:
         return jsonify({"error": f"Tarefa {task_id} não encontrada"}), 404
-    
-    # Executa o Agente DE
-    success, message = manager.assign_to_de_agent()
+    success, message = result
     
     if not success:
         return jsonify({"error": message}), 500
@@ -124,12 +310,20 @@ def run_de_agent(task_id):
 @app.route('/task/<task_id>/validator', methods=['POST'])
 def run_validator_agent(task_id):
     """Endpoint para executar o Agente Validador."""
-    # Carrega a tarefa
-    if not manager.load_task(task_id):
+    # Com ?stream=1, a resposta da IA é enviada ao cliente à medida que é gerada
+    if request.args.get('stream') in ('1', 'true'):
+        if get_manager(task_id) is None:
+            return jsonify({"error": f"Tarefa {task_id} não encontrada"}), 404
+        
+        events = stream_stage_events(task_id, "assign_to_validator_agent")
+        return Response(stream_with_context(events), mimetype='text/event-stream',
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    
+    # Carrega a tarefa e executa o Agente Validador
+    result = run_task_stage(task_id, "assign_to_validator_agent")
+    if result is None:
         return jsonify({"error": f"Tarefa {task_id} não encontrada"}), 404
-    
-    # Executa o Agente Validador
-    success, message = manager.assign_to_validator_agent()
+    success, message = result
     
     if not success:
         return jsonify({"error": message}), 500
@@ -144,7 +338,8 @@ def run_validator_agent(task_id):
 def get_task_results(task_id):
     """Endpoint para obter os resultados finais de uma tarefa."""
     # Carrega a tarefa
-    if not manager.load_task(task_id):
+    manager = get_manager(task_id)
+    if manager is None:
         return jsonify({"error": f"Tarefa {task_id} não encontrada"}), 404
     
     # Obtém os resultados da tarefa
@@ -165,9 +360,9 @@ def get_task_results(task_id):
     report = ""
     document = ""
     
+    # Um arquivo de questões ausente ou inválido resulta em um objeto vazio
     if questions_path and os.path.exists(questions_path):
-        with open(questions_path, 'r', encoding='utf-8') as f:
-            questions = json.load(f)
+        questions = read_json(questions_path)
     
     if report_path and os.path.exists(report_path):
         report = read_text(report_path)
@@ -184,40 +379,195 @@ def get_task_results(task_id):
     })
 
 
+# Arquivos de resultado servidos diretamente, com o tipo de conteúdo de cada um
+RESULT_FILES = {
+    "questions.json": ("questions", "application/json"),
+    "report.md": ("report", "text/markdown"),
+    "document.md": ("document", "text/markdown")
+}
+
+
+@app.route('/task/<task_id>/results/<file_name>', methods=['GET'])
+def get_task_result_file(task_id, file_name):
+    """
+    Endpoint para obter um arquivo de resultado (questions.json, report.md ou document.md).
+    
+    O arquivo é enviado diretamente do disco, sem ser lido para a memória, e a
+    resposta inclui ETag e Last-Modified para requisições condicionais.
+    """
+    if file_name not in RESULT_FILES:
+        return jsonify({"error": f"Arquivo {file_name} não disponível"}), 404
+    
+    # Carrega a tarefa
+    manager = get_manager(task_id)
+    if manager is None:
+        return jsonify({"error": f"Tarefa {task_id} não encontrada"}), 404
+    
+    if manager.current_task.status != "completed":
+        return jsonify({"error": "Tarefa ainda não concluída"}), 400
+    
+    key, mimetype = RESULT_FILES[file_name]
+    path = get_output_paths(task_id)[key]
+    if not path.is_file():
+        return jsonify({"error": f"Arquivo {file_name} não encontrado"}), 404
+    
+    return send_file(path, mimetype=mimetype, conditional=True)
+
+
+def run_pipeline(agent: ManagerAgent) -> Tuple[bool, str]:
+    """
+    Executa todos os agentes em sequência para a tarefa carregada no gerenciador.
+    
+    Args:
+        agent: Agente Gerenciador com a tarefa já carregada
+        
+    Returns:
+        Tupla (sucesso, mensagem)
+    """
+    # Executa os agentes salvando a tarefa uma única vez, ao final
+    with agent.deferred_saves():
+        # Executa o Agente Conteudista
+        success, message = agent.assign_to_content_agent()
+        if not success:
+            return False, f"Erro no Agente Conteudista: {message}"
+        
+        # Executa os Agentes RT e DE em paralelo
+        success, message = agent.assign_to_reviewers()
+        if not success:
+            return False, f"Erro nos Agentes RT e DE: {message}"
+        
+        # Executa o Agente Validador
+        success, message = agent.assign_to_validator_agent()
+        if not success:
+            return False, f"Erro no Agente Validador: {message}"
+    
+    return True, "Todos os agentes executados com sucesso"
+
+
+def run_all_stages(task_id: str) -> Optional[Tuple[bool, str, Dict[str, Any]]]:
+    """
+    Executa todos os agentes para uma tarefa e obtém os resultados.
+    
+    Requisições simultâneas (síncronas ou no modo batch) para a mesma tarefa
+    compartilham uma única execução.
+    
+    Args:
+        task_id: ID da tarefa
+        
+    Returns:
+        Tupla (sucesso, mensagem, resultados), ou None se a tarefa não for encontrada
+    """
+    def run() -> Optional[Tuple[bool, str, Dict[str, Any]]]:
+        with task_session(task_id) as manager:
+            if manager is None:
+                return None
+            success, message = run_pipeline(manager)
+            return success, message, manager.get_final_results() if success else {}
+    
+    return stage_flights.do((task_id, "run_all"), run)
+
+
+def mark_batch_finished(run: Future) -> None:
+    """
+    Registra o momento em que uma execução em segundo plano terminou.
+    
+    Args:
+        run: Execução concluída
+    """
+    run.finished_at = time.monotonic()
+    with batch_runs_lock:
+        prune_batch_runs()
+
+
+def prune_batch_runs() -> None:
+    """
+    Descarta as execuções em segundo plano concluídas há mais de
+    config.BATCH_RESULT_TTL segundos. Deve ser chamada com batch_runs_lock.
+    """
+    now = time.monotonic()
+    expired = [
+        task_id for task_id, run in batch_runs.items()
+        if run.done() and getattr(run, "finished_at", now) + config.BATCH_RESULT_TTL <= now
+    ]
+    for task_id in expired:
+        del batch_runs[task_id]
+
+
 @app.route('/task/<task_id>/run_all', methods=['POST'])
 def run_all_agents(task_id):
     """Endpoint para executar todos os agentes em sequência."""
-    # Carrega a tarefa
-    if not manager.load_task(task_id):
+    # No modo batch, a execução segue em segundo plano e o resultado é
+    # consultado em /task/<task_id>/batch_status
+    if request.args.get('mode') == 'batch':
+        if get_manager(task_id) is None:
+            return jsonify({"error": f"Tarefa {task_id} não encontrada"}), 404
+        
+        with batch_runs_lock:
+            prune_batch_runs()
+            run = batch_runs.get(task_id)
+            if run is not None and not run.done():
+                return jsonify({"error": f"Tarefa {task_id} já está em execução"}), 409
+            run = batch_pool.submit(run_all_stages, task_id)
+            batch_runs[task_id] = run
+        
+        # Fora da trava: se a execução já terminou, o callback roda nesta thread
+        run.add_done_callback(mark_batch_finished)
+        
+        return jsonify({
+            "task_id": task_id,
+            "status": "queued",
+            "message": "Execução iniciada em segundo plano"
+        }), 202
+    
+    # Carrega a tarefa, executa os agentes e obtém os resultados
+    result = run_all_stages(task_id)
+    if result is None:
         return jsonify({"error": f"Tarefa {task_id} não encontrada"}), 404
     
-    # Executa o Agente Conteudista
-    success, message = manager.assign_to_content_agent()
+    success, message, results = result
     if not success:
-        return jsonify({"error": f"Erro no Agente Conteudista: {message}"}), 500
+        return jsonify({"error": message}), 500
     
-    # Executa o Agente RT
-    success, message = manager.assign_to_rt_agent()
-    if not success:
-        return jsonify({"error": f"Erro no Agente RT: {message}"}), 500
+    return jsonify({
+        "task_id": task_id,
+        "status": "completed",
+        "message": message,
+        "results_path": {
+            "questions": results.get("questions_path"),
+            "report": results.get("report_path"),
+            "document": results.get("document_path")
+        }
+    })
+
+
+@app.route('/task/<task_id>/batch_status', methods=['GET'])
+def get_batch_status(task_id):
+    """Endpoint para consultar uma execução iniciada no modo batch."""
+    with batch_runs_lock:
+        prune_batch_runs()
+        run = batch_runs.get(task_id)
     
-    # Executa o Agente DE
-    success, message = manager.assign_to_de_agent()
-    if not success:
-        return jsonify({"error": f"Erro no Agente DE: {message}"}), 500
+    if run is None:
+        return jsonify({"error": f"Nenhuma execução em segundo plano para a tarefa {task_id}"}), 404
     
-    # Executa o Agente Validador
-    success, message = manager.assign_to_validator_agent()
-    if not success:
-        return jsonify({"error": f"Erro no Agente Validador: {message}"}), 500
+    if not run.done():
+        return jsonify({"task_id": task_id, "status": "running"})
     
-    # Obtém os resultados da tarefa
-    results = manager.get_final_results()
+    if run.exception() is not None:
+        return jsonify({"task_id": task_id, "status": "error", "error": str(run.exception())})
+    
+    result = run.result()
+    if result is None:
+        return jsonify({"error": f"Tarefa {task_id} não encontrada"}), 404
+    
+    success, message, results = result
+    if not success:
+        return jsonify({"task_id": task_id, "status": "error", "error": message})
     
     return jsonify({
         "task_id": task_id,
         "status": "completed",
-        "message": "Todos os agentes executados com sucesso",
+        "message": message,
         "results_path": {
             "questions": results.get("questions_path"),
             "report": results.get("report_path"),
@@ -226,6 +576,19 @@ def run_all_agents(task_id):
     })
 
 
+@app.errorhandler(RequestEntityTooLarge)
+def handle_upload_too_large(error):
+    """Responde em JSON quando o corpo da requisição excede MAX_CONTENT_LENGTH."""
+    limit_mb = config.MAX_UPLOAD_SIZE / (1024 * 1024)
+    return jsonify({"error": f"Arquivo excede o tamanho máximo de {limit_mb:g} MB"}), 413
+
+
+@app.errorhandler(AIClientError)
+def handle_ai_client_error(error):
+    """Responde em JSON quando a API de IA falha após esgotar as novas tentativas."""
+    return jsonify({"error": str(error)}), 502
+
+
 @app.route('/upload', methods=['POST'])
 def upload_files():
     """Endpoint para fazer upload de arquivos."""
@@ -237,9 +600,14 @@ def upload_files():
     if file.filename == '':
         return jsonify({"error": "Nome de arquivo vazio"}), 400
     
+    # Recusa tipos de arquivo não suportados antes de gravar no disco
+    extension = os.path.splitext(file.filename)[1].lower()
+    if extension not in config.UPLOAD_EXTENSIONS:
+        allowed = ", ".join(sorted(config.UPLOAD_EXTENSIONS))
+        return jsonify({"error": f"Tipo de arquivo não suportado: use {allowed}"}), 400
+    
     # Salva o arquivo no diretório de entrada
     file_path = os.path.join(config.INPUT_DIR, file.filename)
-    ensure_dir(config.INPUT_DIR)
     file.save(file_path)
     
     return jsonify({
@@ -249,11 +617,9 @@ def upload_files():
 
 
 if __name__ == '__main__':
-    # Garante que os diretórios necessários existem
-    ensure_dir(config.INPUT_DIR)
-    ensure_dir(config.OUTPUT_DIR)
-    ensure_dir(config.TEMPLATES_DIR)
-    
-    # Inicia a aplicação
-    app.run(host=config.HOST, port=config.PORT, debug=config.DEBUG)
+    # Inicia a aplicação (servidor de desenvolvimento; em produção, use
+    # gunicorn -c gunicorn.conf.py app:app). Cada requisição é atendida em uma
+    # thread própria, para que as chamadas à API de IA não bloqueiem as demais.
+    get_ai_client().warm_up()
+    app.run(host=config.HOST, port=config.PORT, debug=config.DEBUG, threaded=True)
 
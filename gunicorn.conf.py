@@ -0,0 +1,30 @@
+"""
+Configuração do Gunicorn para executar a aplicação em produção.
+
+Uso:
+    gunicorn -c gunicorn.conf.py app:app
+"""
+
+import config
+
+
+bind = f"{config.HOST}:{config.PORT}"
+
+# As requisições passam a maior parte do tempo aguardando a API de IA, então
+# threads bastam para sobrepor as chamadas. Um único processo mantém em memória
+# o estado das execuções em segundo plano (modo batch) e o agrupamento de
+# requisições simultâneas.
+workers = config.GUNICORN_WORKERS
+worker_class = "gthread"
+threads = config.GUNICORN_THREADS
+
+# Uma execução completa dos agentes pode levar vários minutos
+timeout = config.GUNICORN_TIMEOUT
+
+
+def post_worker_init(worker):
+    """
+    Abre as conexões com a API de IA assim que o worker inicia.
+    """
+    from utils.ai_client import get_ai_client
+    get_ai_client().warm_up()
@@ -2,16 +2,84 @@
 Modelo para representar questões educacionais.
 """
 
-import uuid
+import sys
+import json
+import os
+import hashlib
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
 
+# Esquema JSON de uma questão, usado para restringir a saída da API de IA
+_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "string"},
+        "text": {"type": "string"},
+        "correct": {"type": "boolean"}
+    },
+    "required": ["id", "text", "correct"]
+}
+
+QUESTION_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "objective_id": {"type": "string"},
+        "type": {"type": "string", "enum": ["single_answer", "multiple_answer", "assertion_reason"]},
+        "context": {"type": "string"},
+        "statement": {"type": "string"},
+        "assertions": {"type": "array", "items": _ITEM_SCHEMA},
+        "alternatives": {"type": "array", "items": _ITEM_SCHEMA},
+        "feedback": {"type": "object", "additionalProperties": {"type": "string"}}
+    },
+    "required": ["objective_id", "type", "context", "statement", "alternatives", "feedback"]
+}
+
+
+def _normalize_content(value: Any) -> Any:
+    """
+    Normaliza os textos de um valor JSON, ignorando espaçamento e maiúsculas/minúsculas.
+    
+    Args:
+        value: Valor a ser normalizado (texto, lista ou dicionário)
+        
+    Returns:
+        Valor com os textos normalizados
+    """
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, list):
+        return [_normalize_content(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _normalize_content(item) for key, item in value.items()}
+    return value
+
+
+def _intern(value: Any) -> Any:
+    """
+    Interna um texto, para que as comparações e buscas comparem ponteiros.
+    
+    Args:
+        value: Valor a ser internado (outros tipos são devolvidos sem alteração)
+        
+    Returns:
+        Texto internado ou o próprio valor
+    """
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+# Campos presentes em uma questão serializada por to_dict
+_SERIALIZED_FIELDS = frozenset(("id", "objective_id", "type", "context", "statement",
+                                "alternatives", "feedback", "metadata", "validation"))
+
+
 class Alternative:
     """
     Representa uma alternativa de resposta para uma questão.
     """
     
+    __slots__ = ("id", "text", "correct")
+    
     def __init__(self, id: str, text: str, correct: bool = False):
         """
         Inicializa uma nova alternativa.
@@ -61,6 +129,11 @@ class Question:
     Representa uma questão educacional.
     """
     
+    # Atributos fixos: sem __dict__ por instância, ocupam menos memória e o
+    # acesso é feito diretamente no slot
+    __slots__ = ("id", "objective_id", "type", "context", "statement", "alternatives",
+                 "feedback", "metadata", "validation")
+    
     def __init__(self, objective_id: str, question_type: str, context: str, 
                 statement: str, alternatives: List[Dict[str, Any]], feedback: Dict[str, str]):
         """
@@ -74,18 +147,20 @@ class Question:
             alternatives: Lista de alternativas
             feedback: Dicionário com feedback para cada alternativa
         """
-        self.id = str(uuid.uuid4())[:8]  # ID único para a questão
-        self.objective_id = objective_id
-        self.type = question_type
+        self.id = os.urandom(4).hex()  # ID único para a questão (8 caracteres hexadecimais)
+        # IDs internados: as comparações e buscas por objetivo comparam ponteiros
+        self.objective_id = _intern(objective_id)
+        self.type = _intern(question_type)
         self.context = context
         self.statement = statement
         self.alternatives = alternatives
         self.feedback = feedback
+        now = datetime.now().isoformat()
         self.metadata = {
             "created_by": "content_agent",
             "last_modified_by": "content_agent",
-            "creation_date": datetime.now().isoformat(),
-            "last_modified": datetime.now().isoformat()
+            "creation_date": now,
+            "last_modified": now
         }
         self.validation = {
             "rt": None,
@@ -112,6 +187,27 @@ class Question:
             "validation": self.validation
         }
     
+    def fingerprint(self, normalize: bool = False) -> str:
+        """
+        Calcula um hash do conteúdo da questão.
+        
+        Considera apenas o conteúdo (objetivo, tipo, textos, alternativas e
+        feedback), de modo que questões com o mesmo conteúdo têm o mesmo hash
+        independentemente do ID, dos metadados e das validações.
+        
+        Args:
+            normalize: Se True, ignora diferenças de espaçamento e de maiúsculas/minúsculas,
+                comuns entre questões regeneradas
+        
+        Returns:
+            Hash hexadecimal do conteúdo
+        """
+        content = [self.objective_id, self.type, self.context, self.statement, self.alternatives, self.feedback]
+        if normalize:
+            content = _normalize_content(content)
+        content = json.dumps(content, ensure_ascii=False, sort_keys=True)
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Question':
         """
@@ -123,28 +219,46 @@ class Question:
         Returns:
             Objeto Question
         """
-        question = cls(
-            objective_id=data["objective_id"],
-            question_type=data["type"],
-            context=data["context"],
-            statement=data["statement"],
-            alternatives=data["alternatives"],
-            feedback=data["feedback"]
-        )
-        question.id = data.get("id", question.id)
-        question.metadata = data.get("metadata", question.metadata)
-        question.validation = data.get("validation", question.validation)
+        if not _SERIALIZED_FIELDS.issubset(data):
+            # Dados parciais (como as questões geradas pela IA): o construtor
+            # preenche o ID, os metadados e as validações ausentes
+            question = cls(
+                objective_id=data["objective_id"],
+                question_type=data["type"],
+                context=data["context"],
+                statement=data["statement"],
+                alternatives=data["alternatives"],
+                feedback=data["feedback"]
+            )
+            question.id = data.get("id", question.id)
+            question.metadata = data.get("metadata", question.metadata)
+            question.validation = data.get("validation", question.validation)
+            return question
+        
+        # Questão salva: atribui os campos diretamente, sem gerar um ID e
+        # metadados que seriam descartados em seguida
+        question = cls.__new__(cls)
+        question.id = data["id"]
+        question.objective_id = _intern(data["objective_id"])
+        question.type = _intern(data["type"])
+        question.context = data["context"]
+        question.statement = data["statement"]
+        question.alternatives = data["alternatives"]
+        question.feedback = data["feedback"]
+        question.metadata = data["metadata"]
+        question.validation = data["validation"]
         return question
     
-    def update_metadata(self, modified_by: str) -> None:
+    def update_metadata(self, modified_by: str, timestamp: Optional[str] = None) -> None:
         """
         Atualiza os metadados da questão.
         
         Args:
             modified_by: Nome do agente que modificou a questão
+            timestamp: Data da modificação em formato ISO (padrão: agora)
         """
         self.metadata["last_modified_by"] = modified_by
-        self.metadata["last_modified"] = datetime.now().isoformat()
+        self.metadata["last_modified"] = timestamp or datetime.now().isoformat()
     
     def add_validation(self, validation_type: str, status: str, comments: str, 
                       checklist: Optional[Dict[str, Any]] = None) -> None:
@@ -157,13 +271,14 @@ class Question:
             comments: Comentários sobre a validação
             checklist: Dicionário com os itens do checklist
         """
+        now = datetime.now().isoformat()
         self.validation[validation_type] = {
             "status": status,
             "comments": comments,
             "checklist": checklist or {},
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now
         }
-        self.update_metadata(f"{validation_type}_agent")
+        self.update_metadata(f"{validation_type}_agent", now)
     
     def to_markdown(self) -> str:
         """
@@ -172,18 +287,13 @@ class Question:
         Returns:
             String em formato Markdown
         """
-        md = f"## {self.objective_id}\n\n"
+        header = f"## {self.objective_id}\n\n"
         
-        if self.type == "single_answer":
-            md += self._single_answer_to_markdown()
-        elif self.type == "multiple_answer":
-            md += self._multiple_answer_to_markdown()
-        elif self.type == "assertion_reason":
-            md += self._assertion_reason_to_markdown()
-        else:
-            md += f"**Tipo não suportado:** {self.type}\n\n"
+        renderer = _MARKDOWN_RENDERERS.get(self.type)
+        if renderer is None:
+            return header + f"**Tipo não suportado:** {self.type}\n\n"
         
-        return md
+        return header + renderer(self)
     
     def _single_answer_to_markdown(self) -> str:
         """
@@ -192,19 +302,19 @@ class Question:
         Returns:
             String em formato Markdown
         """
-        md = "### Questão (Resposta Única)\n\n"
-        md += f"**Contextualização:**\n{self.context}\n\n"
-        md += f"**Enunciado:**\n{self.statement}\n\n"
+        parts = ["### Questão (Resposta Única)\n\n"]
+        parts.append(f"**Contextualização:**\n{self.context}\n\n")
+        parts.append(f"**Enunciado:**\n{self.statement}\n\n")
         
-        md += "**Alternativas:**\n"
+        parts.append("**Alternativas:**\n")
         for alt in self.alternatives:
-            md += f"{alt['id']}) {alt['text']}\n"
+            parts.append(f"{alt['id']}) {alt['text']}\n")
         
-        md += "\n**Feedback:**\n"
+        parts.append("\n**Feedback:**\n")
         for alt_id, feedback in self.feedback.items():
-            md += f"{alt_id}) {feedback}\n"
+            parts.append(f"{alt_id}) {feedback}\n")
         
-        return md
+        return "".join(parts)
     
     def _multiple_answer_to_markdown(self) -> str:
         """
@@ -213,28 +323,29 @@ class Question:
         Returns:
             String em formato Markdown
         """
-        md = "### Questão (Resposta Múltipla)\n\n"
-        md += f"**Contextualização:**\n{self.context}\n\n"
-        md += f"**Enunciado:**\n{self.statement}\n\n"
+        parts = ["### Questão (Resposta Múltipla)\n\n"]
+        parts.append(f"**Contextualização:**\n{self.context}\n\n")
+        parts.append(f"**Enunciado:**\n{self.statement}\n\n")
         
-        md += "**Afirmativas:**\n"
-        for i, alt in enumerate(self.alternatives, 1):
-            if alt['id'].isdigit():
-                md += f"{alt['id']}. {alt['text']}\n"
-            else:
-                md += f"{i}. {alt['text']}\n"
+        parts.append("**Afirmativas:**\n")
+        # Numera as afirmativas pelo próprio ID quando todos são numéricos;
+        # caso contrário, pela posição
+        if all(alt['id'].isdigit() for alt in self.alternatives):
+            parts.extend(f"{alt['id']}. {alt['text']}\n" for alt in self.alternatives)
+        else:
+            parts.extend(f"{i}. {alt['text']}\n" for i, alt in enumerate(self.alternatives, 1))
         
-        md += "\n**É correto apenas o que se afirma em:**\n"
+        parts.append("\n**É correto apenas o que se afirma em:**\n")
         # Aqui assumimos que as alternativas são as opções de resposta
         # e não as afirmativas em si
         for alt in self.alternatives:
-            md += f"{alt['id']}) {alt['text']}\n"
+            parts.append(f"{alt['id']}) {alt['text']}\n")
         
-        md += "\n**Feedback:**\n"
+        parts.append("\n**Feedback:**\n")
         for alt_id, feedback in self.feedback.items():
-            md += f"{alt_id}) {feedback}\n"
+            parts.append(f"{alt_id}) {feedback}\n")
         
-        return md
+        return "".join(parts)
     
     def _assertion_reason_to_markdown(self) -> str:
         """
@@ -243,25 +354,32 @@ class Question:
         Returns:
             String em formato Markdown
         """
-        md = "### Questão (Asserção-Razão)\n\n"
-        md += f"**Contextualização:**\n{self.context}\n\n"
-        md += f"**Enunciado:**\n{self.statement}\n\n"
+        parts = ["### Questão (Asserção-Razão)\n\n"]
+        parts.append(f"**Contextualização:**\n{self.context}\n\n")
+        parts.append(f"**Enunciado:**\n{self.statement}\n\n")
         
         # Assumimos que as duas primeiras alternativas são as asserções
         if len(self.alternatives) >= 2:
-            md += "**Asserção I:**\n"
-            md += f"{self.alternatives[0]['text']}\n\n"
-            md += "**PORQUE**\n\n"
-            md += "**Asserção II:**\n"
-            md += f"{self.alternatives[1]['text']}\n\n"
+            parts.append("**Asserção I:**\n")
+            parts.append(f"{self.alternatives[0]['text']}\n\n")
+            parts.append("**PORQUE**\n\n")
+            parts.append("**Asserção II:**\n")
+            parts.append(f"{self.alternatives[1]['text']}\n\n")
         
-        md += "**A respeito dessas asserções, assinale a opção correta:**\n"
+        parts.append("**A respeito dessas asserções, assinale a opção correta:**\n")
         for alt in self.alternatives:
-            md += f"{alt['id']}) {alt['text']}\n"
+            parts.append(f"{alt['id']}) {alt['text']}\n")
         
-        md += "\n**Feedback:**\n"
+        parts.append("\n**Feedback:**\n")
         for alt_id, feedback in self.feedback.items():
-            md += f"{alt_id}) {feedback}\n"
+            parts.append(f"{alt_id}) {feedback}\n")
         
-        return md
+        return "".join(parts)
+
 
+# Função de conversão para Markdown de cada tipo de questão
+_MARKDOWN_RENDERERS = {
+    "single_answer": Question._single_answer_to_markdown,
+    "multiple_answer": Question._multiple_answer_to_markdown,
+    "assertion_reason": Question._assertion_reason_to_markdown
+}
@@ -2,17 +2,34 @@
 Modelo para representar relatórios.
 """
 
-import uuid
+import os
 import json
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
+from models.question import QUESTION_JSON_SCHEMA
+
+
+# Esquema da resposta estruturada do Agente Validador: questões validadas e as
+# duas seções em Markdown, sem blocos de código a serem localizados no texto
+VALIDATION_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "questions": {"type": "array", "items": QUESTION_JSON_SCHEMA},
+        "development_report": {"type": "string"},
+        "final_document": {"type": "string"}
+    },
+    "required": ["questions", "development_report", "final_document"]
+}
+
 
 class Report:
     """
     Representa um relatório gerado durante o processo.
     """
     
+    __slots__ = ("id", "type", "creation_date", "agent", "content")
+    
     def __init__(self, report_type: str, agent: str, content: Dict[str, Any]):
         """
         Inicializa um novo relatório.
@@ -22,7 +39,7 @@ class Report:
             agent: Nome do agente que gerou o relatório
             content: Conteúdo do relatório
         """
-        self.id = str(uuid.uuid4())[:8]  # ID único para o relatório
+        self.id = os.urandom(4).hex()  # ID único para o relatório (8 caracteres hexadecimais)
         self.type = report_type
         self.creation_date = datetime.now().isoformat()
         self.agent = agent
@@ -54,13 +71,23 @@ class Report:
         Returns:
             Objeto Report
         """
-        report = cls(
-            report_type=data["type"],
-            agent=data["agent"],
-            content=data["content"]
-        )
-        report.id = data.get("id", report.id)
-        report.creation_date = data.get("creation_date", report.creation_date)
+        if "id" not in data or "creation_date" not in data:
+            report = cls(
+                report_type=data["type"],
+                agent=data["agent"],
+                content=data["content"]
+            )
+            report.id = data.get("id", report.id)
+            report.creation_date = data.get("creation_date", report.creation_date)
+            return report
+        
+        # Relatório salvo: atribui os campos diretamente, sem gerar ID e data
+        report = cls.__new__(cls)
+        report.id = data["id"]
+        report.type = data["type"]
+        report.creation_date = data["creation_date"]
+        report.agent = data["agent"]
+        report.content = data["content"]
         return report
     
     def to_markdown(self) -> str:
@@ -70,12 +97,11 @@ class Report:
         Returns:
             String em formato Markdown
         """
-        if self.type == "development_report":
-            return self._development_report_to_markdown()
-        elif self.type == "validation_report":
-            return self._validation_report_to_markdown()
-        else:
+        renderer = _MARKDOWN_RENDERERS.get(self.type)
+        if renderer is None:
             return f"# Relatório {self.id}\n\n{json.dumps(self.content, indent=2)}"
+        
+        return renderer(self)
     
     def _development_report_to_markdown(self) -> str:
         """
@@ -84,24 +110,24 @@ class Report:
         Returns:
             String em formato Markdown
         """
-        md = f"# Relatório de Desenvolvimento\n\n"
-        md += f"**ID:** {self.id}\n"
-        md += f"**Data:** {self.creation_date}\n"
-        md += f"**Agente:** {self.agent}\n\n"
+        parts = [f"# Relatório de Desenvolvimento\n\n"]
+        parts.append(f"**ID:** {self.id}\n")
+        parts.append(f"**Data:** {self.creation_date}\n")
+        parts.append(f"**Agente:** {self.agent}\n\n")
         
-        md += f"## Resumo\n\n{self.content.get('summary', '')}\n\n"
+        parts.append(f"## Resumo\n\n{self.content.get('summary', '')}\n\n")
         
-        md += "## Etapas do Processo\n\n"
+        parts.append("## Etapas do Processo\n\n")
         for step in self.content.get("steps", []):
-            md += f"### {step['agent']}\n\n"
-            md += f"{step['description']}\n\n"
-            md += f"**Observações:** {step['observations']}\n\n"
+            parts.append(f"### {step['agent']}\n\n")
+            parts.append(f"{step['description']}\n\n")
+            parts.append(f"**Observações:** {step['observations']}\n\n")
         
-        md += "## Recomendações para Melhoria do Prompt\n\n"
+        parts.append("## Recomendações para Melhoria do Prompt\n\n")
         for i, rec in enumerate(self.content.get("recommendations", []), 1):
-            md += f"{i}. {rec}\n"
+            parts.append(f"{i}. {rec}\n")
         
-        return md
+        return "".join(parts)
     
     def _validation_report_to_markdown(self) -> str:
         """
@@ -110,27 +136,34 @@ class Report:
         Returns:
             String em formato Markdown
         """
-        md = f"# Relatório de Validação\n\n"
-        md += f"**ID:** {self.id}\n"
-        md += f"**Data:** {self.creation_date}\n"
-        md += f"**Agente:** {self.agent}\n\n"
+        parts = [f"# Relatório de Validação\n\n"]
+        parts.append(f"**ID:** {self.id}\n")
+        parts.append(f"**Data:** {self.creation_date}\n")
+        parts.append(f"**Agente:** {self.agent}\n\n")
         
-        md += f"## Resumo\n\n{self.content.get('summary', '')}\n\n"
+        parts.append(f"## Resumo\n\n{self.content.get('summary', '')}\n\n")
         
-        md += "## Resultados da Validação\n\n"
+        parts.append("## Resultados da Validação\n\n")
         for result in self.content.get("results", []):
-            md += f"### Questão {result['question_id']}\n\n"
-            md += f"**Status:** {result['status']}\n\n"
-            md += f"**Comentários:** {result['comments']}\n\n"
+            parts.append(f"### Questão {result['question_id']}\n\n")
+            parts.append(f"**Status:** {result['status']}\n\n")
+            parts.append(f"**Comentários:** {result['comments']}\n\n")
             
             if "checklist" in result:
-                md += "#### Checklist\n\n"
+                parts.append("#### Checklist\n\n")
                 for item, value in result["checklist"].items():
-                    md += f"- {item}: {value}\n"
+                    parts.append(f"- {item}: {value}\n")
             
-            md += "\n"
+            parts.append("\n")
         
-        return md
+        return "".join(parts)
+
+
+# Função de conversão para Markdown de cada tipo de relatório
+_MARKDOWN_RENDERERS = {
+    "development_report": Report._development_report_to_markdown,
+    "validation_report": Report._validation_report_to_markdown
+}
 
 
 class Checklist:
@@ -138,6 +171,8 @@ class Checklist:
     Representa um checklist de validação.
     """
     
+    __slots__ = ("type", "items")
+    
     def __init__(self, checklist_type: str, items: Dict[str, Any]):
         """
         Inicializa um novo checklist.
@@ -184,8 +219,8 @@ class Checklist:
         Returns:
             String em formato Markdown
         """
-        md = "| Nº | Item | Sim | Não | NA | Observação |\n"
-        md += "|---|---|---|---|---|---|\n"
+        parts = ["| Nº | Item | Sim | Não | NA | Observação |\n"]
+        parts.append("|---|---|---|---|---|---|\n")
         
         for i, (key, value) in enumerate(self.items.items(), 1):
             item_text = key
@@ -194,7 +229,7 @@ class Checklist:
             na = "✓" if value.get("result") == "na" else ""
             obs = value.get("observation", "")
             
-            md += f"| {i} | {item_text} | {yes} | {no} | {na} | {obs} |\n"
+            parts.append(f"| {i} | {item_text} | {yes} | {no} | {na} | {obs} |\n")
         
-        return md
+        return "".join(parts)
 
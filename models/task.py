@@ -2,8 +2,11 @@
 Modelo para representar tarefas.
 """
 
-import uuid
+import json
+import os
+from collections import defaultdict
 from datetime import datetime
+from functools import cached_property
 from typing import Dict, Any, List, Optional
 
 from models.question import Question
@@ -25,21 +28,48 @@ class Task:
             templates: Dicionário com templates para os diferentes tipos de questão
             stopwords: Lista de palavras a serem evitadas
         """
-        self.id = str(uuid.uuid4())[:8]  # ID único para a tarefa
+        self.id = os.urandom(4).hex()  # ID único para a tarefa (8 caracteres hexadecimais)
         self.creation_date = datetime.now().isoformat()
         self.objectives = objectives
         self.theory_text = theory_text
         self.templates = templates
         self.stopwords = stopwords
         self.questions = []
+        self._questions_by_objective = defaultdict(list)  # Índice das questões por objetivo
         self.reports = []
+        self._reports_by_type = {}  # Primeiro relatório de cada tipo
         self.status = "created"  # created, in_progress, completed
         self.current_agent = None
+        self.dirty = True  # Indica alterações ainda não salvas
     
-    def to_dict(self) -> Dict[str, Any]:
+    @cached_property
+    def objectives_text(self) -> str:
+        """
+        Objetivos de aprendizagem, um por linha, no formato usado nos prompts.
+        """
+        return "\n".join(self.objectives)
+    
+    @cached_property
+    def stopwords_text(self) -> str:
+        """
+        Stopwords separadas por vírgula, no formato usado nos prompts.
+        """
+        return ", ".join(self.stopwords)
+    
+    @cached_property
+    def templates_json(self) -> str:
+        """
+        Templates de questões serializados em JSON, no formato usado nos prompts.
+        """
+        return json.dumps(self.templates, ensure_ascii=False, separators=(",", ":"))
+    
+    def to_dict(self, questions_dicts: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         Converte a tarefa para um dicionário.
         
+        Args:
+            questions_dicts: Dicionários das questões já calculados, para evitar convertê-las de novo
+            
         Returns:
             Dicionário representando a tarefa
         """
@@ -50,8 +80,8 @@ class Task:
             "theory_text": self.theory_text,
             "templates": self.templates,
             "stopwords": self.stopwords,
-            "questions": [q.to_dict() for q in self.questions],
-            "reports": [r.to_dict() for r in self.reports],
+            "questions": questions_dicts if questions_dicts is not None else list(map(Question.to_dict, self.questions)),
+            "reports": list(map(Report.to_dict, self.reports)),
             "status": self.status,
             "current_agent": self.current_agent
         }
@@ -75,10 +105,15 @@ class Task:
         )
         task.id = data.get("id", task.id)
         task.creation_date = data.get("creation_date", task.creation_date)
-        task.questions = [Question.from_dict(q) for q in data.get("questions", [])]
-        task.reports = [Report.from_dict(r) for r in data.get("reports", [])]
+        task.questions = list(map(Question.from_dict, data.get("questions", [])))
+        for question in task.questions:
+            task._questions_by_objective[question.objective_id].append(question)
+        task.reports = list(map(Report.from_dict, data.get("reports", [])))
+        for report in task.reports:
+            task._reports_by_type.setdefault(report.type, report)
         task.status = data.get("status", task.status)
         task.current_agent = data.get("current_agent", task.current_agent)
+        task.dirty = False
         return task
     
     def add_question(self, question: Question) -> None:
@@ -89,6 +124,31 @@ class Task:
             question: Objeto Question a ser adicionado
         """
         self.questions.append(question)
+        self._questions_by_objective[question.objective_id].append(question)
+        self.dirty = True
+    
+    def replace_question(self, index: int, question: Question) -> None:
+        """
+        Substitui uma questão da tarefa, mantendo o índice por objetivo atualizado.
+        
+        Args:
+            index: Posição da questão a ser substituída
+            question: Nova questão
+        """
+        old_question = self.questions[index]
+        self.questions[index] = question
+        
+        old_bucket = self._questions_by_objective[old_question.objective_id]
+        if question.objective_id == old_question.objective_id:
+            old_bucket[old_bucket.index(old_question)] = question
+        else:
+            old_bucket.remove(old_question)
+            # Reconstrói a lista do novo objetivo para manter a ordem da tarefa
+            self._questions_by_objective[question.objective_id] = [
+                q for q in self.questions if q.objective_id == question.objective_id
+            ]
+        
+        self.dirty = True
     
     def add_report(self, report: Report) -> None:
         """
@@ -98,6 +158,8 @@ class Task:
             report: Objeto Report a ser adicionado
         """
         self.reports.append(report)
+        self._reports_by_type.setdefault(report.type, report)
+        self.dirty = True
     
     def update_status(self, status: str, agent: Optional[str] = None) -> None:
         """
@@ -109,6 +171,7 @@ class Task:
         """
         self.status = status
         self.current_agent = agent
+        self.dirty = True
     
     def get_questions_for_objective(self, objective_id: str) -> List[Question]:
         """
@@ -120,7 +183,7 @@ class Task:
         Returns:
             Lista de questões associadas ao objetivo
         """
-        return [q for q in self.questions if q.objective_id == objective_id]
+        return list(self._questions_by_objective.get(objective_id, ()))
     
     def get_report_by_type(self, report_type: str) -> Optional[Report]:
         """
@@ -132,8 +195,5 @@ class Task:
         Returns:
             Relatório do tipo especificado, ou None se não existir
         """
-        for report in self.reports:
-            if report.type == report_type:
-                return report
-        return None
+        return self._reports_by_type.get(report_type)
 
@@ -0,0 +1,238 @@
+"""
+Testes para o cliente de API de IA.
+"""
+
+import io
+import sys
+import os
+import time
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+# Adiciona o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+
+from utils import ai_client
+from utils.ai_client import AIClient, AIClientError, _IN_FLIGHT, _RESPONSE_CACHE
+
+
+def make_response(status_code, headers=None):
+    """
+    Cria uma resposta HTTP simulada.
+    """
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+class TestAIClient(unittest.TestCase):
+    """
+    Testes para o cliente de API de IA.
+    """
+    
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+        """
+        self.client = AIClient()
+        self.client.session = MagicMock()
+        _RESPONSE_CACHE.clear()
+        self.addCleanup(_RESPONSE_CACHE.clear)
+    
+    @patch('utils.ai_client.time.sleep')
+    def test_post_retries_transient_errors(self, mock_sleep):
+        """
+        Testa se falhas transitórias são repetidas, respeitando o Retry-After.
+        """
+        ok = make_response(200)
+        self.client.session.post.side_effect = [
+            make_response(429, {"Retry-After": "3"}),
+            requests.exceptions.ConnectionError(),
+            ok
+        ]
+        
+        response = self.client._post("http://api")
+        
+        self.assertIs(response, ok)
+        self.assertEqual(self.client.session.post.call_count, 3)
+        self.assertEqual(mock_sleep.call_args_list[0].args, (3.0,))
+        self.assertLessEqual(mock_sleep.call_args_list[1].args[0], 2)
+    
+    @patch('utils.ai_client.time.sleep')
+    def test_post_does_not_retry_client_errors(self, mock_sleep):
+        """
+        Testa se erros que não são transitórios são devolvidos sem nova tentativa.
+        """
+        self.client.session.post.return_value = make_response(401)
+        
+        response = self.client._post("http://api")
+        
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.client.session.post.call_count, 1)
+        mock_sleep.assert_not_called()
+    
+    def test_generate_text_raises_on_api_error(self):
+        """
+        Testa se falhas da API são propagadas, exceto no modo de respostas simuladas.
+        """
+        with patch.object(self.client, '_post', side_effect=requests.exceptions.ConnectionError()):
+            with patch('config.AI_MOCK_ON_ERROR', False):
+                with self.assertRaises(AIClientError):
+                    self.client.generate_text("Você é um Revisor Técnico")
+            
+            with patch('config.AI_MOCK_ON_ERROR', True):
+                response = self.client.generate_text("Você é um Revisor Técnico")
+        
+        self.assertEqual(response, self.client._get_mock_rt_response())
+    
+    @patch('config.AI_TEMPERATURE', 0.0)
+    @patch('config.AI_MOCK_ON_ERROR', True)
+    def test_generate_text_caches_api_responses(self):
+        """
+        Testa se prompts idênticos reaproveitam a resposta da API, mas não a simulada.
+        """
+        api_response = {"choices": [{"message": {"content": "ok"}}]}
+        
+        with patch.object(self.client, '_post', side_effect=requests.exceptions.ConnectionError()):
+            self.client.generate_text("prompt")
+        
+        response = make_response(200)
+        response.json.return_value = api_response
+        with patch.object(self.client, '_post', return_value=response) as mock_post:
+            # A resposta simulada do erro anterior não foi armazenada
+            self.assertEqual(self.client.generate_text("prompt"), api_response)
+            self.assertEqual(self.client.generate_text("prompt"), api_response)
+            self.client.generate_text("prompt", max_tokens=100)
+        
+        self.assertEqual(mock_post.call_count, 2)
+    
+    @patch('config.AI_TEMPERATURE', 0.0)
+    def test_generate_text_cache_expires_and_can_be_skipped(self):
+        """
+        Testa se as respostas em cache expiram e se cache=False sempre chama a API.
+        """
+        response = make_response(200)
+        response.json.return_value = {"choices": [{"message": {"content": "ok"}}]}
+        
+        with patch.object(self.client, '_post', return_value=response) as mock_post:
+            self.client.generate_text("prompt")
+            self.client.generate_text("prompt", cache=False)
+            self.assertEqual(mock_post.call_count, 2)
+            
+            # A resposta armazenada deixa de valer após o tempo de validade
+            self.client.generate_text("prompt")
+            with patch('utils.cache.time.monotonic', return_value=time.monotonic() + _RESPONSE_CACHE.ttl):
+                self.client.generate_text("prompt")
+        
+        self.assertEqual(mock_post.call_count, 3)
+    
+    @patch('config.AI_TEMPERATURE', 0.7)
+    def test_generate_text_skips_cache_for_sampled_responses(self):
+        """
+        Testa se, com temperatura alta, prompts idênticos sempre chamam a API.
+        """
+        response = make_response(200)
+        response.json.return_value = {"choices": [{"message": {"content": "ok"}}]}
+        
+        with patch.object(self.client, '_post', return_value=response) as mock_post:
+            self.client.generate_text("prompt")
+            self.client.generate_text("prompt")
+        
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(len(_RESPONSE_CACHE), 0)
+    
+    @patch('config.AI_TEMPERATURE', 0.0)
+    def test_generate_text_coalesces_concurrent_calls(self):
+        """
+        Testa se chamadas simultâneas com o mesmo prompt fazem uma única requisição.
+        """
+        release = threading.Event()
+        api_response = {"choices": [{"message": {"content": "ok"}}]}
+        
+        def slow_generate(prompt, max_tokens, json_schema):
+            release.wait(timeout=5)
+            return api_response
+        
+        with patch.object(self.client, '_generate', side_effect=slow_generate) as mock_generate:
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = [executor.submit(self.client.generate_text, "prompt") for _ in range(3)]
+                # Aguarda as três chamadas chegarem ao agrupador antes de liberar a requisição
+                while len(_IN_FLIGHT) == 0 or mock_generate.call_count == 0:
+                    time.sleep(0.01)
+                time.sleep(0.05)
+                release.set()
+                results = [future.result() for future in futures]
+        
+        self.assertEqual(results, [api_response] * 3)
+        self.assertEqual(mock_generate.call_count, 1)
+    
+    def test_requests_rotate_between_endpoints(self):
+        """
+        Testa se as requisições são distribuídas entre as chaves de API em rodízio.
+        """
+        with patch('config.DEEPSEEK_API_KEYS', ["key-1", "key-2"]):
+            client = AIClient()
+        
+        response = make_response(200)
+        response.json.return_value = {"choices": [{"message": {"content": "ok"}}]}
+        with patch.object(client, '_post', return_value=response) as mock_post:
+            for prompt in ("a", "b", "c"):
+                client.generate_text(prompt)
+        
+        keys = [call.kwargs["headers"]["Authorization"] for call in mock_post.call_args_list]
+        self.assertEqual(keys, ["Bearer key-1", "Bearer key-2", "Bearer key-1"])
+
+    
+    @patch('utils.ai_client._CONCURRENCY', threading.BoundedSemaphore(1))
+    def test_stream_holds_concurrency_permit_until_closed(self):
+        """
+        Testa se a vaga de concorrência fica ocupada enquanto o streaming é lido
+        e é liberada quando o iterador é fechado.
+        """
+        response = requests.models.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(b'data: {"choices": [{"delta": {"content": "a"}}]}\n'
+                                  b'data: {"choices": [{"delta": {"content": "b"}}]}\n')
+        self.client.session.post.return_value = response
+        
+        stream = self.client._generate_text_stream_deepseek("prompt")
+        self.assertEqual(next(stream), "a")
+        self.assertFalse(ai_client._CONCURRENCY.acquire(blocking=False))
+        
+        stream.close()
+        self.assertTrue(ai_client._CONCURRENCY.acquire(blocking=False))
+        ai_client._CONCURRENCY.release()
+    
+    def test_agent_prompts_end_with_task_data(self):
+        """
+        Testa se os prompts começam pela parte fixa e terminam com os dados da tarefa,
+        de modo que prompts de tarefas diferentes compartilham o mesmo prefixo.
+        """
+        task_data = {
+            "objectives": "OBJETIVOS_DA_TAREFA",
+            "theory": "TEORIA_DA_TAREFA",
+            "template": "TEMPLATE",
+            "stopwords": "PALAVRAS",
+            "questions": "QUESTOES_DA_TAREFA",
+            "rt_checklist": "CHECKLIST",
+            "de_checklist": "CHECKLIST"
+        }
+        fixed = {"content": ["TEMPLATE", "PALAVRAS"], "rt": ["CHECKLIST", "PALAVRAS"],
+                 "de": ["CHECKLIST", "PALAVRAS"], "validator": ["INSTRUÇÕES"]}
+        
+        for agent_type, fixed_parts in fixed.items():
+            with self.subTest(agent_type=agent_type):
+                prompt = self.client.create_agent_prompt(agent_type, task_data)
+                first_task_data = min(prompt.find(value) for value in
+                                      ("OBJETIVOS_DA_TAREFA", "TEORIA_DA_TAREFA", "QUESTOES_DA_TAREFA")
+                                      if value in prompt)
+                for part in fixed_parts:
+                    self.assertLess(prompt.index(part), first_task_data)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,8 +4,14 @@ Testes para a API REST.
 
 import sys
 import os
+import io
 import json
+import time
+import tempfile
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from unittest.mock import patch, MagicMock
 
 # Adiciona o diretório raiz ao path para importar os módulos
@@ -26,9 +32,15 @@ class TestAPI(unittest.TestCase):
         app.app.testing = True
         self.client = app.app.test_client()
         
-        # Mock para o Agente Gerenciador
+        # Mock para o Agente Gerenciador, criado para cada tarefa
         self.manager_mock = MagicMock()
-        app.manager = self.manager_mock
+        patcher = patch('app.ManagerAgent', return_value=self.manager_mock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        # Cada teste começa e termina com o registro de tarefas vazio
+        app.task_managers.clear()
+        self.addCleanup(app.task_managers.clear)
     
     def test_health_check(self):
         """
@@ -114,6 +126,23 @@ class TestAPI(unittest.TestCase):
         self.manager_mock.load_task.assert_called_once_with("12345678")
         self.manager_mock.get_task_status.assert_called_once()
     
+    def test_task_manager_is_reused(self):
+        """
+        Testa se a tarefa é carregada do disco uma única vez e o gerenciador reutilizado.
+        """
+        # Configura o mock para retornar valores simulados
+        self.manager_mock.load_task.return_value = True
+        self.manager_mock.get_task_status.return_value = {"task_id": "12345678", "status": "created"}
+        self.manager_mock.assign_to_content_agent.return_value = (True, "Criadas 1 questões")
+        
+        # Executa as requisições
+        self.client.get('/task/12345678')
+        self.client.post('/task/12345678/content')
+        
+        # Verifica os resultados
+        self.manager_mock.load_task.assert_called_once_with("12345678")
+        self.assertIs(app.task_managers.get("12345678"), self.manager_mock)
+    
     def test_get_task_status_not_found(self):
         """
         Testa o endpoint de obtenção do status da tarefa quando a tarefa não existe.
@@ -166,6 +195,231 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 500)
         self.assertEqual(result["error"], "Erro ao criar questões")
 
+    
+    def test_stages_of_same_task_run_one_at_a_time(self):
+        """
+        Testa se etapas diferentes da mesma tarefa não são executadas em paralelo.
+        """
+        running = []
+        overlaps = []
+        
+        def stage():
+            running.append(1)
+            overlaps.append(len(running))
+            time.sleep(0.05)
+            running.pop()
+            return True, "ok"
+        
+        self.manager_mock.load_task.return_value = True
+        self.manager_mock.assign_to_rt_agent.side_effect = stage
+        self.manager_mock.assign_to_de_agent.side_effect = stage
+        
+        # Executa as duas etapas em requisições simultâneas
+        def post(stage_name):
+            return app.app.test_client().post(f'/task/12345678/{stage_name}')
+        
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            responses = list(executor.map(post, ["rt", "de"]))
+        
+        self.assertEqual([response.status_code for response in responses], [200, 200])
+        self.assertEqual(overlaps, [1, 1])
+    
+    def test_running_stage_keeps_its_manager(self):
+        """
+        Testa se uma tarefa com uma etapa em execução não é carregada de novo
+        quando o seu gerenciador é descartado do LRU.
+        """
+        started = threading.Event()
+        release = threading.Event()
+        
+        def stage():
+            started.set()
+            release.wait(timeout=5)
+            return True, "ok"
+        
+        self.manager_mock.load_task.return_value = True
+        self.manager_mock.get_task_status.return_value = {"status": "in_progress"}
+        self.manager_mock.assign_to_rt_agent.side_effect = stage
+        
+        with patch('app.ManagerAgent', return_value=self.manager_mock) as manager_class:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                running = executor.submit(app.app.test_client().post, '/task/12345678/rt')
+                started.wait(timeout=5)
+                
+                # Descarta o gerenciador do LRU durante a etapa
+                app.task_managers.clear()
+                response = self.client.get('/task/12345678')
+                release.set()
+                self.assertEqual(running.result(timeout=5).status_code, 200)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(manager_class.call_count, 1)
+        self.assertIs(app.task_managers.get("12345678"), self.manager_mock)
+        self.assertEqual(app.active_managers, {})
+    
+    def test_run_all_batch_mode(self):
+        """
+        Testa a execução de todos os agentes em segundo plano (modo batch).
+        """
+        # Configura o mock para retornar valores simulados
+        self.manager_mock.load_task.return_value = True
+        self.manager_mock.assign_to_content_agent.return_value = (True, "Criadas 1 questões")
+        self.manager_mock.assign_to_reviewers.return_value = (True, "Revisadas 1 questões")
+        self.manager_mock.assign_to_validator_agent.return_value = (True, "Validação concluída")
+        self.manager_mock.get_final_results.return_value = {"questions_path": "/path/to/questions.json"}
+        
+        # Executa a requisição e aguarda a execução em segundo plano
+        response = self.client.post('/task/12345678/run_all?mode=batch')
+        app.batch_runs["12345678"].result(timeout=5)
+        
+        status_response = self.client.get('/task/12345678/batch_status')
+        result = json.loads(status_response.data)
+        
+        # Verifica os resultados
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(result["results_path"]["questions"], "/path/to/questions.json")
+        self.manager_mock.assign_to_validator_agent.assert_called_once()
+        
+        # O resultado continua disponível até expirar o tempo de validade
+        self.assertEqual(self.client.get('/task/12345678/batch_status').status_code, 200)
+        with patch('config.BATCH_RESULT_TTL', 0):
+            self.assertEqual(self.client.get('/task/12345678/batch_status').status_code, 404)
+        self.assertNotIn("12345678", app.batch_runs)
+    
+    def test_run_validator_agent_stream(self):
+        """
+        Testa o envio da resposta do Agente Validador em streaming (SSE).
+        """
+        # Simula o gerenciador repassando os trechos da resposta
+        def assign_to_validator_agent(on_chunk=None):
+            on_chunk("# Relatório")
+            on_chunk(" de Desenvolvimento")
+            return True, "Validação concluída"
+        
+        self.manager_mock.load_task.return_value = True
+        self.manager_mock.assign_to_validator_agent.side_effect = assign_to_validator_agent
+        
+        # Executa a requisição
+        response = self.client.post('/task/12345678/validator?stream=1')
+        body = response.get_data(as_text=True)
+        
+        # Verifica os resultados
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "text/event-stream")
+        self.assertIn('data: {"chunk": "# Relatório"}', body)
+        self.assertIn('data: {"chunk": " de Desenvolvimento"}', body)
+        self.assertTrue(body.rstrip().endswith('data: {"task_id": "12345678", "message": "Validação concluída"}'))
+        self.assertIn("event: done", body)
+    
+    def test_run_validator_agent_stream_shares_stage_flight(self):
+        """
+        Testa se o streaming usa a mesma execução compartilhada da etapa que a requisição comum.
+        """
+        self.manager_mock.load_task.return_value = True
+        self.manager_mock.assign_to_validator_agent.return_value = (True, "Validação concluída")
+        
+        with patch.object(app.stage_flights, 'do', wraps=app.stage_flights.do) as mock_do:
+            body = self.client.post('/task/12345678/validator?stream=1').get_data(as_text=True)
+        
+        self.assertIn("event: done", body)
+        self.assertEqual(mock_do.call_args.args[0], ("12345678", "assign_to_validator_agent"))
+    
+    def test_get_task_results(self):
+        """
+        Testa o endpoint de resultados, com o conteúdo dos arquivos na resposta.
+        """
+        with tempfile.TemporaryDirectory() as output_dir:
+            # Cria os arquivos de resultado
+            questions_path = Path(output_dir) / "questions_12345678.json"
+            questions_path.write_text('{"questions": [{"id": "abcd1234", "statement": "Questão"}]}',
+                                      encoding="utf-8")
+            report_path = Path(output_dir) / "development_12345678.md"
+            report_path.write_text('# Relatório de Desenvolvimento\n"Resumo"', encoding="utf-8")
+            
+            # Configura o mock para retornar uma tarefa concluída
+            self.manager_mock.load_task.return_value = True
+            self.manager_mock.get_final_results.return_value = {
+                "status": "completed",
+                "questions_path": str(questions_path),
+                "report_path": str(report_path),
+                "document_path": None
+            }
+            
+            # Executa a requisição
+            response = self.client.get('/task/12345678/results')
+            result = json.loads(response.data)
+        
+        # Verifica os resultados
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(result["task_id"], "12345678")
+        self.assertEqual(result["questions"]["questions"][0]["statement"], "Questão")
+        self.assertEqual(result["report"], '# Relatório de Desenvolvimento\n"Resumo"')
+        self.assertEqual(result["document"], "")
+    
+    def test_get_task_results_with_invalid_questions_file(self):
+        """
+        Testa se um arquivo de questões inválido (como uma gravação parcial) não corrompe a resposta JSON.
+        """
+        with tempfile.TemporaryDirectory() as output_dir:
+            questions_path = Path(output_dir) / "questions_12345678.json"
+            questions_path.write_text('{"questions": [{"id": "abcd', encoding="utf-8")
+            
+            self.manager_mock.load_task.return_value = True
+            self.manager_mock.get_final_results.return_value = {
+                "status": "completed",
+                "questions_path": str(questions_path),
+                "report_path": None,
+                "document_path": None
+            }
+            
+            response = self.client.get('/task/12345678/results')
+            result = json.loads(response.data)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(result["questions"], {})
+    
+    def test_get_task_result_file(self):
+        """
+        Testa o envio direto de um arquivo de resultado.
+        """
+        with tempfile.TemporaryDirectory() as output_dir:
+            # Configura o mock para retornar uma tarefa concluída
+            self.manager_mock.load_task.return_value = True
+            self.manager_mock.current_task.status = "completed"
+            document_path = Path(output_dir) / "final_document_12345678.md"
+            document_path.write_text("# Questões Validadas", encoding="utf-8")
+            
+            # Executa a requisição
+            with patch('app.get_output_paths', return_value={"document": document_path}):
+                response = self.client.get('/task/12345678/results/document.md')
+                body = response.get_data(as_text=True)
+                etag = response.headers.get("ETag")
+                response.close()
+                cached = self.client.get('/task/12345678/results/document.md',
+                                         headers={"If-None-Match": etag})
+        
+        # Verifica os resultados
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, "# Questões Validadas")
+        self.assertEqual(cached.status_code, 304)
+    
+    def test_upload_rejected_before_saving(self):
+        """
+        Testa a recusa de uploads grandes demais ou de tipo não suportado.
+        """
+        with patch('werkzeug.datastructures.FileStorage.save') as mock_save, \
+                patch.dict(app.app.config, {"MAX_CONTENT_LENGTH": 1024}):
+            too_large = self.client.post('/upload', data={"file": (io.BytesIO(b"x" * 2048), "teoria.txt")},
+                                         content_type='multipart/form-data')
+            unsupported = self.client.post('/upload', data={"file": (io.BytesIO(b"x"), "script.exe")},
+                                           content_type='multipart/form-data')
+        
+        # Verifica os resultados
+        self.assertEqual(too_large.status_code, 413)
+        self.assertIn("error", json.loads(too_large.data))
+        self.assertEqual(unsupported.status_code, 400)
+        mock_save.assert_not_called()
 
 if __name__ == '__main__':
     unittest.main()
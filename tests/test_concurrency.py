@@ -0,0 +1,88 @@
+"""
+Testes para os utilitários de concorrência.
+"""
+
+import sys
+import os
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+# Adiciona o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.concurrency import SingleFlight, TokenBucket
+
+
+class TestSingleFlight(unittest.TestCase):
+    """
+    Testes para o agrupador de chamadas simultâneas.
+    """
+    
+    def test_concurrent_calls_share_execution(self):
+        """
+        Testa se chamadas simultâneas com a mesma chave executam a função uma única vez.
+        """
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        
+        def work():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "ok"
+        
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            leader = pool.submit(flights.do, "task", work)
+            started.wait(5)
+            followers = [pool.submit(flights.do, "task", work) for _ in range(2)]
+            # Aguarda os seguidores se registrarem antes de liberar a execução
+            time.sleep(0.1)
+            release.set()
+            results = [leader.result(5)] + [f.result(5) for f in followers]
+        
+        self.assertEqual(results, ["ok", "ok", "ok"])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(flights), 0)
+    
+    def test_exception_is_propagated(self):
+        """
+        Testa se a exceção da execução é propagada e a chave é liberada.
+        """
+        flights = SingleFlight()
+        
+        def fail():
+            raise ValueError("erro")
+        
+        with self.assertRaises(ValueError):
+            flights.do("task", fail)
+        
+        self.assertEqual(flights.do("task", lambda: 42), 42)
+
+
+class TestTokenBucket(unittest.TestCase):
+    """
+    Testes para o limitador de taxa.
+    """
+    
+    @patch('utils.concurrency.time')
+    def test_token_bucket_limits_rate(self, mock_time):
+        """
+        Testa se o balde de fichas libera a rajada inicial e espaça as chamadas seguintes.
+        """
+        mock_time.monotonic.return_value = 100.0
+        bucket = TokenBucket(rate=2, capacity=2)
+        
+        for _ in range(4):
+            bucket.acquire()
+        
+        waits = [call.args[0] for call in mock_time.sleep.call_args_list]
+        self.assertEqual(waits, [0.5, 1.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
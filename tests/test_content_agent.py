@@ -6,13 +6,14 @@ import sys
 import os
 import json
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, Mock
 
 # Adiciona o diretório raiz ao path para importar os módulos
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from agents.content_agent import ContentAgent
 from models.question import Question
+from utils.ai_client import AIClient
 
 
 class TestContentAgent(unittest.TestCase):
@@ -20,20 +21,14 @@ class TestContentAgent(unittest.TestCase):
     Testes para o Agente Conteudista.
     """
     
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
         """
-        Configura o ambiente de teste.
+        Prepara os dados de teste, que não são alterados pelos testes.
         """
-        self.agent = ContentAgent()
-        
-        # Mock para a API de IA
-        self.ai_client_mock = MagicMock()
-        self.agent.ai_client = self.ai_client_mock
-        
-        # Dados de teste
-        self.objectives = ["Obj.1: Identificar critérios de qualidade e relevância dos dados."]
-        self.theory_text = "A qualidade dos dados é fundamental para o sucesso de projetos de ciência de dados."
-        self.templates = {
+        cls.objectives = ["Obj.1: Identificar critérios de qualidade e relevância dos dados."]
+        cls.theory_text = "A qualidade dos dados é fundamental para o sucesso de projetos de ciência de dados."
+        cls.templates = {
             "single_answer": json.dumps({
                 "type": "single_answer",
                 "context": "Texto de contextualização...",
@@ -48,7 +43,17 @@ class TestContentAgent(unittest.TestCase):
                 }
             })
         }
-        self.stopwords = ["limita-se", "apenas", "somente"]
+        cls.stopwords = ("limita-se", "apenas", "somente")
+    
+    def setUp(self):
+        """
+        Configura o ambiente de teste.
+        """
+        self.agent = ContentAgent()
+        
+        # Mock para a API de IA
+        self.ai_client_mock = Mock(spec=AIClient)
+        self.agent.ai_client = self.ai_client_mock
     
     def test_create_questions(self):
         """
@@ -81,7 +86,10 @@ class TestContentAgent(unittest.TestCase):
                 }
             ]
         }
-        self.ai_client_mock.generate_text.return_value = mock_response
+        content = mock_response["choices"][0]["message"]["content"]
+        self.ai_client_mock.generate_text_stream.side_effect = (
+            lambda prompt, **kwargs: iter([content[:200], content[200:]])
+        )
         
         # Executa o método a ser testado
         questions = self.agent.create_questions(
@@ -92,6 +100,7 @@ class TestContentAgent(unittest.TestCase):
         )
         
         # Verifica os resultados
+        self.ai_client_mock.generate_text_stream.assert_called_once()
         self.assertEqual(len(questions), 1)
         self.assertEqual(questions[0].objective_id, "Obj.1")
         self.assertEqual(questions[0].type, "single_answer")
@@ -99,6 +108,30 @@ class TestContentAgent(unittest.TestCase):
         self.assertTrue(questions[0].alternatives[0]["correct"])
         self.assertFalse(questions[0].alternatives[1]["correct"])
     
+    def test_create_questions_ignores_bracketed_text(self):
+        """
+        Testa se colchetes no texto antes do JSON (como "[1]") não são tomados por questões.
+        """
+        content = (
+            'Para o objetivo [1], segue a questão:\n```json\n'
+            '{"objective_id": "Obj.1", "type": "single_answer", "context": "Contexto",'
+            ' "statement": "Enunciado apenas",'
+            ' "alternatives": [{"id": "a", "text": "A", "correct": true}], "feedback": {"a": "Correta."}}\n```'
+        )
+        self.ai_client_mock.generate_text_stream.side_effect = (
+            lambda prompt, **kwargs: iter([content[:20], content[20:]])
+        )
+        
+        questions = self.agent.create_questions(
+            self.objectives,
+            self.theory_text,
+            self.templates,
+            self.stopwords
+        )
+        
+        self.assertEqual(len(questions), 1)
+        self.assertEqual(questions[0].statement, "Enunciado principalmente")
+    
     def test_check_and_replace_restricted_words(self):
         """
         Testa a verificação e substituição de palavras restritivas.
@@ -120,12 +153,16 @@ class TestContentAgent(unittest.TestCase):
         # Executa o método a ser testado
         self.agent._check_and_replace_restricted_words(question_data, self.stopwords)
         
-        # Verifica os resultados
-        self.assertNotIn("limita-se", question_data["context"])
-        self.assertNotIn("Apenas", question_data["statement"])
-        self.assertNotIn("Somente", question_data["alternatives"][0]["text"])
-        self.assertNotIn("Limita-se", question_data["feedback"]["a"])
-        self.assertNotIn("apenas", question_data["feedback"]["b"])
+        # Verifica que nenhuma palavra restritiva permanece, em nenhum campo
+        texts = (
+            question_data["context"],
+            question_data["statement"],
+            question_data["alternatives"][0]["text"],
+            question_data["feedback"]["a"],
+            question_data["feedback"]["b"]
+        )
+        blob = " ".join(texts).lower()
+        self.assertEqual([word for word in self.stopwords if word in blob], [])
 
 
 if __name__ == '__main__':
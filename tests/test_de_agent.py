@@ -0,0 +1,73 @@
+"""
+Testes para o Agente Design Educacional.
+"""
+
+import sys
+import os
+import json
+import unittest
+from unittest.mock import Mock
+
+# Adiciona o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents import de_agent
+from agents.de_agent import DEAgent
+from models.question import Question
+from utils.ai_client import AIClient
+
+
+def make_question(statement):
+    """
+    Cria uma questão de teste.
+    """
+    return Question(
+        objective_id="Obj.1",
+        question_type="single_answer",
+        context="Contexto",
+        statement=statement,
+        alternatives=[{"id": "a", "text": "Alternativa", "correct": True}],
+        feedback={"a": "Correta"}
+    )
+
+
+class TestDEAgent(unittest.TestCase):
+    """
+    Testes para o Agente Design Educacional.
+    """
+    
+    def setUp(self):
+        """
+        Configura o ambiente de teste.
+        """
+        de_agent._VALIDATION_CACHE.clear()
+        self.addCleanup(de_agent._VALIDATION_CACHE.clear)
+        
+        self.agent = DEAgent()
+        self.ai_client_mock = Mock(spec=AIClient)
+        self.agent.ai_client = self.ai_client_mock
+    
+    def test_revisions_keep_question_ids(self):
+        """
+        Testa se as cópias de mesmo conteúdo e as revisões do cache mantêm o id de cada questão.
+        """
+        questions = [make_question("Enunciado"), make_question("Enunciado")]
+        review = dict(questions[0].to_dict(), id="outro", statement="Revisado")
+        self.ai_client_mock.generate_text_stream.return_value = iter([json.dumps(review)])
+        
+        validated = self.agent.validate_questions(questions, "checklist", [])
+        
+        self.assertEqual([q.id for q in validated], [q.id for q in questions])
+        self.assertEqual([q.statement for q in validated], ["Revisado", "Revisado"])
+        
+        # Mesmo conteúdo em outra questão: a revisão vem do cache com o id dela
+        copy = make_question("Enunciado")
+        validated = self.agent.validate_questions([copy], "checklist", [])
+        
+        self.assertEqual(validated[0].id, copy.id)
+        self.assertEqual(validated[0].statement, "Revisado")
+        self.ai_client_mock.generate_text_stream.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Testes para os utilitários de manipulação de arquivos.
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Adiciona o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.file_handler import read_json, write_json, write_text
+
+
+class TestFileHandler(unittest.TestCase):
+    """
+    Testes para os utilitários de manipulação de arquivos.
+    """
+    
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+        """
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.dir = Path(temp_dir.name)
+    
+    def test_write_keeps_previous_content_as_backup(self):
+        """
+        Testa se a gravação substitui o arquivo e mantém o conteúdo anterior no backup.
+        """
+        file_path = self.dir / "task.json"
+        
+        self.assertTrue(write_json({"versao": 1}, file_path))
+        self.assertTrue(write_json({"versao": 2}, file_path))
+        
+        self.assertEqual(read_json(file_path), {"versao": 2})
+        self.assertEqual(read_json(self.dir / "task.json.bak"), {"versao": 1})
+        # Nenhum arquivo temporário permanece no diretório
+        self.assertEqual(sorted(p.name for p in self.dir.iterdir()), ["task.json", "task.json.bak"])
+    
+    def test_failed_write_keeps_original(self):
+        """
+        Testa se uma falha durante a gravação preserva o arquivo original.
+        """
+        file_path = self.dir / "report.md"
+        write_text("original", file_path)
+        
+        with patch('utils.file_handler.os.replace', side_effect=OSError("disco cheio")):
+            self.assertFalse(write_text("novo", file_path, backup=False))
+        
+        self.assertEqual(file_path.read_text(encoding="utf-8"), "original")
+        self.assertEqual([p.name for p in self.dir.iterdir()], ["report.md"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,7 @@ import sys
 import os
 import json
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, Mock, AsyncMock
 
 # Adiciona o diretório raiz ao path para importar os módulos
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -14,6 +14,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from agents.manager_agent import ManagerAgent
 from models.task import Task
 from models.question import Question
+from utils.ai_client import AIClient
 
 
 class TestManagerAgent(unittest.TestCase):
@@ -28,7 +29,7 @@ class TestManagerAgent(unittest.TestCase):
         self.agent = ManagerAgent()
         
         # Mock para a API de IA
-        self.ai_client_mock = MagicMock()
+        self.ai_client_mock = Mock(spec=AIClient)
         self.agent.ai_client = self.ai_client_mock
         
         # Dados de teste
@@ -86,10 +87,12 @@ class TestManagerAgent(unittest.TestCase):
         # Verifica se o método load_task_data foi chamado
         mock_load_task_data.assert_called_once_with("12345678")
     
+    @patch('agents.manager_agent.save_rejected_questions')
     @patch('agents.manager_agent.save_task_data')
-    def test_assign_to_content_agent(self, mock_save_task_data):
+    def test_assign_to_content_agent(self, mock_save_task_data, mock_save_rejected_questions):
         """
-        Testa a atribuição da tarefa ao Agente Conteudista.
+        Testa a atribuição da tarefa ao Agente Conteudista, com a rejeição das
+        questões malformadas antes das revisões.
         """
         # Configura o mock para retornar um valor simulado
         mock_save_task_data.return_value = "/path/to/task.json"
@@ -101,20 +104,41 @@ class TestManagerAgent(unittest.TestCase):
                     "message": {
                         "content": """
                         ```json
-                        {
-                          "objective_id": "Obj.1",
-                          "type": "single_answer",
-                          "context": "A qualidade dos dados é fundamental para o sucesso de projetos de ciência de dados.",
-                          "statement": "Qual critério é mais importante para garantir resultados confiáveis?",
-                          "alternatives": [
-                            {"id": "a", "text": "A completude dos dados", "correct": true},
-                            {"id": "b", "text": "O tamanho do conjunto de dados", "correct": false}
-                          ],
-                          "feedback": {
-                            "a": "Correta. A completude dos dados é fundamental.",
-                            "b": "Incorreta. A qualidade é mais importante que a quantidade."
+                        [
+                          {
+                            "objective_id": "Obj.1",
+                            "type": "single_answer",
+                            "context": "A qualidade dos dados é fundamental para o sucesso de projetos de ciência de dados.",
+                            "statement": "Qual critério é mais importante para garantir resultados confiáveis?",
+                            "alternatives": [
+                              {"id": "a", "text": "A completude dos dados", "correct": true},
+                              {"id": "b", "text": "O tamanho do conjunto de dados", "correct": false},
+                              {"id": "c", "text": "A fonte dos dados", "correct": false},
+                              {"id": "d", "text": "O formato de armazenamento", "correct": false},
+                              {"id": "e", "text": "A idade dos dados", "correct": false}
+                            ],
+                            "feedback": {
+                              "a": "Correta. A completude dos dados é fundamental.",
+                              "b": "Incorreta. A qualidade é mais importante que a quantidade.",
+                              "c": "Incorreta. A fonte não é o critério mais relevante.",
+                              "d": "Incorreta. O formato tem pouca relação com a qualidade.",
+                              "e": "Incorreta. A idade depende do contexto da análise."
+                            }
+                          },
+                          {
+                            "objective_id": "Obj.1",
+                            "type": "single_answer",
+                            "context": "A qualidade dos dados é fundamental para o sucesso de projetos de ciência de dados.",
+                            "statement": "Qual critério é mais importante para garantir resultados confiáveis?",
+                            "alternatives": [
+                              {"id": "a", "text": "A completude dos dados", "correct": true},
+                              {"id": "b", "text": "O tamanho do conjunto de dados", "correct": false}
+                            ],
+                            "feedback": {
+                              "a": "Correta. A completude dos dados é fundamental."
+                            }
                           }
-                        }
+                        ]
                         ```
                         """
                     }
@@ -134,10 +158,202 @@ class TestManagerAgent(unittest.TestCase):
         self.assertEqual(self.agent.current_task.status, "in_progress")
         self.assertEqual(self.agent.current_task.current_agent, "content_agent")
         self.assertEqual(len(self.agent.current_task.questions), 1)
+        self.assertIn("1 rejeitadas", message)
+        
+        # Verifica se a questão malformada foi salva com os problemas encontrados
+        rejected = mock_save_rejected_questions.call_args[0][1]
+        self.assertEqual(len(rejected), 1)
+        self.assertTrue(rejected[0]["issues"])
         
         # Verifica se o método save_task_data foi chamado
         mock_save_task_data.assert_called()
     
+    @patch('agents.manager_agent.save_rejected_questions')
+    @patch('agents.manager_agent.save_task_data')
+    def test_assign_to_content_agent_malformed_alternatives(self, mock_save_task_data,
+                                                            mock_save_rejected_questions):
+        """
+        Testa se alternativas sem id ou sem o campo correct e feedback em formato
+        inesperado são tratados pela verificação estrutural, sem erro.
+        """
+        alternatives = [{"id": alt_id, "text": "Alternativa", "correct": alt_id == "a"} for alt_id in "abcd"]
+        questions = [
+            {
+                "objective_id": "Obj.1",
+                "type": "single_answer",
+                "context": "Contexto",
+                "statement": "Enunciado",
+                "alternatives": alternatives + [{"id": "e", "text": "Alternativa sem o campo correct"}],
+                "feedback": {alt_id: "Feedback" for alt_id in "abcde"}
+            },
+            {
+                "objective_id": "Obj.1",
+                "type": "single_answer",
+                "context": "Contexto",
+                "statement": "Enunciado",
+                "alternatives": alternatives + [{"text": "Alternativa sem id"}],
+                "feedback": ["Feedback em lista"]
+            }
+        ]
+        self.ai_client_mock.generate_text.return_value = {
+            "choices": [{"message": {"content": json.dumps(questions)}}]
+        }
+        
+        # Inicializa uma tarefa para o teste
+        self.agent.initialize_task(self.objectives, self.theory_text)
+        
+        # Executa o método a ser testado
+        success, message = self.agent.assign_to_content_agent()
+        
+        # Verifica os resultados
+        self.assertTrue(success, message)
+        self.assertEqual(len(self.agent.current_task.questions), 1)
+        rejected = mock_save_rejected_questions.call_args[0][1]
+        self.assertIn("Há alternativas sem identificador", rejected[0]["issues"])
+    
+    @patch('agents.manager_agent.save_task_data')
+    def test_assign_to_reviewers(self, mock_save_task_data):
+        """
+        Testa a revisão RT e DE em paralelo, combinando as alterações e as validações.
+        """
+        # Inicializa uma tarefa com uma questão para o teste
+        self.agent.initialize_task(self.objectives, self.theory_text)
+        self.agent.current_task.add_question(
+            Question("Obj.1", "single_answer", "Contexto", "Enunciado original", [], {})
+        )
+        
+        # O RT corrige o enunciado e o DE, o contexto; os dois partem da questão original
+        changes = {"rt": {"statement": "Enunciado rt"}, "de": {"context": "Contexto de"}}
+        
+        def review(validation_type):
+            q_data = {
+                "objective_id": "Obj.1",
+                "type": "single_answer",
+                "context": "Contexto",
+                "statement": "Enunciado original",
+                "alternatives": [],
+                "feedback": {},
+                "validation": {"rt": None, "de": None, "final": None}
+            }
+            q_data.update(changes[validation_type])
+            q_data["validation"][validation_type] = {"status": "approved"}
+            return {"choices": [{"message": {"content": json.dumps(q_data)}}]}
+        
+        # Configura o mock para responder conforme o revisor
+        self.ai_client_mock.create_agent_prompt.side_effect = lambda agent_type, task_data: agent_type
+        self.ai_client_mock.agenerate_text = AsyncMock(
+            side_effect=lambda prompt, max_tokens: review(prompt)
+        )
+        
+        # Executa o método a ser testado
+        success, message = self.agent.assign_to_reviewers()
+        
+        # Verifica os resultados
+        self.assertTrue(success)
+        self.assertEqual(self.ai_client_mock.agenerate_text.await_count, 2)
+        question = self.agent.current_task.questions[0]
+        self.assertEqual(question.statement, "Enunciado rt")
+        self.assertEqual(question.context, "Contexto de")
+        self.assertEqual(question.validation["rt"], {"status": "approved"})
+        self.assertEqual(question.validation["de"], {"status": "approved"})
+        mock_save_task_data.assert_called()
+    
+    @patch('agents.manager_agent.save_final_document', return_value=None)
+    @patch('agents.manager_agent.save_report', return_value="/path/to/report.md")
+    @patch('agents.manager_agent.save_questions', return_value="/path/to/questions.json")
+    @patch('agents.manager_agent.save_task_data')
+    def test_validator_failed_write_keeps_task_open(self, mock_save_task_data, mock_save_questions,
+                                                    mock_save_report, mock_save_final_document):
+        """
+        Testa se a tarefa não é concluída quando um arquivo de saída não é gravado.
+        """
+        # Inicializa uma tarefa com uma questão para o teste
+        self.agent.initialize_task(self.objectives, self.theory_text)
+        question = Question("Obj.1", "single_answer", "Contexto", "Enunciado", [], {})
+        self.agent.current_task.add_question(question)
+        
+        # Configura o mock para responder com a questão validada e as seções do relatório
+        validated = dict(question.to_dict(), validation={"final": {"status": "approved"}})
+        content = ("```json\n" + json.dumps({"questions": [validated]}) + "\n```\n"
+                   "# Relatório de Desenvolvimento\nResumo\n# Documento Final\nDocumento")
+        self.ai_client_mock.create_agent_prompt.return_value = "prompt"
+        self.ai_client_mock.generate_text.return_value = {"choices": [{"message": {"content": content}}]}
+        
+        # Executa o método a ser testado
+        success, message = self.agent.assign_to_validator_agent()
+        
+        # Verifica os resultados
+        self.assertFalse(success, message)
+        self.assertEqual(self.agent.current_task.status, "in_progress")
+        mock_save_final_document.assert_called_once()
+        
+        # Com a gravação bem-sucedida, a tarefa é concluída
+        mock_save_final_document.return_value = "/path/to/document.md"
+        success, message = self.agent.assign_to_validator_agent()
+        self.assertTrue(success, message)
+        self.assertEqual(self.agent.current_task.status, "completed")
+    
+    def test_apply_question_updates(self):
+        """
+        Testa a substituição das questões atualizadas pelo objective_id.
+        """
+        # Inicializa uma tarefa com questões para o teste
+        self.agent.initialize_task(self.objectives, self.theory_text)
+        for objective_id in ["Obj.1", "Obj.2", "Obj.1"]:
+            self.agent.current_task.add_question(
+                Question(objective_id, "single_answer", "Contexto", "Original", [], {})
+            )
+        
+        updates = [
+            Question(objective_id, "single_answer", "Contexto", statement, [], {}).to_dict()
+            for objective_id, statement in [
+                ("Obj.2", "Revisada 2"), ("Obj.1", "Revisada 1"), ("Obj.9", "Sem questão")
+            ]
+        ]
+        
+        # Executa o método a ser testado
+        self.agent._apply_question_updates(updates)
+        
+        # Verifica os resultados
+        statements = [q.statement for q in self.agent.current_task.questions]
+        self.assertEqual(statements, ["Revisada 1", "Revisada 2", "Original"])
+    
+    @patch('agents.manager_agent.save_task_data')
+    def test_deferred_saves(self, mock_save_task_data):
+        """
+        Testa que as etapas executadas com salvamento adiado gravam a tarefa uma única vez.
+        """
+        with self.agent.deferred_saves():
+            self.agent.initialize_task(self.objectives, self.theory_text)
+            self.agent.current_task.update_status("in_progress", "content_agent")
+            mock_save_task_data.assert_not_called()
+        
+        # Verifica os resultados
+        mock_save_task_data.assert_called_once()
+        self.assertTrue(self.agent.autosave)
+        self.assertFalse(self.agent.current_task.dirty)
+        
+        # Sem alterações, não há nova gravação
+        self.agent.flush()
+        mock_save_task_data.assert_called_once()
+    
+    @patch('agents.manager_agent.save_task_data')
+    def test_flush_retries_failed_save(self, mock_save_task_data):
+        """
+        Testa se uma gravação que falhou mantém a tarefa marcada como alterada.
+        """
+        mock_save_task_data.return_value = None
+        self.agent.initialize_task(self.objectives, self.theory_text)
+        
+        self.assertFalse(self.agent.flush())
+        self.assertTrue(self.agent.current_task.dirty)
+        
+        # A próxima chamada tenta gravar novamente
+        mock_save_task_data.return_value = "/path/to/task.json"
+        self.assertTrue(self.agent.flush())
+        self.assertFalse(self.agent.current_task.dirty)
+        self.assertEqual(mock_save_task_data.call_count, 3)
+    
     def test_get_task_status(self):
         """
         Testa a obtenção do status da tarefa.
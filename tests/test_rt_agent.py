@@ -0,0 +1,134 @@
+"""
+Testes para o Agente Revisor Técnico.
+"""
+
+import sys
+import os
+import json
+import unittest
+from unittest.mock import Mock
+
+# Adiciona o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents import rt_agent
+from agents.rt_agent import RTAgent
+from models.question import Question
+from utils.ai_client import AIClient, AIClientError
+
+
+def make_question(objective_id, statement):
+    """
+    Cria uma questão de teste.
+    """
+    return Question(
+        objective_id=objective_id,
+        question_type="single_answer",
+        context="Contexto",
+        statement=statement,
+        alternatives=[{"id": "a", "text": "Alternativa", "correct": True}],
+        feedback={"a": "Correta"}
+    )
+
+
+def review_of(question, statement):
+    """
+    Retorna os dados de uma revisão da questão com um novo enunciado.
+    """
+    data = question.to_dict()
+    data["statement"] = statement
+    return data
+
+
+class TestRTAgent(unittest.TestCase):
+    """
+    Testes para o Agente Revisor Técnico.
+    """
+    
+    def setUp(self):
+        """
+        Configura o ambiente de teste.
+        """
+        rt_agent._VALIDATION_CACHE.clear()
+        self.addCleanup(rt_agent._VALIDATION_CACHE.clear)
+        
+        self.agent = RTAgent()
+        self.ai_client_mock = Mock(spec=AIClient)
+        self.agent.ai_client = self.ai_client_mock
+        
+        self.questions = [make_question("Obj.1", "Enunciado 1"), make_question("Obj.2", "Enunciado 2")]
+    
+    def test_batch_reviews_matched_by_id(self):
+        """
+        Testa se as revisões de um lote devolvidas fora de ordem são associadas pelo id.
+        """
+        first, second = self.questions
+        self.ai_client_mock.generate_text_stream.return_value = iter([
+            json.dumps({"questions": [review_of(second, "Revisado 2"), review_of(first, "Revisado 1")]})
+        ])
+        
+        validated = self.agent.validate_questions(self.questions, "checklist", [])
+        
+        self.assertEqual([q.id for q in validated], [first.id, second.id])
+        self.assertEqual([q.statement for q in validated], ["Revisado 1", "Revisado 2"])
+        self.ai_client_mock.generate_text_stream.assert_called_once()
+    
+    def test_missing_review_falls_back_to_single_validation(self):
+        """
+        Testa se uma questão omitida na resposta do lote é revisada individualmente.
+        """
+        first, second = self.questions
+        self.ai_client_mock.generate_text_stream.side_effect = [
+            iter([json.dumps({"questions": [review_of(second, "Revisado 2")]})]),
+            iter([json.dumps(review_of(first, "Revisado 1"))])
+        ]
+        
+        validated = self.agent.validate_questions(self.questions, "checklist", [])
+        
+        self.assertEqual([q.statement for q in validated], ["Revisado 1", "Revisado 2"])
+        self.assertEqual(self.ai_client_mock.generate_text_stream.call_count, 2)
+    
+    def test_cached_reviews_skip_api(self):
+        """
+        Testa se as questões já revisadas vêm do cache, com o id da questão enviada.
+        """
+        first, second = self.questions
+        self.ai_client_mock.generate_text_stream.return_value = iter([
+            json.dumps({"questions": [review_of(first, "Revisado 1"), review_of(second, "Revisado 2")]})
+        ])
+        self.agent.validate_questions(self.questions, "checklist", [])
+        
+        # Mesmo conteúdo com outro id: a revisão é reaproveitada do cache
+        copy = make_question("Obj.1", "Enunciado 1")
+        validated = self.agent.validate_questions([copy], "checklist", [])
+        
+        self.assertEqual(validated[0].id, copy.id)
+        self.assertEqual(validated[0].statement, "Revisado 1")
+        self.ai_client_mock.generate_text_stream.assert_called_once()
+    
+    def test_api_error_is_raised(self):
+        """
+        Testa se um erro da API em um lote não é descartado silenciosamente.
+        """
+        self.ai_client_mock.generate_text_stream.side_effect = AIClientError("falha")
+        
+        with self.assertLogs('agents.rt_agent', level='ERROR'):
+            with self.assertRaises(AIClientError):
+                self.agent.validate_questions(self.questions, "checklist", [])
+
+    
+    def test_prompts_end_with_questions(self):
+        """
+        Testa se os prompts de validação terminam com as questões, após as instruções,
+        o checklist e as palavras restritivas.
+        """
+        for create_prompt, questions in ((self.agent._create_single_question_validation_prompt, self.questions[:1]),
+                                         (self.agent._create_batch_validation_prompt, self.questions)):
+            with self.subTest(prompt=create_prompt.__name__):
+                prompt = create_prompt({"questions": questions, "rt_checklist": "CHECKLIST", "stopwords": "PALAVRAS"})
+                questions_start = prompt.index(questions[0].id)
+                for part in ("INSTRUÇÕES", "CHECKLIST", "PALAVRAS"):
+                    self.assertLess(prompt.index(part), questions_start)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Testes para o modelo de tarefa.
+"""
+
+import sys
+import os
+import unittest
+
+# Adiciona o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.task import Task
+from models.question import Question
+from models.report import Report
+
+
+def make_question(objective_id, statement):
+    """
+    Cria uma questão de teste.
+    """
+    return Question(objective_id, "single_answer", "Contexto", statement, [], {})
+
+
+class TestTask(unittest.TestCase):
+    """
+    Testes para o modelo de tarefa.
+    """
+    
+    def setUp(self):
+        """
+        Configura o ambiente de teste.
+        """
+        self.task = Task(["Obj.1: Objetivo 1", "Obj.2: Objetivo 2"], "Teoria", {}, [])
+        for objective_id, statement in [("Obj.1", "Q1"), ("Obj.2", "Q2"), ("Obj.1", "Q3")]:
+            self.task.add_question(make_question(objective_id, statement))
+    
+    def statements(self, objective_id):
+        """
+        Retorna os enunciados das questões de um objetivo.
+        """
+        return [q.statement for q in self.task.get_questions_for_objective(objective_id)]
+    
+    def test_add_question_indexes_by_objective(self):
+        """
+        Testa se as questões adicionadas são indexadas pelo objetivo, na ordem da tarefa.
+        """
+        self.assertEqual(self.statements("Obj.1"), ["Q1", "Q3"])
+        self.assertEqual(self.statements("Obj.2"), ["Q2"])
+        self.assertEqual(self.statements("Obj.9"), [])
+    
+    def test_replace_question_same_objective(self):
+        """
+        Testa a substituição de uma questão por outra do mesmo objetivo.
+        """
+        self.task.dirty = False
+        self.task.replace_question(2, make_question("Obj.1", "Q3 revisada"))
+        
+        self.assertEqual(self.statements("Obj.1"), ["Q1", "Q3 revisada"])
+        self.assertEqual(self.statements("Obj.2"), ["Q2"])
+        self.assertTrue(self.task.dirty)
+    
+    def test_replace_question_other_objective(self):
+        """
+        Testa se a questão substituída por outra de objetivo diferente muda de objetivo no índice.
+        """
+        self.task.replace_question(2, make_question("Obj.2", "Q3 movida"))
+        
+        self.assertEqual(self.statements("Obj.1"), ["Q1"])
+        self.assertEqual(self.statements("Obj.2"), ["Q2", "Q3 movida"])
+        
+        # No novo objetivo, as questões seguem a ordem da tarefa
+        self.task.replace_question(0, make_question("Obj.2", "Q1 movida"))
+        self.assertEqual(self.statements("Obj.1"), [])
+        self.assertEqual(self.statements("Obj.2"), ["Q1 movida", "Q2", "Q3 movida"])
+    
+    def test_from_dict_rebuilds_question_index(self):
+        """
+        Testa se a tarefa carregada de um dicionário reconstrói o índice por objetivo.
+        """
+        task = Task.from_dict(self.task.to_dict())
+        
+        self.assertEqual([q.statement for q in task.get_questions_for_objective("Obj.1")], ["Q1", "Q3"])
+        self.assertEqual([q.statement for q in task.get_questions_for_objective("Obj.2")], ["Q2"])
+        self.assertFalse(task.dirty)
+
+    
+    def test_report_by_type_keeps_first_report(self):
+        """
+        Testa se o índice de relatórios mantém o primeiro relatório de cada tipo,
+        também na tarefa carregada de um dicionário.
+        """
+        first = Report("development_report", "validator_agent", {"text": "Primeiro"})
+        second = Report("development_report", "validator_agent", {"text": "Segundo"})
+        self.task.add_report(first)
+        self.task.add_report(second)
+        
+        self.assertIs(self.task.get_report_by_type("development_report"), first)
+        self.assertEqual(len(self.task.reports), 2)
+        self.assertIsNone(self.task.get_report_by_type("final_document"))
+        
+        task = Task.from_dict(self.task.to_dict())
+        self.assertEqual(task.get_report_by_type("development_report").content, {"text": "Primeiro"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Testes para os utilitários de processamento de texto.
+"""
+
+import sys
+import os
+import json
+import unittest
+
+# Adiciona o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.text_processor import (
+    extract_json_from_text, extract_questions_from_text, extract_report_sections, extract_validation_result,
+    check_restricted_words, replace_restricted_words
+)
+
+
+class TestTextProcessor(unittest.TestCase):
+    """
+    Testes para os utilitários de processamento de texto.
+    """
+    
+    def test_extract_json_from_code_block(self):
+        """
+        Testa a extração de JSON de um bloco de código com texto ao redor.
+        """
+        text = """
+        Segue a questão revisada:
+        ```json
+        {"statement": "Qual a chave { correta }?", "alternatives": [{"id": "a", "text": "\\"{\\""}]}
+        ```
+        ```markdown
+        # Relatório
+        ```
+        """
+        
+        data = extract_json_from_text(text)
+        
+        self.assertEqual(data["statement"], "Qual a chave { correta }?")
+        self.assertEqual(data["alternatives"][0]["text"], '"{"')
+    
+    def test_extract_json_ignores_loose_braces(self):
+        """
+        Testa que chaves soltas no texto não impedem a extração do JSON.
+        """
+        text = 'Texto com { solto e "aspas.\n```json\n{"questions": []}\n```'
+        
+        self.assertEqual(extract_json_from_text(text), {"questions": []})
+    
+    def test_extract_json_truncated(self):
+        """
+        Testa que um JSON incompleto não é extraído.
+        """
+        self.assertEqual(extract_json_from_text('{"questions": [{"id": "a"'), {})
+    
+    def test_extract_single_question(self):
+        """
+        Testa a extração de uma resposta com uma única questão.
+        """
+        text = '```json\n{"objective_id": "Obj.1", "statement": "Enunciado", "alternatives": []}\n```'
+        
+        questions = extract_questions_from_text(text)
+        
+        self.assertEqual(len(questions), 1)
+        self.assertEqual(questions[0]["objective_id"], "Obj.1")
+
+    
+    def test_extract_report_sections(self):
+        """
+        Testa a extração das seções do relatório em blocos de código e soltas.
+        """
+        text = (
+            "```markdown\n# Questões Validadas\n\n## Objetivo 1\n```\n"
+            "# Relatório de Desenvolvimento\n\n## Resumo\nTexto do resumo.\n\n# Anexos\nOutro texto."
+        )
+        
+        sections = extract_report_sections(text)
+        
+        self.assertEqual(sections["final_document"], "# Questões Validadas\n\n## Objetivo 1")
+        self.assertEqual(
+            sections["development_report"],
+            "# Relatório de Desenvolvimento\n\n## Resumo\nTexto do resumo."
+        )
+    
+    def test_extract_validation_result(self):
+        """
+        Testa a leitura da resposta estruturada do validador, com questões e seções.
+        """
+        text = json.dumps({
+            "questions": [{"objective_id": "Obj.1", "statement": "Enunciado", "alternatives": []}],
+            "development_report": "# Relatório de Desenvolvimento\n\n```python\nprint(1)\n```",
+            "final_document": "# Questões Validadas"
+        }, ensure_ascii=False)
+        
+        questions, sections = extract_validation_result(text)
+        
+        self.assertEqual(questions[0]["statement"], "Enunciado")
+        self.assertEqual(sections["development_report"], "# Relatório de Desenvolvimento\n\n```python\nprint(1)\n```")
+        self.assertEqual(sections["final_document"], "# Questões Validadas")
+    
+    def test_extract_json_ignores_bracketed_citations(self):
+        """
+        Testa se colchetes no texto (como citações) não são tomados por JSON.
+        """
+        self.assertEqual(extract_json_from_text("Conforme [1], a resposta está em [2, 3]."), {})
+        self.assertEqual(extract_questions_from_text("Conforme [1], não há questões."), [])
+        
+        text = 'Conforme [1]:\n{"questions": [{"statement": "Enunciado"}]}'
+        self.assertEqual(extract_questions_from_text(text), [{"statement": "Enunciado"}])
+    
+    def test_check_restricted_words(self):
+        """
+        Testa a localização de palavras restritivas sem diferenciar maiúsculas,
+        com prioridade para a expressão mais longa.
+        """
+        text = "Apenas isso vale, e somente isso; Somente aqui."
+        
+        found = check_restricted_words(text, ["apenas", "somente", "e somente isso"])
+        
+        self.assertEqual(found, [("apenas", 0), ("e somente isso", 18), ("somente", 34)])
+    
+    def test_check_restricted_words_inside_other_words(self):
+        """
+        Testa se as palavras restritivas são encontradas também dentro de outras palavras.
+        """
+        found = check_restricted_words("Valores inexatamente medidos.", ["exatamente"])
+        
+        self.assertEqual(found, [("exatamente", 10)])
+    
+    def test_replace_restricted_words_keeps_case(self):
+        """
+        Testa se a substituição mantém as maiúsculas da palavra original.
+        """
+        text = "Apenas isso. Limita-se a APENAS um caso, exclusivamente."
+        
+        replaced = replace_restricted_words(text, ["apenas", "limita-se", "exclusivamente"])
+        
+        self.assertEqual(replaced, "Principalmente isso. Abrange a PRINCIPALMENTE um caso, especialmente.")
+    
+    def test_replace_restricted_words_inside_other_words(self):
+        """
+        Testa se a substituição alcança as palavras restritivas dentro de outras palavras.
+        """
+        replaced = replace_restricted_words("Valores inexatamente medidos.", ["exatamente"])
+        
+        self.assertEqual(replaced, "Valores inprecisamente medidos.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+"""
+Testes para o agrupamento de itens em lotes por número de tokens.
+"""
+
+import sys
+import os
+import unittest
+
+# Adiciona o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.token_batcher import pack_batches
+
+
+class TestTokenBatcher(unittest.TestCase):
+    """
+    Testes para o agrupamento de itens em lotes por número de tokens.
+    """
+    
+    def test_pack_batches(self):
+        """
+        Testa se os lotes respeitam o limite de tokens e de itens, mantendo a ordem.
+        """
+        costs = {"a": 40, "b": 50, "c": 30, "d": 200, "e": 10, "f": 10, "g": 10}
+        
+        batches = pack_batches(list(costs), cost=costs.get, max_tokens=100, max_items=2)
+        
+        # "d" excede o limite sozinho e forma um lote próprio
+        self.assertEqual(batches, [["a", "b"], ["c"], ["d"], ["e", "f"], ["g"]])
+    
+    def test_pack_batches_empty(self):
+        """
+        Testa o agrupamento de uma lista vazia.
+        """
+        self.assertEqual(pack_batches([], cost=len, max_tokens=100), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Testes para o Agente Validador.
+"""
+
+import sys
+import os
+import json
+import unittest
+from unittest.mock import Mock
+
+# Adiciona o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents import validator_agent
+from agents.validator_agent import ValidatorAgent
+from models.question import Question
+from utils.ai_client import AIClient
+
+
+def make_question():
+    """
+    Cria uma questão de teste.
+    """
+    return Question(
+        objective_id="Obj.1",
+        question_type="single_answer",
+        context="Contexto",
+        statement="Enunciado",
+        alternatives=[{"id": "a", "text": "Alternativa", "correct": True}],
+        feedback={"a": "Correta"}
+    )
+
+
+def validation_response(questions):
+    """
+    Monta a resposta do Agente Validador para as questões.
+    """
+    questions_data = [
+        dict(q.to_dict(), validation=dict(q.validation, final={"status": "approved"}))
+        for q in questions
+    ]
+    content = ("```json\n" + json.dumps({"questions": questions_data}) + "\n```\n"
+               "# Relatório de Desenvolvimento\nResumo\n# Documento Final\nDocumento")
+    return {"choices": [{"message": {"content": content}}]}
+
+
+class TestValidatorAgent(unittest.TestCase):
+    """
+    Testes para o Agente Validador.
+    """
+    
+    def setUp(self):
+        """
+        Configura o ambiente de teste.
+        """
+        validator_agent._RESPONSE_CACHE.clear()
+        self.addCleanup(validator_agent._RESPONSE_CACHE.clear)
+        
+        self.agent = ValidatorAgent()
+        self.ai_client_mock = Mock(spec=AIClient)
+        self.ai_client_mock.create_agent_prompt.return_value = "prompt"
+        self.agent.ai_client = self.ai_client_mock
+    
+    def test_cached_validation_keeps_question_ids(self):
+        """
+        Testa se uma validação em cache, obtida para outra questão de mesmo texto, mantém o id da questão enviada.
+        """
+        first = make_question()
+        first.validation["rt"] = {"status": "approved"}
+        self.ai_client_mock.generate_text.return_value = validation_response([first])
+        
+        validated, _, _ = self.agent.validate_questions([first])
+        self.assertEqual(validated[0].id, first.id)
+        
+        # Mesmo texto, outro id: a validação vem do cache
+        second = make_question()
+        validated, report, _ = self.agent.validate_questions([second])
+        
+        self.ai_client_mock.generate_text.assert_called_once()
+        self.assertIn("Resumo", report)
+        self.assertNotEqual(second.id, first.id)
+        self.assertEqual(validated[0].id, second.id)
+        self.assertEqual(validated[0].metadata, second.metadata)
+        self.assertIsNone(validated[0].validation["rt"])
+        self.assertEqual(validated[0].validation["final"], {"status": "approved"})
+    
+    def test_validation_follows_question_order(self):
+        """
+        Testa se duas questões de mesmo texto recebem cada uma o seu resultado, na ordem enviada.
+        """
+        questions = [make_question(), make_question()]
+        self.ai_client_mock.generate_text.return_value = validation_response(list(reversed(questions)))
+        
+        validated, _, _ = self.agent.validate_questions(questions)
+        
+        self.assertEqual([q.id for q in validated], [q.id for q in questions])
+
+
+if __name__ == '__main__':
+    unittest.main()
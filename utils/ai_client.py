@@ -2,12 +2,104 @@
 Cliente para interagir com APIs de IA.
 """
 
-import os
+import re
 import json
+import logging
+import time
+import hashlib
+import random
+import asyncio
 import requests
-from typing import Dict, Any, List, Optional
+import threading
+import itertools
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Iterator, Optional, Tuple
 
 import config
+from utils.cache import LRUCache
+from utils.concurrency import SingleFlight, TokenBucket
+
+
+logger = logging.getLogger(__name__)
+
+# Número máximo de conexões mantidas abertas com o provedor de IA
+_HTTP_POOL_SIZE = 32
+
+# Status HTTP transitórios, para os quais a requisição é repetida
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Nome de cada provedor nas mensagens de erro
+_PROVIDER_NAMES = {"deepseek": "DeepSeek", "ollama": "Ollama"}
+
+# Respostas já obtidas da API, por prompt e parâmetros da chamada
+_RESPONSE_CACHE = LRUCache(maxsize=config.AI_RESPONSE_CACHE_SIZE, ttl=config.AI_RESPONSE_CACHE_TTL)
+
+# Temperatura máxima com a qual as respostas são reaproveitadas do cache. Acima
+# dela, as respostas são amostradas e repetir a chamada deve gerar uma nova
+_MAX_CACHED_TEMPERATURE = 0.2
+
+# Chamadas em andamento, por chave do cache de respostas
+_IN_FLIGHT = SingleFlight()
+
+# Limites de taxa e de concorrência das requisições, compartilhados entre
+# os clientes do processo
+_RATE_LIMITER = TokenBucket(config.AI_RATE_LIMIT_RPS, capacity=config.AI_RATE_LIMIT_RPS)
+_CONCURRENCY = threading.BoundedSemaphore(max(1, config.AI_MAX_CONCURRENCY))
+
+# Papel do agente no início de cada prompt, usado para escolher a resposta simulada
+_MOCK_ROLE_RE = re.compile(r"Você é um (Professor-Conteudista|Revisor Técnico|Designer Educacional|Validador Final)")
+
+
+class AIClientError(Exception):
+    """
+    Falha ao obter uma resposta da API de IA, após esgotar as novas tentativas.
+    """
+
+
+def _json_default(value: Any) -> Any:
+    """
+    Serializa nos prompts os objetos do modelo (como Question), sem exigir
+    que os agentes os convertam antes para uma lista de dicionários.
+    
+    Args:
+        value: Objeto com o método to_dict
+    
+    Returns:
+        Dicionário representando o objeto
+    """
+    return value.to_dict()
+
+
+def to_prompt_json(value: Any) -> str:
+    """
+    Serializa dados (incluindo objetos do modelo) em JSON compacto para os prompts.
+    
+    O modelo não precisa do JSON indentado; sem a indentação, o prompt fica
+    menor (menos tokens) e a serialização mais rápida.
+    
+    Args:
+        value: Dados a serem serializados
+    
+    Returns:
+        JSON compacto
+    """
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+
+
+def _questions_json(questions: Any) -> str:
+    """
+    Retorna as questões de um prompt em JSON.
+    
+    Args:
+        questions: Lista de questões, ou o JSON já gerado por to_prompt_json
+            (quando o mesmo conjunto é enviado a mais de um agente)
+    
+    Returns:
+        JSON compacto das questões
+    """
+    if isinstance(questions, str):
+        return questions
+    return to_prompt_json(questions)
 
 
 class AIClient:
@@ -21,48 +113,431 @@ class AIClient:
         """
         self.provider = config.AI_PROVIDER
         
+        # Pares (URL, cabeçalhos); com mais de um, as requisições são
+        # distribuídas entre eles em rodízio, somando os limites de taxa
         if self.provider == "deepseek":
-            self.api_key = config.DEEPSEEK_API_KEY
-            self.api_url = config.DEEPSEEK_API_URL
+            self.endpoints = [(config.DEEPSEEK_API_URL, self._deepseek_headers(key))
+                              for key in config.DEEPSEEK_API_KEYS]
+            self._generate = self._generate_text_deepseek
+            self._generate_stream = self._generate_text_stream_deepseek
         elif self.provider == "ollama":
-            self.api_url = config.OLLAMA_API_URL
+            self.endpoints = [(url, {}) for url in config.OLLAMA_API_URLS]
             self.model = config.OLLAMA_MODEL
+            self._generate = self._generate_text_ollama
+            self._generate_stream = self._generate_text_stream_ollama
         else:
             raise ValueError(f"Provedor de IA não suportado: {self.provider}")
+        
+        self._endpoint_cycle = itertools.cycle(self.endpoints)
+        self._endpoint_lock = threading.Lock()
+        
+        # Sessão HTTP persistente: reaproveita conexões (e o handshake TLS)
+        # entre as chamadas feitas pelos agentes. O pool comporta as requisições
+        # simultâneas dos agentes sem descartar conexões abertas.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=_HTTP_POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+    
+    @staticmethod
+    def _deepseek_headers(api_key: str) -> Dict[str, str]:
+        """
+        Monta os cabeçalhos das requisições à API DeepSeek.
+        
+        Os cabeçalhos são montados uma vez por chave de API e reaproveitados
+        em todas as chamadas.
+        
+        Args:
+            api_key: Chave de API
+        
+        Returns:
+            Cabeçalhos HTTP
+        """
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        }
+    
+    def warm_up(self) -> None:
+        """
+        Abre em segundo plano as conexões com os endpoints da API.
+        
+        Assim, o handshake TCP/TLS não é pago pela primeira chamada real. Falhas
+        são ignoradas: a conexão é aberta normalmente na primeira requisição.
+        """
+        def connect(url: str) -> None:
+            try:
+                self.session.head(url, timeout=5).close()
+            except requests.exceptions.RequestException:
+                pass
+        
+        for url in {url for url, _ in self.endpoints}:
+            threading.Thread(target=connect, args=(url,), daemon=True).start()
+    
+    def _next_endpoint(self) -> Tuple[str, Dict[str, str]]:
+        """
+        Escolhe o endpoint da próxima requisição, em rodízio.
+        
+        Returns:
+            URL e cabeçalhos HTTP do endpoint
+        """
+        with self._endpoint_lock:
+            return next(self._endpoint_cycle)
     
-    def generate_text(self, prompt: str, max_tokens: int = 2000) -> Dict[str, Any]:
+    def generate_text(self, prompt: str, max_tokens: int = 2000,
+                      json_schema: Optional[Dict[str, Any]] = None,
+                      cache: bool = True) -> Dict[str, Any]:
         """
         Gera texto usando a API de IA.
         
         Args:
             prompt: Prompt para a API
             max_tokens: Número máximo de tokens a serem gerados
+            json_schema: Esquema JSON para restringir a resposta, quando suportado
+            cache: Se False, sempre chama a API, sem consultar nem atualizar o
+                cache de respostas (como ao gerar novamente as questões). O cache
+                só é usado com config.AI_TEMPERATURE até _MAX_CACHED_TEMPERATURE
+        
+        Returns:
+            Resposta da API
+        """
+        if not cache or config.AI_TEMPERATURE > _MAX_CACHED_TEMPERATURE:
+            return self._fetch_response(None, prompt, max_tokens, json_schema)
+        
+        # Prompts idênticos (como ao repetir uma etapa sem alterações) reaproveitam
+        # a resposta anterior, sem nova chamada à API
+        key = self._response_cache_key(prompt, max_tokens, json_schema)
+        cached = _RESPONSE_CACHE.get(key)
+        if cached is not None:
+            return cached
+        
+        # Chamadas simultâneas com o mesmo prompt aguardam a mesma requisição
+        return _IN_FLIGHT.do(key, self._fetch_response, key, prompt, max_tokens, json_schema)
+    
+    def _fetch_response(self, key: Optional[str], prompt: str, max_tokens: int,
+                        json_schema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Chama a API e armazena a resposta no cache.
+        
+        Args:
+            key: Chave do cache de respostas (None para não armazenar a resposta)
+            prompt: Prompt para a API
+            max_tokens: Número máximo de tokens a serem gerados
+            json_schema: Esquema JSON para restringir a resposta, quando suportado
+            
+        Returns:
+            Resposta da API, ou a resposta simulada em caso de erro se
+            config.AI_MOCK_ON_ERROR estiver ativo
+        
+        Raises:
+            AIClientError: Se a chamada à API falhar
+        """
+        try:
+            response = self._generate(prompt, max_tokens, json_schema)
+        except requests.exceptions.RequestException as e:
+            self._handle_api_error(e)
+            # Retorna uma resposta simulada para desenvolvimento (não armazenada no cache)
+            return self._get_mock_response(prompt)
+        
+        if key is not None:
+            _RESPONSE_CACHE.set(key, response)
+        return response
+    
+    def _handle_api_error(self, error: requests.exceptions.RequestException) -> None:
+        """
+        Registra uma falha da API e a propaga, exceto no modo de respostas simuladas.
+        
+        Args:
+            error: Exceção levantada pela chamada à API
+        
+        Raises:
+            AIClientError: Se config.AI_MOCK_ON_ERROR estiver desativado
+        """
+        provider = _PROVIDER_NAMES[self.provider]
+        logger.error("Erro ao chamar a API %s: %s", provider, error, extra={"provider": self.provider})
+        if not config.AI_MOCK_ON_ERROR:
+            raise AIClientError(f"Erro ao chamar a API {provider}: {error}") from error
+    
+    def _response_cache_key(self, prompt: str, max_tokens: int,
+                            json_schema: Optional[Dict[str, Any]]) -> str:
+        """
+        Calcula a chave do cache de respostas para uma chamada.
+        
+        Args:
+            prompt: Prompt para a API
+            max_tokens: Número máximo de tokens a serem gerados
+            json_schema: Esquema JSON da resposta, se houver
             
+        Returns:
+            Hash hexadecimal dos parâmetros da chamada
+        """
+        params = [self.provider, getattr(self, "model", "deepseek-chat"), config.AI_TEMPERATURE,
+                  max_tokens, json_schema, prompt]
+        content = json.dumps(params, ensure_ascii=False, sort_keys=True)
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+    
+    async def agenerate_text(self, prompt: str, max_tokens: int = 2000,
+                             json_schema: Optional[Dict[str, Any]] = None,
+                             cache: bool = True) -> Dict[str, Any]:
+        """
+        Versão assíncrona de generate_text.
+        
+        A chamada HTTP é executada em uma thread auxiliar, permitindo disparar
+        várias requisições em paralelo com asyncio.gather.
+        
+        Args:
+            prompt: Prompt para a API
+            max_tokens: Número máximo de tokens a serem gerados
+            json_schema: Esquema JSON para restringir a resposta, quando suportado
+            cache: Se False, sempre chama a API, sem usar o cache de respostas
+        
         Returns:
             Resposta da API
         """
-        if self.provider == "deepseek":
-            return self._generate_text_deepseek(prompt, max_tokens)
-        elif self.provider == "ollama":
-            return self._generate_text_ollama(prompt, max_tokens)
-        else:
-            raise ValueError(f"Provedor de IA não suportado: {self.provider}")
+        return await asyncio.to_thread(self.generate_text, prompt, max_tokens, json_schema, cache)
+    
+    def _post(self, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Envia uma requisição POST, repetindo-a em caso de falha transitória.
+        
+        Falhas de conexão, timeouts e os status de _RETRY_STATUS são repetidos
+        até config.AI_MAX_ATTEMPTS vezes, com espera exponencial e jitter
+        ("full jitter") limitada a config.AI_RETRY_MAX_WAIT. Quando a resposta
+        traz o cabeçalho Retry-After (comum em 429), ele define a espera.
+        
+        Cada tentativa respeita config.AI_RATE_LIMIT_RPS e
+        config.AI_MAX_CONCURRENCY. Com stream=True, a vaga de concorrência
+        só é liberada quando a resposta é fechada, pois o corpo continua
+        sendo lido depois do retorno.
+        
+        Args:
+            url: URL da requisição
+            **kwargs: Argumentos repassados a session.post
+        
+        Returns:
+            Resposta da última tentativa
+        """
+        attempts = max(1, config.AI_MAX_ATTEMPTS)
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            _RATE_LIMITER.acquire()
+            _CONCURRENCY.acquire()
+            try:
+                response = self.session.post(url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                _CONCURRENCY.release()
+                if last_attempt:
+                    raise
+                time.sleep(self._retry_delay(attempt))
+                continue
+            except BaseException:
+                _CONCURRENCY.release()
+                raise
+            
+            if kwargs.get("stream"):
+                self._release_on_close(response)
+            else:
+                _CONCURRENCY.release()
+            
+            if response.status_code not in _RETRY_STATUS or last_attempt:
+                return response
+            
+            delay = self._retry_delay(attempt, response.headers.get("Retry-After"))
+            response.close()
+            time.sleep(delay)
+    
+    @staticmethod
+    def _release_on_close(response: requests.Response) -> None:
+        """
+        Libera a vaga de _CONCURRENCY quando a resposta for fechada.
+        
+        Args:
+            response: Resposta HTTP aberta com stream=True
+        """
+        close = response.close
+        released = False
+        
+        def _close() -> None:
+            nonlocal released
+            try:
+                close()
+            finally:
+                # A resposta pode ser fechada mais de uma vez
+                if not released:
+                    released = True
+                    _CONCURRENCY.release()
+        
+        response.close = _close
+    
+    @staticmethod
+    def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Calcula a espera antes da próxima tentativa.
+        
+        Args:
+            attempt: Número da tentativa que falhou (a partir de 0)
+            retry_after: Valor do cabeçalho Retry-After, em segundos, se houver
+        
+        Returns:
+            Espera em segundos
+        """
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), config.AI_RETRY_MAX_WAIT)
+            except ValueError:
+                # Retry-After em formato de data: usa a espera exponencial
+                pass
+        
+        return random.uniform(0, min(config.AI_RETRY_MAX_WAIT, 2 ** attempt))
     
-    def _generate_text_deepseek(self, prompt: str, max_tokens: int = 2000) -> Dict[str, Any]:
+    def _generate_text_deepseek(self, prompt: str, max_tokens: int = 2000,
+                                json_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Gera texto usando a API DeepSeek.
         
         Args:
             prompt: Prompt para a API
             max_tokens: Número máximo de tokens a serem gerados
+            json_schema: Esquema JSON para a resposta (ativa o modo JSON da API)
+        
+        Returns:
+            Resposta da API
             
+        Raises:
+            requests.exceptions.RequestException: Se a chamada à API falhar
+        """
+        api_url, headers = self._next_endpoint()
+        
+        data = {
+            "model": "deepseek-chat",
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": config.AI_TEMPERATURE
+        }
+        
+        if json_schema is not None:
+            # A API DeepSeek aceita apenas o modo JSON genérico, sem esquema
+            data["response_format"] = {"type": "json_object"}
+        
+        response = self._post(
+            api_url,
+            headers=headers,
+            json=data,
+            timeout=config.REQUEST_TIMEOUT
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def _generate_text_ollama(self, prompt: str, max_tokens: int = 2000,
+                              json_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Gera texto usando a API Ollama.
+        
+        Args:
+            prompt: Prompt para a API
+            max_tokens: Número máximo de tokens a serem gerados
+            json_schema: Esquema JSON ao qual a resposta deve obedecer
+        
         Returns:
             Resposta da API
+            
+        Raises:
+            requests.exceptions.RequestException: Se a chamada à API falhar
         """
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
+        api_url, _ = self._next_endpoint()
+        data = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": True,
+            "options": {
+                "num_predict": max_tokens,
+                "temperature": config.AI_TEMPERATURE
+            }
+        }
+        
+        if json_schema is not None:
+            data["format"] = json_schema
+        
+        # A resposta é lida em streaming: o timeout passa a valer entre os
+        # trechos, e não para a geração inteira, que em modelos locais pode
+        # levar mais que config.REQUEST_TIMEOUT
+        with self._post(
+            api_url,
+            json=data,
+            timeout=config.REQUEST_TIMEOUT,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            content = "".join(self._iter_ollama_chunks(response))
+        
+        # Converte a resposta do Ollama para o formato do DeepSeek
+        return {
+            "choices": [
+                {
+                    "message": {
+                        "role": "assistant",
+                        "content": content
+                    }
+                }
+            ]
         }
+    
+    @staticmethod
+    def _iter_ollama_chunks(response: requests.Response) -> Iterator[str]:
+        """
+        Lê os trechos de texto de uma resposta em streaming do Ollama (uma linha JSON por trecho).
+        
+        Args:
+            response: Resposta HTTP aberta com stream=True
+        
+        Returns:
+            Iterador com os trechos de texto gerados
+        """
+        for line in response.iter_lines():
+            if not line:
+                continue
+            
+            chunk = json.loads(line)
+            content = chunk.get("response")
+            if content:
+                yield content
+            if chunk.get("done"):
+                break
+    
+    def generate_text_stream(self, prompt: str, max_tokens: int = 2000,
+                             json_schema: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        Gera texto usando a API de IA, devolvendo o conteúdo à medida que é gerado.
+        
+        Interromper a iteração encerra a conexão, o que também interrompe a
+        geração no servidor.
+        
+        Args:
+            prompt: Prompt para a API
+            max_tokens: Número máximo de tokens a serem gerados
+            json_schema: Esquema JSON para restringir a resposta, quando suportado
+        
+        Returns:
+            Iterador com os trechos de texto gerados
+        """
+        return self._generate_stream(prompt, max_tokens, json_schema)
+    
+    def _generate_text_stream_deepseek(self, prompt: str, max_tokens: int = 2000,
+                                       json_schema: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        Gera texto em modo streaming usando a API DeepSeek (Server-Sent Events).
+        
+        Args:
+            prompt: Prompt para a API
+            max_tokens: Número máximo de tokens a serem gerados
+            json_schema: Esquema JSON para a resposta (ativa o modo JSON da API)
+        
+        Returns:
+            Iterador com os trechos de texto gerados
+        """
+        api_url, headers = self._next_endpoint()
         
         data = {
             "model": "deepseek-chat",
@@ -70,68 +545,89 @@ class AIClient:
                 {"role": "user", "content": prompt}
             ],
             "max_tokens": max_tokens,
-            "temperature": 0.7
+            "temperature": config.AI_TEMPERATURE,
+            "stream": True
         }
         
+        if json_schema is not None:
+            # A API DeepSeek aceita apenas o modo JSON genérico, sem esquema
+            data["response_format"] = {"type": "json_object"}
+        
+        received = False
         try:
-            response = requests.post(
-                self.api_url,
+            with self._post(
+                api_url,
                 headers=headers,
                 json=data,
-                timeout=config.REQUEST_TIMEOUT
-            )
-            response.raise_for_status()
-            return response.json()
+                timeout=config.REQUEST_TIMEOUT,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                
+                for line in response.iter_lines():
+                    if not line.startswith(b"data:"):
+                        continue
+                    
+                    payload = line[5:].strip()
+                    if payload == b"[DONE]":
+                        break
+                    
+                    delta = json.loads(payload).get("choices", [{}])[0].get("delta", {})
+                    content = delta.get("content")
+                    if content:
+                        received = True
+                        yield content
         except requests.exceptions.RequestException as e:
-            print(f"Erro ao chamar a API DeepSeek: {e}")
-            # Retorna uma resposta simulada para desenvolvimento
-            return self._get_mock_response(prompt)
+            self._handle_api_error(e)
+            if not received:
+                # Retorna uma resposta simulada para desenvolvimento
+                yield self._get_mock_response(prompt)["choices"][0]["message"]["content"]
     
-    def _generate_text_ollama(self, prompt: str, max_tokens: int = 2000) -> Dict[str, Any]:
+    def _generate_text_stream_ollama(self, prompt: str, max_tokens: int = 2000,
+                                     json_schema: Optional[Dict[str, Any]] = None) -> Iterator[str]:
         """
-        Gera texto usando a API Ollama.
+        Gera texto em modo streaming usando a API Ollama (uma linha JSON por trecho).
         
         Args:
             prompt: Prompt para a API
             max_tokens: Número máximo de tokens a serem gerados
-            
+            json_schema: Esquema JSON ao qual a resposta deve obedecer
+        
         Returns:
-            Resposta da API
+            Iterador com os trechos de texto gerados
         """
+        api_url, _ = self._next_endpoint()
         data = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
+            "stream": True,
             "options": {
                 "num_predict": max_tokens,
-                "temperature": 0.7
+                "temperature": config.AI_TEMPERATURE
             }
         }
         
+        if json_schema is not None:
+            data["format"] = json_schema
+        
+        received = False
         try:
-            response = requests.post(
-                self.api_url,
+            with self._post(
+                api_url,
                 json=data,
-                timeout=config.REQUEST_TIMEOUT
-            )
-            response.raise_for_status()
-            
-            # Converte a resposta do Ollama para o formato do DeepSeek
-            ollama_response = response.json()
-            return {
-                "choices": [
-                    {
-                        "message": {
-                            "role": "assistant",
-                            "content": ollama_response.get("response", "")
-                        }
-                    }
-                ]
-            }
+                timeout=config.REQUEST_TIMEOUT,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                
+                for content in self._iter_ollama_chunks(response):
+                    received = True
+                    yield content
         except requests.exceptions.RequestException as e:
-            print(f"Erro ao chamar a API Ollama: {e}")
-            # Retorna uma resposta simulada para desenvolvimento
-            return self._get_mock_response(prompt)
+            self._handle_api_error(e)
+            if not received:
+                # Retorna uma resposta simulada para desenvolvimento
+                yield self._get_mock_response(prompt)["choices"][0]["message"]["content"]
     
     def _get_mock_response(self, prompt: str) -> Dict[str, Any]:
         """
@@ -139,30 +635,26 @@ class AIClient:
         
         Args:
             prompt: Prompt para a API
-            
+        
         Returns:
             Resposta simulada
         """
-        # Verifica o tipo de agente no prompt
-        if "Conteudista" in prompt:
-            return self._get_mock_content_response()
-        elif "Revisor Técnico" in prompt:
-            return self._get_mock_rt_response()
-        elif "Design Educacional" in prompt:
-            return self._get_mock_de_response()
-        elif "Validador" in prompt:
-            return self._get_mock_validator_response()
-        else:
-            return {
-                "choices": [
-                    {
-                        "message": {
-                            "role": "assistant",
-                            "content": "Esta é uma resposta simulada para desenvolvimento."
-                        }
+        # Identifica o agente pelo papel definido no prompt (os prompts também
+        # citam os outros agentes, por exemplo no modelo de relatório do Validador)
+        match = _MOCK_ROLE_RE.search(prompt)
+        if match:
+            return _MOCK_RESPONSES[match.group(1)](self)
+        
+        return {
+            "choices": [
+                {
+                    "message": {
+                        "role": "assistant",
+                        "content": "Esta é uma resposta simulada para desenvolvimento."
                     }
-                ]
-            }
+                }
+            ]
+        }
     
     def _get_mock_content_response(self) -> Dict[str, Any]:
         """
@@ -455,21 +947,17 @@ class AIClient:
         
         Args:
             agent_type: Tipo de agente (content, rt, de, validator)
-            task_data: Dados da tarefa
-            
+            task_data: Dados da tarefa; as questões podem ser passadas já
+                serializadas com to_prompt_json
+        
         Returns:
             Prompt formatado
         """
-        if agent_type == "content":
-            return self._create_content_agent_prompt(task_data)
-        elif agent_type == "rt":
-            return self._create_rt_agent_prompt(task_data)
-        elif agent_type == "de":
-            return self._create_de_agent_prompt(task_data)
-        elif agent_type == "validator":
-            return self._create_validator_agent_prompt(task_data)
-        else:
+        builder = _PROMPT_BUILDERS.get(agent_type)
+        if builder is None:
             raise ValueError(f"Tipo de agente não suportado: {agent_type}")
+        
+        return builder(self, task_data)
     
     def _create_content_agent_prompt(self, task_data: Dict[str, Any]) -> str:
         """
@@ -477,35 +965,35 @@ class AIClient:
         
         Args:
             task_data: Dados da tarefa
-            
+        
         Returns:
             Prompt formatado
         """
         return f"""
         Você é um Professor-Conteudista especializado em elaborar questões educacionais de alta qualidade.
         
-        OBJETIVOS DE APRENDIZAGEM:
-        {task_data["objectives"]}
-        
-        FUNDAMENTAÇÃO TEÓRICA:
-        {task_data["theory"]}
-        
-        TEMPLATES DE QUESTÕES:
-        {task_data["template"]}
-        
-        PALAVRAS A EVITAR (não use estas palavras ou similares):
-        {task_data["stopwords"]}
-        
         INSTRUÇÕES:
         1. Elabore UMA questão para CADA objetivo de aprendizagem fornecido.
         2. Siga rigorosamente o formato dos templates fornecidos.
-        3. Evite usar palavras restritivas listadas acima.
+        3. Evite usar palavras restritivas listadas abaixo.
         4. Crie questões que avaliem compreensão e aplicação, não memorização.
         5. Forneça feedback detalhado para cada alternativa.
         6. Cada questão deve ter exatamente 5 alternativas (a, b, c, d, e), sendo apenas uma correta.
         7. Todas as alternativas devem ter extensão semelhante.
         
         Por favor, elabore as questões no formato JSON seguindo a estrutura dos templates fornecidos.
+        
+        TEMPLATES DE QUESTÕES:
+        {task_data["template"]}
+        
+        PALAVRAS A EVITAR (não use estas palavras ou similares):
+        {task_data["stopwords"]}
+        
+        OBJETIVOS DE APRENDIZAGEM:
+        {task_data["objectives"]}
+        
+        FUNDAMENTAÇÃO TEÓRICA:
+        {task_data["theory"]}
         """
     
     def _create_rt_agent_prompt(self, task_data: Dict[str, Any]) -> str:
@@ -514,22 +1002,13 @@ class AIClient:
         
         Args:
             task_data: Dados da tarefa
-            
+        
         Returns:
             Prompt formatado
         """
         return f"""
         Você é um Revisor Técnico especializado em validar a precisão técnica de questões educacionais.
         
-        QUESTÕES A SEREM REVISADAS:
-        {json.dumps(task_data["questions"], ensure_ascii=False, indent=2)}
-        
-        CHECKLIST DE VALIDAÇÃO RT:
-        {task_data["rt_checklist"]}
-        
-        PALAVRAS A EVITAR (verifique e substitua estas palavras ou similares):
-        {task_data["stopwords"]}
-        
         INSTRUÇÕES:
         1. Analise cada questão quanto à precisão técnica do conteúdo.
         2. Verifique se as questões estão alinhadas com os objetivos de aprendizagem.
@@ -553,6 +1032,15 @@ class AIClient:
           }}
         }}
         ```
+        
+        CHECKLIST DE VALIDAÇÃO RT:
+        {task_data["rt_checklist"]}
+        
+        PALAVRAS A EVITAR (verifique e substitua estas palavras ou similares):
+        {task_data["stopwords"]}
+        
+        QUESTÕES A SEREM REVISADAS:
+        {_questions_json(task_data["questions"])}
         """
     
     def _create_de_agent_prompt(self, task_data: Dict[str, Any]) -> str:
@@ -561,22 +1049,13 @@ class AIClient:
         
         Args:
             task_data: Dados da tarefa
-            
+        
         Returns:
             Prompt formatado
         """
         return f"""
         Você é um Designer Educacional especializado em validar a estrutura e qualidade pedagógica de questões educacionais.
         
-        QUESTÕES A SEREM REVISADAS:
-        {json.dumps(task_data["questions"], ensure_ascii=False, indent=2)}
-        
-        CHECKLIST DE VALIDAÇÃO DE:
-        {task_data["de_checklist"]}
-        
-        PALAVRAS A EVITAR (verifique e substitua estas palavras ou similares):
-        {task_data["stopwords"]}
-        
         INSTRUÇÕES:
         1. Analise cada questão quanto à clareza, estrutura e qualidade pedagógica.
         2. Verifique se as questões seguem o formato adequado.
@@ -600,6 +1079,15 @@ class AIClient:
           }}
         }}
         ```
+        
+        CHECKLIST DE VALIDAÇÃO DE:
+        {task_data["de_checklist"]}
+        
+        PALAVRAS A EVITAR (verifique e substitua estas palavras ou similares):
+        {task_data["stopwords"]}
+        
+        QUESTÕES A SEREM REVISADAS:
+        {_questions_json(task_data["questions"])}
         """
     
     def _create_validator_agent_prompt(self, task_data: Dict[str, Any]) -> str:
@@ -608,16 +1096,13 @@ class AIClient:
         
         Args:
             task_data: Dados da tarefa
-            
+        
         Returns:
             Prompt formatado
         """
         return f"""
         Você é um Validador Final especializado em garantir a qualidade geral de questões educacionais.
         
-        QUESTÕES A SEREM VALIDADAS:
-        {json.dumps(task_data["questions"], ensure_ascii=False, indent=2)}
-        
         INSTRUÇÕES:
         1. Analise cada questão quanto à qualidade geral, considerando as validações RT e DE já realizadas.
         2. Verifique se todas as questões estão completas e prontas para uso.
@@ -625,11 +1110,13 @@ class AIClient:
         4. Gere um relatório de desenvolvimento explicando a lógica adotada no processo.
         5. Gere um documento final com todas as questões validadas.
         
-        Por favor, retorne:
+        Por favor, retorne um único objeto JSON com as chaves:
         
-        1. As questões validadas no mesmo formato JSON, adicionando um campo "validation.final" com o resultado da sua análise para cada questão.
+        - "questions": as questões validadas no mesmo formato JSON, adicionando um campo "validation.final" com o resultado da sua análise para cada questão.
+        - "development_report": o relatório de desenvolvimento, em Markdown.
+        - "final_document": o documento final, em Markdown.
         
-        2. Um relatório de desenvolvimento em formato Markdown:
+        O relatório de desenvolvimento deve seguir esta estrutura:
         ```markdown
         # Relatório de Desenvolvimento
         
@@ -665,7 +1152,7 @@ class AIClient:
         ...
         ```
         
-        3. Um documento final com todas as questões validadas em formato Markdown:
+        O documento final deve seguir esta estrutura:
         ```markdown
         # Questões Validadas
         
@@ -697,5 +1184,48 @@ class AIClient:
         
         ...
         ```
+        
+        QUESTÕES A SEREM VALIDADAS:
+        {_questions_json(task_data["questions"])}
         """
 
+
+# Construtor do prompt de cada tipo de agente
+_PROMPT_BUILDERS = {
+    "content": AIClient._create_content_agent_prompt,
+    "rt": AIClient._create_rt_agent_prompt,
+    "de": AIClient._create_de_agent_prompt,
+    "validator": AIClient._create_validator_agent_prompt
+}
+
+# Resposta simulada de cada agente, pelo papel identificado no prompt
+_MOCK_RESPONSES = {
+    "Professor-Conteudista": AIClient._get_mock_content_response,
+    "Revisor Técnico": AIClient._get_mock_rt_response,
+    "Designer Educacional": AIClient._get_mock_de_response,
+    "Validador Final": AIClient._get_mock_validator_response
+}
+
+
+_shared_client: Optional[AIClient] = None
+_shared_client_lock = threading.Lock()
+
+
+def get_ai_client() -> AIClient:
+    """
+    Retorna o cliente de IA compartilhado pelos agentes.
+    
+    O cliente é criado na primeira chamada, de modo que todos os agentes usam o
+    mesmo pool de conexões HTTP.
+    
+    Returns:
+        Instância compartilhada de AIClient
+    """
+    global _shared_client
+    
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = AIClient()
+    
+    return _shared_client
@@ -0,0 +1,76 @@
+"""
+Utilitários de cache em memória.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Cache em memória com descarte do item menos usado recentemente e,
+    opcionalmente, dos itens mais antigos que o tempo de validade.
+    
+    Pode ser compartilhado entre threads.
+    """
+    
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = None):
+        """
+        Inicializa o cache.
+        
+        Args:
+            maxsize: Número máximo de itens mantidos no cache
+            ttl: Tempo de validade dos itens, em segundos (None para não expirar)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """
+        Obtém um item do cache.
+        
+        Args:
+            key: Chave do item
+            default: Valor retornado se a chave não estiver no cache
+            
+        Returns:
+            Valor armazenado ou o valor padrão
+        """
+        with self._lock:
+            if key not in self._data:
+                return default
+            expires_at, value = self._data[key]
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Armazena um item no cache, descartando o menos usado se necessário.
+        
+        Args:
+            key: Chave do item
+            value: Valor a ser armazenado
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def clear(self) -> None:
+        """
+        Remove todos os itens do cache.
+        """
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,104 @@
+"""
+Utilitários de concorrência.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas simultâneas com a mesma chave em uma única execução.
+    
+    A primeira chamada executa a função; as que chegam enquanto ela está em
+    andamento aguardam e recebem o mesmo resultado (ou a mesma exceção).
+    """
+    
+    def __init__(self):
+        """
+        Inicializa o agrupador.
+        """
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Executa a função, ou aguarda a execução em andamento com a mesma chave.
+        
+        Args:
+            key: Chave que identifica a execução
+            fn: Função a ser executada
+            *args: Argumentos posicionais da função
+            **kwargs: Argumentos nomeados da função
+        
+        Returns:
+            Resultado da função
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        
+        if not leader:
+            return future.result()
+        
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+    
+    def __len__(self) -> int:
+        return len(self._calls)
+
+
+class TokenBucket:
+    """
+    Limita a taxa de chamadas com o algoritmo de balde de fichas.
+    
+    O balde começa cheio e é reabastecido continuamente à taxa definida; cada
+    chamada consome uma ficha e, se o balde estiver vazio, aguarda a próxima.
+    Rajadas de até `capacity` chamadas passam sem espera.
+    """
+    
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Inicializa o balde.
+        
+        Args:
+            rate: Fichas repostas por segundo (0 desativa o limite)
+            capacity: Número máximo de fichas acumuladas
+        """
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """
+        Consome uma ficha, aguardando até que haja uma disponível.
+        """
+        if self.rate <= 0:
+            return
+        
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # A ficha é reservada já na entrada; quem chega depois espera a sua vez
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        
+        if wait:
+            time.sleep(wait)
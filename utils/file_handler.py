@@ -5,12 +5,17 @@ Utilitários para manipulação de arquivos.
 import os
 import json
 import shutil
+import logging
+import tempfile
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Union
 
 import config
 
 
+logger = logging.getLogger(__name__)
+
+
 def ensure_dir(directory: Union[str, Path]) -> Path:
     """
     Garante que o diretório existe, criando-o se necessário.
@@ -26,6 +31,48 @@ def ensure_dir(directory: Union[str, Path]) -> Path:
     return path
 
 
+def _replace_file(file_path: Path, text: str, backup: bool) -> None:
+    """
+    Substitui o conteúdo de um arquivo de forma atômica.
+    
+    O texto é gravado em um arquivo temporário no mesmo diretório, que então
+    toma o lugar do original com os.replace: quem lê o arquivo (ou um processo
+    interrompido no meio da gravação) nunca encontra um arquivo parcial. O
+    backup é um link físico para o conteúdo anterior, sem copiar os dados.
+    
+    Args:
+        file_path: Caminho do arquivo
+        text: Novo conteúdo
+        backup: Se True, mantém o conteúdo anterior em <arquivo>.bak
+    """
+    # Cria o diretório se não existir
+    ensure_dir(file_path.parent)
+    
+    fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp")
+    try:
+        with open(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        
+        # mkstemp cria o arquivo acessível apenas ao dono; mantém as permissões usuais
+        exists = file_path.exists()
+        os.chmod(tmp_path, file_path.stat().st_mode if exists else 0o644)
+        
+        # Cria backup se solicitado e o arquivo existir
+        if backup and exists:
+            backup_path = file_path.with_suffix(f"{file_path.suffix}.bak")
+            backup_path.unlink(missing_ok=True)
+            try:
+                os.link(file_path, backup_path)
+            except OSError:
+                # Sistemas de arquivos sem suporte a links físicos
+                shutil.copy2(file_path, backup_path)
+        
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
 def read_json(file_path: Union[str, Path]) -> Dict[str, Any]:
     """
     Lê um arquivo JSON.
@@ -40,11 +87,12 @@ def read_json(file_path: Union[str, Path]) -> Dict[str, Any]:
         with open(file_path, 'r', encoding='utf-8') as f:
             return json.load(f)
     except (json.JSONDecodeError, FileNotFoundError) as e:
-        print(f"Erro ao ler arquivo JSON {file_path}: {e}")
+        logger.error("Erro ao ler arquivo JSON %s: %s", file_path, e)
         return {}
 
 
-def write_json(data: Dict[str, Any], file_path: Union[str, Path], backup: bool = True) -> bool:
+def write_json(data: Dict[str, Any], file_path: Union[str, Path], backup: bool = True,
+               indent: Optional[int] = 2) -> bool:
     """
     Escreve dados em um arquivo JSON.
     
@@ -52,26 +100,20 @@ def write_json(data: Dict[str, Any], file_path: Union[str, Path], backup: bool =
         data: Dados a serem escritos
         file_path: Caminho do arquivo
         backup: Se True, cria um backup do arquivo existente
+        indent: Indentação do JSON; None gera JSON compacto, bem mais rápido de serializar
         
     Returns:
         True se a operação foi bem-sucedida, False caso contrário
     """
-    file_path = Path(file_path)
-    
-    # Cria o diretório se não existir
-    ensure_dir(file_path.parent)
-    
-    # Cria backup se solicitado e o arquivo existir
-    if backup and file_path.exists():
-        backup_path = file_path.with_suffix(f"{file_path.suffix}.bak")
-        shutil.copy2(file_path, backup_path)
-    
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # json.dumps serializa tudo de uma vez (usando o codificador em C quando
+        # não há indentação), ao contrário de json.dump, que escreve aos pedaços
+        text = json.dumps(data, ensure_ascii=False, indent=indent,
+                          separators=None if indent is not None else (',', ':'))
+        _replace_file(Path(file_path), text, backup)
         return True
     except Exception as e:
-        print(f"Erro ao escrever arquivo JSON {file_path}: {e}")
+        logger.error("Erro ao escrever arquivo JSON %s: %s", file_path, e)
         return False
 
 
@@ -89,7 +131,7 @@ def read_text(file_path: Union[str, Path]) -> str:
         with open(file_path, 'r', encoding='utf-8') as f:
             return f.read()
     except FileNotFoundError as e:
-        print(f"Erro ao ler arquivo de texto {file_path}: {e}")
+        logger.error("Erro ao ler arquivo de texto %s: %s", file_path, e)
         return ""
 
 
@@ -105,22 +147,11 @@ def write_text(text: str, file_path: Union[str, Path], backup: bool = True) -> b
     Returns:
         True se a operação foi bem-sucedida, False caso contrário
     """
-    file_path = Path(file_path)
-    
-    # Cria o diretório se não existir
-    ensure_dir(file_path.parent)
-    
-    # Cria backup se solicitado e o arquivo existir
-    if backup and file_path.exists():
-        backup_path = file_path.with_suffix(f"{file_path.suffix}.bak")
-        shutil.copy2(file_path, backup_path)
-    
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(text)
+        _replace_file(Path(file_path), text, backup)
         return True
     except Exception as e:
-        print(f"Erro ao escrever arquivo de texto {file_path}: {e}")
+        logger.error("Erro ao escrever arquivo de texto %s: %s", file_path, e)
         return False
 
 
@@ -160,11 +191,11 @@ def copy_file(source: Union[str, Path], destination: Union[str, Path]) -> bool:
         shutil.copy2(source, destination)
         return True
     except Exception as e:
-        print(f"Erro ao copiar arquivo {source} para {destination}: {e}")
+        logger.error("Erro ao copiar arquivo %s para %s: %s", source, destination, e)
         return False
 
 
-def save_task_data(task_id: str, data: Dict[str, Any]) -> str:
+def save_task_data(task_id: str, data: Dict[str, Any]) -> Optional[str]:
     """
     Salva os dados de uma tarefa.
     
@@ -173,10 +204,12 @@ def save_task_data(task_id: str, data: Dict[str, Any]) -> str:
         data: Dados da tarefa
         
     Returns:
-        Caminho do arquivo salvo
+        Caminho do arquivo salvo, ou None se não for possível salvá-lo
     """
     file_path = config.DATA_DIR / f"task_{task_id}.json"
-    write_json(data, file_path)
+    # Estado intermediário, regravado a cada etapa: JSON compacto
+    if not write_json(data, file_path, indent=None):
+        return None
     return str(file_path)
 
 
@@ -194,7 +227,26 @@ def load_task_data(task_id: str) -> Dict[str, Any]:
     return read_json(file_path)
 
 
-def save_questions(task_id: str, questions: List[Dict[str, Any]]) -> str:
+def get_output_paths(task_id: str) -> Dict[str, Path]:
+    """
+    Retorna os caminhos dos arquivos de saída de uma tarefa.
+    
+    Args:
+        task_id: ID da tarefa
+        
+    Returns:
+        Dicionário com os caminhos do arquivo de questões, do relatório, do documento final
+        e das questões rejeitadas
+    """
+    return {
+        "questions": config.OUTPUT_DIR / f"questions_{task_id}.json",
+        "report": config.OUTPUT_DIR / f"development_{task_id}.md",
+        "document": config.OUTPUT_DIR / f"final_document_{task_id}.md",
+        "rejected": config.OUTPUT_DIR / f"rejected_{task_id}.json"
+    }
+
+
+def save_questions(task_id: str, questions: List[Dict[str, Any]]) -> Optional[str]:
     """
     Salva as questões de uma tarefa.
     
@@ -203,14 +255,32 @@ def save_questions(task_id: str, questions: List[Dict[str, Any]]) -> str:
         questions: Lista de questões
         
     Returns:
-        Caminho do arquivo salvo
+        Caminho do arquivo salvo, ou None se não for possível salvá-lo
+    """
+    file_path = get_output_paths(task_id)["questions"]
+    if not write_json({"questions": questions}, file_path):
+        return None
+    return str(file_path)
+
+
+def save_rejected_questions(task_id: str, questions: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Salva as questões rejeitadas na verificação estrutural, para que possam ser regeneradas.
+    
+    Args:
+        task_id: ID da tarefa
+        questions: Lista de questões rejeitadas, com os problemas encontrados
+        
+    Returns:
+        Caminho do arquivo salvo, ou None se não for possível salvá-lo
     """
-    file_path = config.OUTPUT_DIR / f"questions_{task_id}.json"
-    write_json({"questions": questions}, file_path)
+    file_path = get_output_paths(task_id)["rejected"]
+    if not write_json({"questions": questions}, file_path):
+        return None
     return str(file_path)
 
 
-def save_report(task_id: str, report_type: str, report_content: str) -> str:
+def save_report(task_id: str, report_type: str, report_content: str) -> Optional[str]:
     """
     Salva um relatório.
     
@@ -220,14 +290,15 @@ def save_report(task_id: str, report_type: str, report_content: str) -> str:
         report_content: Conteúdo do relatório
         
     Returns:
-        Caminho do arquivo salvo
+        Caminho do arquivo salvo, ou None se não for possível salvá-lo
     """
     file_path = config.OUTPUT_DIR / f"{report_type}_{task_id}.md"
-    write_text(report_content, file_path)
+    if not write_text(report_content, file_path):
+        return None
     return str(file_path)
 
 
-def save_final_document(task_id: str, document_content: str) -> str:
+def save_final_document(task_id: str, document_content: str) -> Optional[str]:
     """
     Salva o documento final.
     
@@ -236,9 +307,10 @@ def save_final_document(task_id: str, document_content: str) -> str:
         document_content: Conteúdo do documento
         
     Returns:
-        Caminho do arquivo salvo
+        Caminho do arquivo salvo, ou None se não for possível salvá-lo
     """
-    file_path = config.OUTPUT_DIR / f"final_document_{task_id}.md"
-    write_text(document_content, file_path)
+    file_path = get_output_paths(task_id)["document"]
+    if not write_text(document_content, file_path):
+        return None
     return str(file_path)
 
@@ -4,7 +4,154 @@ Utilitários para processamento de texto.
 
 import re
 import json
-from typing import Dict, Any, List, Optional, Set, Tuple
+from functools import lru_cache, partial
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Pattern, Set, Tuple
+
+
+# Padrões usados pelo leitor de JSON. Cada um salta direto para o próximo
+# caractere relevante, de modo que o texto é percorrido uma única vez.
+_JSON_OPEN_RE = re.compile(r"[{\[]|```")
+_JSON_STRUCTURE_RE = re.compile(r'[{}\[\]"]|```')
+_JSON_STRING_RE = re.compile(r'\\.|["\n]', re.DOTALL)
+
+# Blocos de código Markdown com as seções do relatório de validação
+_REPORT_BLOCK_RE = re.compile(
+    r"```(?:markdown)?\s*(# (Relatório de Desenvolvimento|Questões Validadas)[\s\S]*?)```",
+    re.IGNORECASE
+)
+_REPORT_SECTION_KEYS = {
+    "relatório de desenvolvimento": "development_report",
+    "questões validadas": "final_document"
+}
+_TOP_LEVEL_HEADER_RE = re.compile(r"^[ \t]*#\s", re.MULTILINE)
+
+# Cabeçalhos Markdown de qualquer nível (# a ######), em qualquer linha do texto
+_MARKDOWN_HEADER_RE = re.compile(r"^(#{1,6})[^\S\n]+(.+)$", re.MULTILINE)
+
+# Objetivos numerados (Obj.1:, Objetivo 1:, etc.) e verbos que indicam um objetivo
+_OBJECTIVE_RE = re.compile(
+    r"(?:Obj(?:etivo)?\.?\s*(\d+)[:\.\)]\s*)(.*?)(?=(?:\n\s*Obj(?:etivo)?\.?\s*\d+[:\.\)])|$)",
+    re.DOTALL
+)
+_OBJECTIVE_VERB_RE = re.compile(r"identificar|descrever|analisar|avaliar|compreender", re.IGNORECASE)
+
+# Questões em texto livre, usadas quando a resposta não contém JSON
+_SINGLE_ANSWER_RE = re.compile(
+    r"(?:Questão|Question)\s+(\d+).*?(?:Contextualização|Context):(.*?)(?:Enunciado|Statement):(.*?)"
+    r"(?:Alternativas|Alternatives):(.*?)(?:Feedback):(.*?)(?=(?:Questão|Question)\s+\d+|$)",
+    re.DOTALL | re.IGNORECASE
+)
+_ALTERNATIVE_RE = re.compile(r"([a-e])\)\s*(.*?)(?=(?:[a-e]\))|$)", re.DOTALL)
+_FEEDBACK_RE = re.compile(r"([a-e])\)\s*(Correta|Incorreta)\.?\s*(.*?)(?=(?:[a-e]\))|$)", re.DOTALL | re.IGNORECASE)
+
+# Substituições padrão das palavras restritivas
+_DEFAULT_REPLACEMENTS = {
+    "limita-se": "abrange",
+    "estritamente": "adequadamente",
+    "apenas": "principalmente",
+    "exclusivamente": "especialmente",
+    "somente": "preferencialmente",
+    "unicamente": "particularmente",
+    "restritivamente": "apropriadamente",
+    "rigorosamente": "cuidadosamente",
+    "especificamente": "notadamente",
+    "exatamente": "precisamente",
+    "precisamente": "detalhadamente",
+    "unilateralmente": "diretamente",
+    "singularmente": "distintamente",
+    "determinadamente": "consistentemente",
+    "explicitamente": "claramente",
+    "meramente": "basicamente",
+    "unicidade": "característica",
+    "nada além de": "principalmente",
+    "só isso": "isso",
+    "e somente isso": "entre outros aspectos",
+    "de forma exclusiva": "de forma destacada",
+    "de modo restrito": "de modo específico",
+    "de maneira limitada": "de maneira particular",
+    "sem exceções": "em geral"
+}
+
+
+class _JSONScanner:
+    """
+    Localiza blocos JSON de nível mais alto em um texto, em uma única passada.
+    
+    Acompanha a profundidade de chaves/colchetes e o estado de strings
+    (incluindo escapes), sem retroceder. Cercas de código (```) fora de strings
+    e quebras de linha dentro de strings reiniciam o estado, de modo que um
+    caractere solto em texto livre não impede a leitura dos blocos seguintes. O texto pode ser fornecido em partes.
+    """
+    
+    def __init__(self):
+        """
+        Inicializa o leitor.
+        """
+        self._buffer = ""
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+    
+    def feed(self, text: str) -> List[str]:
+        """
+        Acrescenta texto ao leitor.
+        
+        Args:
+            text: Próximo trecho do texto
+            
+        Returns:
+            Lista de blocos JSON completos encontrados até o momento
+        """
+        self._buffer += text
+        buffer = self._buffer
+        spans = []
+        
+        while True:
+            if self._in_string:
+                match = _JSON_STRING_RE.search(buffer, self._pos)
+            elif self._depth:
+                match = _JSON_STRUCTURE_RE.search(buffer, self._pos)
+            else:
+                match = _JSON_OPEN_RE.search(buffer, self._pos)
+            
+            if match is None:
+                # Mantém os dois últimos caracteres, que podem ser o início de
+                # uma cerca ou de um escape completado no próximo trecho
+                self._pos = max(self._pos, len(buffer) - 2)
+                break
+            
+            token = match.group()
+            self._pos = match.end()
+            
+            if self._in_string:
+                if len(token) == 2:
+                    continue  # Caractere escapado dentro da string
+                self._in_string = False
+                if token == "\n":
+                    # Strings JSON não contêm quebras de linha: não era um bloco JSON
+                    self._depth = 0
+            elif token == "```":
+                self._depth = 0
+            elif token == '"':
+                self._in_string = True
+            elif token in "{[":
+                if not self._depth:
+                    self._start = match.start()
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if not self._depth:
+                    spans.append(buffer[self._start:self._pos])
+        
+        # Descarta o texto já processado que não pertence a um bloco aberto
+        keep_from = self._start if self._depth else self._pos
+        if keep_from > 0:
+            self._buffer = buffer[keep_from:]
+            self._pos -= keep_from
+            self._start -= keep_from
+        
+        return spans
 
 
 def extract_json_from_text(text: str) -> Dict[str, Any]:
@@ -17,33 +164,58 @@ def extract_json_from_text(text: str) -> Dict[str, Any]:
     Returns:
         Dicionário com o conteúdo JSON extraído
     """
-    # Procura por blocos de código JSON
-    json_pattern = r"```(?:json)?\s*([\s\S]*?)```"
-    matches = re.findall(json_pattern, text)
-    
-    if matches:
-        # Usa o maior bloco encontrado (provavelmente o mais completo)
-        json_str = max(matches, key=len).strip()
+    # Usa o maior bloco válido encontrado (provavelmente o mais completo).
+    # Os candidatos são testados do maior para o menor, de modo que em geral
+    # apenas um bloco precisa ser decodificado.
+    for json_str in sorted(_JSONScanner().feed(text), key=len, reverse=True):
         try:
-            return json.loads(json_str)
-        except json.JSONDecodeError as e:
-            print(f"Erro ao decodificar JSON: {e}")
-    
-    # Se não encontrou blocos de código, tenta extrair diretamente
-    try:
-        # Procura por chaves de abertura e fechamento
-        start = text.find('{')
-        end = text.rfind('}')
-        if start != -1 and end != -1 and start < end:
-            json_str = text[start:end+1]
-            return json.loads(json_str)
-    except json.JSONDecodeError:
-        pass
-    
-    # Se tudo falhar, retorna um dicionário vazio
+            value = json.loads(json_str)
+        except json.JSONDecodeError:
+            continue
+        # Ignora valores soltos no texto, como a citação "[1]"
+        if _is_json_document(value):
+            return value
+    
     return {}
 
 
+def _is_json_document(value: Any) -> bool:
+    """
+    Verifica se um valor JSON tem a forma de uma resposta dos agentes.
+    
+    Args:
+        value: Valor JSON decodificado
+        
+    Returns:
+        True para objetos e listas não vazias de objetos
+    """
+    if isinstance(value, dict):
+        return True
+    return isinstance(value, list) and bool(value) and all(isinstance(item, dict) for item in value)
+
+
+def iter_json_objects(chunks: Iterable[str]) -> Iterator[Any]:
+    """
+    Extrai blocos JSON de um texto recebido em partes (por exemplo, em streaming).
+    
+    Cada bloco é devolvido assim que é fechado, sem esperar o restante do texto.
+    
+    Args:
+        chunks: Trechos do texto, na ordem em que são recebidos
+        
+    Returns:
+        Iterador com os valores JSON encontrados
+    """
+    scanner = _JSONScanner()
+    
+    for chunk in chunks:
+        for json_str in scanner.feed(chunk):
+            try:
+                yield json.loads(json_str)
+            except json.JSONDecodeError:
+                continue
+
+
 def extract_markdown_sections(text: str) -> Dict[str, str]:
     """
     Extrai seções de um texto em formato Markdown.
@@ -55,30 +227,58 @@ def extract_markdown_sections(text: str) -> Dict[str, str]:
         Dicionário com as seções extraídas
     """
     sections = {}
-    current_section = "default"
-    current_content = []
-    
-    # Padrão para cabeçalhos Markdown
-    header_pattern = r"^(#{1,6})\s+(.+)$"
-    
-    for line in text.split('\n'):
-        match = re.match(header_pattern, line)
-        if match:
-            # Se encontrou um cabeçalho, salva a seção atual e inicia uma nova
-            if current_content:
-                sections[current_section] = '\n'.join(current_content).strip()
-                current_content = []
-            
-            level = len(match.group(1))  # Número de # no cabeçalho
-            title = match.group(2).strip()
-            current_section = f"h{level}:{title}"
-            current_content.append(line)
-        else:
-            current_content.append(line)
     
-    # Salva a última seção
-    if current_content:
-        sections[current_section] = '\n'.join(current_content).strip()
+    # Localiza todos os cabeçalhos em uma única varredura; cada seção vai do
+    # seu cabeçalho até o início do próximo
+    matches = list(_MARKDOWN_HEADER_RE.finditer(text))
+    
+    # Texto antes do primeiro cabeçalho
+    first_start = matches[0].start() if matches else len(text) + 1
+    if first_start > 0:
+        sections["default"] = text[:first_start].strip()
+    
+    for index, match in enumerate(matches):
+        level = len(match.group(1))  # Número de # no cabeçalho
+        title = match.group(2).strip()
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(text)
+        sections[f"h{level}:{title}"] = text[match.start():end].strip()
+    
+    return sections
+
+
+def extract_report_sections(text: str) -> Dict[str, str]:
+    """
+    Extrai o relatório de desenvolvimento e o documento final da resposta do validador.
+    
+    Args:
+        text: Texto da resposta, com as seções em blocos de código Markdown ou soltas
+        
+    Returns:
+        Dicionário com as chaves "development_report" e "final_document" encontradas
+    """
+    sections = {}
+    
+    # Sem cabeçalhos Markdown não há seções (comum em respostas de erro ou incompletas)
+    if "#" not in text:
+        return sections
+    
+    # Procura as duas seções em blocos de código com uma única varredura
+    if "```" in text:
+        for match in _REPORT_BLOCK_RE.finditer(text):
+            key = _REPORT_SECTION_KEYS[match.group(2).lower()]
+            sections.setdefault(key, match.group(1).strip())
+    
+    # Se não encontrou nos blocos de código, tenta extrair diretamente
+    if "development_report" not in sections:
+        dev_start = text.find("# Relatório de Desenvolvimento")
+        if dev_start != -1:
+            dev_end = _TOP_LEVEL_HEADER_RE.search(text, dev_start + 1)
+            sections["development_report"] = text[dev_start:dev_end.start() if dev_end else len(text)].strip()
+    
+    if "final_document" not in sections:
+        doc_start = text.find("# Questões Validadas")
+        if doc_start != -1:
+            sections["final_document"] = text[doc_start:].strip()
     
     return sections
 
@@ -94,24 +294,98 @@ def check_restricted_words(text: str, stopwords: List[str]) -> List[Tuple[str, i
     Returns:
         Lista de tuplas (palavra_encontrada, posição)
     """
-    found = []
-    text_lower = text.lower()
+    # Uma única varredura com a expressão compilada para toda a lista,
+    # em vez de uma busca para cada palavra
+    words = _stopword_lookup(tuple(stopwords))
     
-    for word in stopwords:
-        word_lower = word.lower()
-        start = 0
-        while True:
-            pos = text_lower.find(word_lower, start)
-            if pos == -1:
-                break
-            found.append((word, pos))
-            start = pos + len(word)
+    return [
+        (words.get(match.group().lower(), match.group()), match.start())
+        for match in compile_restricted_words(stopwords).finditer(text)
+    ]
+
+
+@lru_cache(maxsize=32)
+def _stopword_lookup(stopwords: Tuple[str, ...]) -> Dict[str, str]:
+    """
+    Mapeia cada palavra restritiva, em minúsculas, para a forma original da lista.
+    
+    Args:
+        stopwords: Tupla de palavras restritivas
+        
+    Returns:
+        Dicionário (palavra_em_minúsculas -> palavra_original)
+    """
+    return {word.strip().lower(): word for word in stopwords}
+
+
+@lru_cache(maxsize=32)
+def _compile_stopword_re(stopwords: Tuple[str, ...]) -> Pattern[str]:
+    """
+    Compila uma única expressão regular com todas as palavras restritivas.
+    
+    Args:
+        stopwords: Tupla de palavras restritivas
+        
+    Returns:
+        Expressão regular compilada
+    """
+    # Palavras mais longas primeiro, para que expressões como "e somente isso"
+    # tenham prioridade sobre "somente"
+    words = sorted({word.strip() for word in stopwords if word.strip()}, key=len, reverse=True)
+    if not words:
+        return re.compile(r"(?!)")
     
-    return sorted(found, key=lambda x: x[1])
+    # Como na busca original, a palavra é encontrada também dentro de outras
+    # (por exemplo, "apenas" em "apenasmente")
+    return re.compile("|".join(re.escape(word) for word in words), re.IGNORECASE)
+
+
+def compile_restricted_words(stopwords: List[str]) -> Pattern[str]:
+    """
+    Retorna a expressão regular compilada para uma lista de palavras restritivas.
+    
+    A compilação é feita uma única vez para cada lista de palavras.
+    
+    Args:
+        stopwords: Lista de palavras restritivas
+        
+    Returns:
+        Expressão regular compilada
+    """
+    return _compile_stopword_re(tuple(stopwords))
+
+
+def _make_replacer(replacements: Optional[Dict[str, str]] = None) -> Callable[["re.Match[str]"], str]:
+    """
+    Cria a função de substituição de palavras restritivas usada com pattern.sub.
+    
+    Args:
+        replacements: Dicionário de substituições (palavra_original -> substituto)
+        
+    Returns:
+        Função que recebe a ocorrência encontrada e retorna o substituto
+    """
+    if replacements is None:
+        replacements = _DEFAULT_REPLACEMENTS
+    
+    def _replace(match: "re.Match[str]") -> str:
+        word = match.group()
+        # Se não houver substituição específica, usa uma genérica
+        replacement = replacements.get(word.lower()) or "principalmente"
+        
+        # Mantém as maiúsculas da palavra original (por exemplo, no início da frase)
+        if word.isupper() and len(word) > 1:
+            return replacement.upper()
+        if word[0].isupper():
+            return replacement[0].upper() + replacement[1:]
+        return replacement
+    
+    return _replace
 
 
 def replace_restricted_words(text: str, stopwords: List[str], 
-                            replacements: Optional[Dict[str, str]] = None) -> str:
+                            replacements: Optional[Dict[str, str]] = None,
+                            pattern: Optional[Pattern[str]] = None) -> str:
     """
     Substitui palavras restritivas no texto.
     
@@ -119,57 +393,87 @@ def replace_restricted_words(text: str, stopwords: List[str],
         text: Texto a ser processado
         stopwords: Lista de palavras restritivas
         replacements: Dicionário de substituições (palavra_original -> substituto)
+        pattern: Expressão regular já compilada para as palavras restritivas
         
     Returns:
         Texto com as palavras substituídas
     """
-    if replacements is None:
-        replacements = {
-            "limita-se": "abrange",
-            "estritamente": "adequadamente",
-            "apenas": "principalmente",
-            "exclusivamente": "especialmente",
-            "somente": "preferencialmente",
-            "unicamente": "particularmente",
-            "restritivamente": "apropriadamente",
-            "rigorosamente": "cuidadosamente",
-            "especificamente": "notadamente",
-            "exatamente": "precisamente",
-            "precisamente": "detalhadamente",
-            "unilateralmente": "diretamente",
-            "singularmente": "distintamente",
-            "determinadamente": "consistentemente",
-            "explicitamente": "claramente",
-            "meramente": "basicamente",
-            "unicidade": "característica",
-            "nada além de": "principalmente",
-            "só isso": "isso",
-            "e somente isso": "entre outros aspectos",
-            "de forma exclusiva": "de forma destacada",
-            "de modo restrito": "de modo específico",
-            "de maneira limitada": "de maneira particular",
-            "sem exceções": "em geral"
-        }
+    if pattern is None:
+        pattern = compile_restricted_words(stopwords)
     
-    result = text
-    found = check_restricted_words(text, stopwords)
-    
-    # Substitui de trás para frente para não afetar as posições
-    for word, pos in reversed(found):
-        word_lower = word.lower()
-        replacement = replacements.get(word_lower, "")
-        if not replacement:
-            # Se não houver substituição específica, usa uma genérica
-            if word.istitle():
-                replacement = "Principalmente"
-            elif word.isupper():
-                replacement = "PRINCIPALMENTE"
-            else:
-                replacement = "principalmente"
+    # Uma única passada substitui todas as ocorrências
+    return pattern.sub(_make_replacer(replacements), text)
+
+
+def replace_restricted_words_in_question(question_data: Dict[str, Any], stopwords: List[str],
+                                         replacements: Optional[Dict[str, str]] = None) -> None:
+    """
+    Substitui palavras restritivas em todos os campos de texto de uma questão.
+    
+    A expressão regular e a função de substituição são preparadas uma única vez
+    e aplicadas ao contexto, enunciado, alternativas e feedbacks.
+    
+    Args:
+        question_data: Dados da questão (alterados no próprio dicionário)
+        stopwords: Lista de palavras restritivas
+        replacements: Dicionário de substituições (palavra_original -> substituto)
+    """
+    replace = partial(compile_restricted_words(stopwords).sub, _make_replacer(replacements))
+    
+    # Verifica e substitui no contexto
+    if "context" in question_data:
+        question_data["context"] = replace(question_data["context"])
+    
+    # Verifica e substitui no enunciado
+    if "statement" in question_data:
+        question_data["statement"] = replace(question_data["statement"])
+    
+    # Verifica e substitui nas alternativas
+    if "alternatives" in question_data:
+        for alt in question_data["alternatives"]:
+            if "text" in alt:
+                alt["text"] = replace(alt["text"])
+    
+    # Verifica e substitui nos feedbacks
+    if "feedback" in question_data:
+        feedback = question_data["feedback"]
+        for key, value in feedback.items():
+            feedback[key] = replace(value)
+
+
+def extract_validation_result(text: str) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    Extrai as questões validadas e as seções do relatório da resposta do validador.
+    
+    A resposta estruturada (um objeto JSON com as chaves questions,
+    development_report e final_document) é decodificada diretamente. Respostas
+    em texto livre, com blocos de código Markdown, continuam sendo aceitas.
+    
+    Args:
+        text: Texto da resposta
         
-        result = result[:pos] + replacement + result[pos + len(word):]
+    Returns:
+        Tupla (lista de questões, dicionário com as seções extraídas)
+    """
+    data = None
+    stripped = text.strip()
+    if stripped.startswith("{"):
+        try:
+            data = json.loads(stripped)
+        except json.JSONDecodeError:
+            pass
+    
+    if data is None and '"development_report"' in text:
+        data = extract_json_from_text(text)
+    
+    if isinstance(data, dict) and ("development_report" in data or "final_document" in data):
+        sections = {
+            key: data[key] for key in ("development_report", "final_document")
+            if isinstance(data.get(key), str)
+        }
+        return questions_from_json(data), sections
     
-    return result
+    return extract_questions_from_text(text), extract_report_sections(text)
 
 
 def extract_objectives(text: str) -> List[str]:
@@ -182,23 +486,40 @@ def extract_objectives(text: str) -> List[str]:
     Returns:
         Lista de objetivos extraídos
     """
-    # Padrão para objetivos numerados (Obj.1:, Objetivo 1:, etc.)
-    objective_pattern = r"(?:Obj(?:etivo)?\.?\s*(\d+)[:\.\)]\s*)(.*?)(?=(?:\n\s*Obj(?:etivo)?\.?\s*\d+[:\.\)])|$)"
-    matches = re.findall(objective_pattern, text, re.DOTALL)
-    
-    objectives = []
-    for num, content in matches:
-        objective = f"Obj.{num}: {content.strip()}"
-        objectives.append(objective)
+    # Objetivos numerados (Obj.1:, Objetivo 1:, etc.)
+    objectives = [f"Obj.{num}: {content.strip()}" for num, content in _OBJECTIVE_RE.findall(text)]
     
     # Se não encontrou objetivos numerados, tenta por linhas
     if not objectives:
         lines = [line.strip() for line in text.split('\n') if line.strip()]
-        objectives = [line for line in lines if re.search(r"identificar|descrever|analisar|avaliar|compreender", line.lower())]
+        objectives = [line for line in lines if _OBJECTIVE_VERB_RE.search(line)]
     
     return objectives
 
 
+def questions_from_json(json_data: Any) -> List[Dict[str, Any]]:
+    """
+    Obtém a lista de questões a partir de um valor JSON já decodificado.
+    
+    Args:
+        json_data: Lista de questões, objeto com a chave "questions" ou uma única questão
+        
+    Returns:
+        Lista de questões
+    """
+    # Valores que não são objetos (como a citação "[1]" em texto livre) são ignorados
+    if isinstance(json_data, list):
+        return [item for item in json_data if isinstance(item, dict)]
+    elif isinstance(json_data, dict):
+        if "questions" in json_data and isinstance(json_data["questions"], list):
+            return [item for item in json_data["questions"] if isinstance(item, dict)]
+        elif "alternatives" in json_data or "statement" in json_data:
+            # Resposta com uma única questão
+            return [json_data]
+    
+    return []
+
+
 def extract_questions_from_text(text: str) -> List[Dict[str, Any]]:
     """
     Extrai questões de um texto.
@@ -212,26 +533,24 @@ def extract_questions_from_text(text: str) -> List[Dict[str, Any]]:
     # Primeiro tenta extrair como JSON
     json_data = extract_json_from_text(text)
     if json_data:
-        if isinstance(json_data, list):
-            return json_data
-        elif "questions" in json_data and isinstance(json_data["questions"], list):
-            return json_data["questions"]
+        questions = questions_from_json(json_data)
+        if questions:
+            return questions
     
     # Se não conseguiu extrair como JSON, tenta extrair do texto
     questions = []
     
-    # Padrão para questões de resposta única
-    single_answer_pattern = r"(?:Questão|Question)\s+(\d+).*?(?:Contextualização|Context):(.*?)(?:Enunciado|Statement):(.*?)(?:Alternativas|Alternatives):(.*?)(?:Feedback):(.*?)(?=(?:Questão|Question)\s+\d+|$)"
-    
-    matches = re.findall(single_answer_pattern, text, re.DOTALL | re.IGNORECASE)
+    # Toda questão em texto livre tem a seção "Feedback:"; sem ela, evita a
+    # busca com _SINGLE_ANSWER_RE, que em textos longos (como um JSON
+    # truncado) retrocede a cada "Questão N" encontrada
+    if "feedback:" not in text.lower():
+        return questions
     
-    for num, context, statement, alternatives_text, feedback_text in matches:
+    # Questões de resposta única
+    for num, context, statement, alternatives_text, feedback_text in _SINGLE_ANSWER_RE.findall(text):
         # Processa alternativas
-        alt_pattern = r"([a-e])\)\s*(.*?)(?=(?:[a-e]\))|$)"
-        alt_matches = re.findall(alt_pattern, alternatives_text, re.DOTALL)
-        
         alternatives = []
-        for alt_id, alt_text in alt_matches:
+        for alt_id, alt_text in _ALTERNATIVE_RE.findall(alternatives_text):
             alternatives.append({
                 "id": alt_id,
                 "text": alt_text.strip(),
@@ -242,10 +561,7 @@ def extract_questions_from_text(text: str) -> List[Dict[str, Any]]:
         feedback = {}
         correct_alt = None
         
-        fb_pattern = r"([a-e])\)\s*(Correta|Incorreta)\.?\s*(.*?)(?=(?:[a-e]\))|$)"
-        fb_matches = re.findall(fb_pattern, feedback_text, re.DOTALL | re.IGNORECASE)
-        
-        for fb_id, status, justification in fb_matches:
+        for fb_id, status, justification in _FEEDBACK_RE.findall(feedback_text):
             feedback[fb_id] = f"{status}. {justification.strip()}"
             if status.lower() == "correta":
                 correct_alt = fb_id
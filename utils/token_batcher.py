@@ -0,0 +1,62 @@
+"""
+Utilitários para agrupar itens em lotes limitados por número de tokens.
+"""
+
+from typing import Callable, List, Sequence, TypeVar
+
+
+T = TypeVar("T")
+
+# Média de caracteres por token em textos em português com JSON. A estimativa é
+# conservadora (acima do valor real) para que os lotes não excedam o contexto.
+_CHARS_PER_TOKEN = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estima o número de tokens de um texto, sem depender do tokenizador do modelo.
+    
+    Args:
+        text: Texto a ser estimado
+    
+    Returns:
+        Número estimado de tokens
+    """
+    return len(text) // _CHARS_PER_TOKEN + 1
+
+
+def pack_batches(items: Sequence[T], cost: Callable[[T], int], max_tokens: int,
+                 max_items: int = 0) -> List[List[T]]:
+    """
+    Agrupa os itens, na ordem original, em lotes cujo custo total não excede o limite.
+    
+    Um item cujo custo sozinho excede o limite forma um lote próprio.
+    
+    Args:
+        items: Itens a serem agrupados
+        cost: Função que retorna o custo (em tokens) de um item
+        max_tokens: Custo máximo de cada lote
+        max_items: Número máximo de itens por lote (0 para não limitar)
+    
+    Returns:
+        Lista de lotes
+    """
+    batches = []
+    batch = []
+    batch_tokens = 0
+    
+    for item in items:
+        item_tokens = cost(item)
+        full = max_items and len(batch) >= max_items
+        if batch and (full or batch_tokens + item_tokens > max_tokens):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+        
+        batch.append(item)
+        batch_tokens += item_tokens
+    
+    if batch:
+        batches.append(batch)
+    
+    return batches